@@ -1,421 +1,136 @@
+import functools
+import os
+import tempfile
+from io import BytesIO
+
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-import unicodedata
-import re
 
-# ----------------------------------------------------------
-# FUNCIONES DE TEXTO
-# ----------------------------------------------------------
-def normalizar(texto: str) -> str:
-    """Pasa a minúsculas, elimina tildes y espacios dobles."""
-    if not isinstance(texto, str):
-        texto = str(texto)
-
-    # Remover acentos
-    texto = ''.join(
-        c for c in unicodedata.normalize('NFD', texto)
-        if unicodedata.category(c) != 'Mn'
-    )
+from etiquetado import (
+    catalogo, etiquetas, exportar, lote, metricas, personalizados, pliegos, recetas, recursos, vectorial,
+)
+from etiquetado.busqueda import buscar_alimento
+from etiquetado.sellos import SELLOS, TIPOS_PRODUCTO, calcular_sellos
+from etiquetado.tabla import TAMANOS_PAGINA
+from etiquetado.texto import normalizar
+
+
+# Tiempos de las etapas (panel de depuración y métricas): el Tramos del
+# rerun completo y, encima, el del fragmento que esté corriendo. En un
+# rerun de un solo fragmento el del rerun ya está cerrado y sólo se usa
+# el del fragmento.
+tramos_en_curso = [metricas.Tramos()]
 
-    # Minúsculas + limpiar espacios
-    texto = texto.lower().strip()
-    texto = re.sub(r"\s+", " ", texto)
 
-    return texto
+def tramo(etapa: str):
+    """Mide `etapa` en el Tramos en curso (`with tramo("etapa"):`)."""
+    return tramos_en_curso[-1](etapa)
 
 
 # ----------------------------------------------------------
 # CARGA DEL EXCEL
 # ----------------------------------------------------------
-import zipfile
-import pandas as pd
-
-@st.cache_data
+@st.cache_resource
 def cargar_excel():
-    # Ruta del archivo ZIP en Hugging Face
-    zip_path = "CALCULADORA.zip"  # El nombre exacto del archivo ZIP subido
-
-    # Archivo Excel dentro del ZIP
-    xlsm_name = "CALCULADORA DE MACRO Y MICRONUTRIENTES 2023.xlsm"  # Nombre del archivo Excel dentro del ZIP
-
-    # Extraer y leer el archivo Excel desde el ZIP
-    with zipfile.ZipFile(zip_path) as z:
-        with z.open(xlsm_name) as f:
-            df = pd.read_excel(f, engine="openpyxl", header=2)
-
-    # Asegurar que la primera columna se llame "Alimento"
-    primera_col = df.columns[0]
-    if primera_col != "Alimento":
-        df = df.rename(columns={primera_col: "Alimento"})
-
-    # Limpiar los valores
-    df["Alimento"] = df["Alimento"].astype(str).str.strip()
-    df["Alimento_normalizado"] = df["Alimento"].apply(normalizar)
-
-    return df
-
-
-    # Asegurar que la primera columna se llame "Alimento"
-    primera_col = df.columns[0]
-    if primera_col != "Alimento":
-        df = df.rename(columns={primera_col: "Alimento"})
-
-    # Limpiar espacios en el nombre del alimento
-    df["Alimento"] = df["Alimento"].astype(str).str.strip()
-
-    # Columna normalizada (sin tildes, minúsculas) para las búsquedas
-    df["Alimento_normalizado"] = df["Alimento"].apply(normalizar)
-
-    return df
-
+    # Snapshot Parquet si está al día; si no, lee el Excel del ZIP
+    return catalogo.cargar_excel()
 
-    # Asegurar que la primera columna se llame "Alimento"
-    primera_col = df.columns[0]
-    if primera_col != "Alimento":
-        df = df.rename(columns={primera_col: "Alimento"})
 
-    # Limpiar espacios en el nombre del alimento
-    df["Alimento"] = df["Alimento"].astype(str).str.strip()
+@st.cache_resource(max_entries=1)
+def obtener_catalogo(generacion: int) -> catalogo.Catalogo:
+    """Catálogo combinado compartido por todas las sesiones del proceso."""
+    # Mismo armado que catalogo.construir_catalogo, separado por etapa
+    with tramo("carga_catalogo"):
+        df_base = cargar_excel()
+    with tramo("personalizados"):
+        df_personal = catalogo.cargar_personalizados(df_base.columns)
+    with tramo("union"):
+        return catalogo.Catalogo(df_base, df_personal, generacion)
 
-    # Columna normalizada (sin tildes, minúsculas) para las búsquedas
-    df["Alimento_normalizado"] = df["Alimento"].apply(normalizar)
 
-    return df
-
-
-df_base = cargar_excel()
-
-def cargar_personalizados():
-    """Lee un CSV con alimentos agregados por el usuario."""
-    try:
-        dfp = pd.read_csv("alimentos_personalizados.csv")
-    except FileNotFoundError:
-        # Si no existe, devolvemos un DF vacío con las mismas columnas
-        dfp = pd.DataFrame(columns=df_base.columns)
-
-    # Aseguramos que tenga las mismas columnas que la tabla base
-    for col in df_base.columns:
-        if col not in dfp.columns:
-            dfp[col] = 0
-
-    # Mismo orden de columnas
-    dfp = dfp[df_base.columns]
-
-    return dfp
-
-df_personal = cargar_personalizados()
-
-# Unimos tabla oficial + personalizados
-df = pd.concat([df_base, df_personal], ignore_index=True)
-
-# Limpiamos nombre y columna normalizada nuevamente
-df["Alimento"] = df["Alimento"].astype(str).str.strip()
-df["Alimento_normalizado"] = df["Alimento"].apply(normalizar)
-
-
-# ----------------------------------------------------------
-# FUNCIÓN PARA BUSCAR ALIMENTO (SIN TILDES / PARCIAL)
-# ----------------------------------------------------------
-def buscar_alimento(nombre: str):
-    nombre_norm = normalizar(nombre)
-    coincidencias = df[df["Alimento_normalizado"].str.contains(nombre_norm, na=False)]
-    if coincidencias.empty:
-        return None
-    return coincidencias.iloc[0]  # primera coincidencia
-
-
-# ----------------------------------------------------------
-# FUNCIÓN PARA CALCULAR SELLOS (según valores por 100 g/ml y tipo)
-# ----------------------------------------------------------
-def calcular_sellos(fila, tipo_producto: str):
+def catalogo_vigente() -> catalogo.Catalogo:
     """
-    tipo_producto: "Sólido" o "Líquido"
-    Usa los umbrales oficiales de la fase final del etiquetado chileno.
+    Catálogo de la generación actual. Sólo se reconstruye cuando cambia la
+    generación (alta/edición/borrado de personalizados); cada sección lo
+    pide al correr, así un fragmento que se rerunea solo no queda con el
+    catálogo de la última ejecución completa.
     """
-    sellos = []
-
-    energia = fila.get("Energía(kcal)", 0)           # por 100 g/ml
-    azucares = fila.get("Azúcares totales (g)", 0)   # por 100 g/ml
-    grasas_sat = fila.get("AG Sat (g)", 0)           # por 100 g/ml
-    sodio = fila.get("Sodio (mg)", 0)                # por 100 g/ml
-
-    # Umbrales oficiales fase 3 (actual)
-    if tipo_producto == "Sólido":
-        umbrales = {
-            "calorias": 275,   # kcal / 100 g
-            "azucares": 10,    # g / 100 g
-            "grasas_sat": 4,   # g / 100 g
-            "sodio": 400       # mg / 100 g
-        }
-    else:  # Líquido
-        umbrales = {
-            "calorias": 70,    # kcal / 100 ml
-            "azucares": 5,     # g / 100 ml
-            "grasas_sat": 3,   # g / 100 ml
-            "sodio": 100       # mg / 100 ml
-        }
-
-    if energia >= umbrales["calorias"]:
-        sellos.append("ALTO EN CALORÍAS")
-    if azucares >= umbrales["azucares"]:
-        sellos.append("ALTO EN AZÚCARES")
-    if grasas_sat >= umbrales["grasas_sat"]:
-        sellos.append("ALTO EN GRASAS SATURADAS")
-    if sodio >= umbrales["sodio"]:
-        sellos.append("ALTO EN SODIO")
-
-    return sellos
+    with tramo("catalogo"):
+        return obtener_catalogo(catalogo.generacion_actual())
 
 
 # ----------------------------------------------------------
-# CONSTRUCTOR DE ETIQUETA HTML TIPO MANUAL CHILENO
+# SECCIONES (FRAGMENTOS)
 # ----------------------------------------------------------
-def construir_etiqueta_html_manual(
-    nombre_producto,
-    porcion,
-    porciones_envase,
-    # macros
-    energia_100, energia_porcion,   # energia_porcion ya no se usa, se recalcula adentro
-    prot_100, prot_porcion,
-    grasa_total_100, grasa_total_porcion,
-    grasa_sat_100, grasa_sat_porcion,
-    hdc_100, hdc_porcion,
-    azucar_100, azucar_porcion,
-    sodio_100, sodio_porcion,
-    # desglose grasas opcional
-    mono_100=0.0, mono_porcion=0.0,
-    poli_100=0.0, poli_porcion=0.0,
-    trans_100=0.0, trans_porcion=0.0,
-    incluir_desglose_grasas=False,
-    # fibra opcional
-    fibra_100=0.0, fibra_porcion=0.0,
-    incluir_fibra=False,
-    # micronutrientes opcionales
-    calcio_100=0.0, calcio_porcion=0.0,
-    hierro_100=0.0, hierro_porcion=0.0,
-    zinc_100=0.0, zinc_porcion=0.0,
-    vitd_100=0.0, vitd_porcion=0.0,
-    vitb12_100=0.0, vitb12_porcion=0.0,
-    folatos_100=0.0, folatos_porcion=0.0,
-    incluir_micros=False,
-    texto_porcion=None,   # 👈 ahora el parámetro con default va al final
-):
-
+def seccion(funcion):
     """
-    Devuelve un bloque HTML con el formato tipo manual chileno:
-    encabezado negro, tabla con columnas 100 g y 1 porción.
-    La columna "1 porción" SIEMPRE se calcula como:
-        valor_100 * (porcion / 100)
+    Convierte una sección en un st.fragment: sus widgets sólo rerunean esa
+    sección. Cada corrida abre y cierra su propio Tramos con el nombre de
+    la sección; dentro de un rerun completo sus etapas se suman también a
+    las del rerun.
     """
-
-    # Factor de conversión de 100 g/ml a la porción declarada
-    factor_porcion = porcion / 100.0
-
-    def v_porcion(v100):
+    @st.fragment
+    @functools.wraps(funcion)
+    def fragmento():
+        rerun = tramos_en_curso[-1]
+        tramos = metricas.Tramos(nombre=funcion.__name__)
+        tramos_en_curso.append(tramos)
         try:
-            return float(v100) * factor_porcion
-        except (TypeError, ValueError):
-            return 0.0
-
-    # --------- MACROS (se recalculan por porción aquí dentro) ---------
-    energia_porcion_calc      = v_porcion(energia_100)
-    prot_porcion_calc         = v_porcion(prot_100)
-    grasa_total_porcion_calc  = v_porcion(grasa_total_100)
-    grasa_sat_porcion_calc    = v_porcion(grasa_sat_100)
-    hdc_porcion_calc          = v_porcion(hdc_100)
-    azucar_porcion_calc       = v_porcion(azucar_100)
-    sodio_porcion_calc        = v_porcion(sodio_100)
-
-    mono_porcion_calc         = v_porcion(mono_100)
-    poli_porcion_calc         = v_porcion(poli_100)
-    trans_porcion_calc        = v_porcion(trans_100)
-
-    fibra_porcion_calc        = v_porcion(fibra_100)
-
-    calcio_porcion_calc       = v_porcion(calcio_100)
-    hierro_porcion_calc       = v_porcion(hierro_100)
-    zinc_porcion_calc         = v_porcion(zinc_100)
-    vitd_porcion_calc         = v_porcion(vitd_100)
-    vitb12_porcion_calc       = v_porcion(vitb12_100)
-    folatos_porcion_calc      = v_porcion(folatos_100)
-
-    filas = []
-
-    # nombre, valor 100 g, valor 1 porción, decimales
-    filas.append(("Energía (kcal)", energia_100, energia_porcion_calc, 0))
-    filas.append(("Proteínas (g)", prot_100, prot_porcion_calc, 1))
-    filas.append(("Grasa Total (g)", grasa_total_100, grasa_total_porcion_calc, 1))
-
-    # Grasas bajo Grasa Total
-    if incluir_desglose_grasas:
-        filas.append(("  Saturadas (g)", grasa_sat_100, grasa_sat_porcion_calc, 1))
-        filas.append(("  Monoinsaturadas (g)", mono_100, mono_porcion_calc, 1))
-        filas.append(("  Poliinsaturadas (g)", poli_100, poli_porcion_calc, 1))
-        filas.append(("  Trans (g)", trans_100, trans_porcion_calc, 2))
-    else:
-        # al menos saturadas (norma chilena)
-        filas.append(("  Saturadas (g)", grasa_sat_100, grasa_sat_porcion_calc, 1))
-
-    filas.append(("H. de C. Disp. (g)", hdc_100, hdc_porcion_calc, 1))
-    filas.append(("Azúcares Totales (g)", azucar_100, azucar_porcion_calc, 1))
-    filas.append(("Sodio (mg)", sodio_100, sodio_porcion_calc, 1))
-
-    if incluir_fibra:
-        filas.append(("Fibra Alimentaria (g)", fibra_100, fibra_porcion_calc, 1))
-
-    # Construir filas HTML de la tabla principal
-    filas_html = ""
-    for nombre, v100, vpor, dec in filas:
-        fmt = f"{{:.{dec}f}}"
-        filas_html += f"""
-  <tr>
-    <td style="border-bottom:1px solid #ccc; padding:2px 4px;">{nombre}</td>
-    <td style="border-bottom:1px solid #ccc; padding:2px 4px; text-align:right;">{fmt.format(v100)}</td>
-    <td style="border-bottom:1px solid #ccc; padding:2px 4px; text-align:right;">{fmt.format(vpor)}</td>
-  </tr>
-"""
-
-    # Micronutrientes (bloque aparte, sólo si se pide)
-    micros_html = ""
-    if incluir_micros:
-        micros_html = f"""
-  <div style="border-top:1px solid #000; margin-top:6px; padding-top:4px; font-size:11px; font-weight:bold;">
-    Micronutrientes (por porción)
-  </div>
-  <div style="font-size:11px; margin-top:3px;">
-    Calcio: {calcio_porcion_calc:.0f} mg<br>
-    Hierro: {hierro_porcion_calc:.1f} mg<br>
-    Zinc: {zinc_porcion_calc:.2f} mg<br>
-    Vitamina D: {vitd_porcion_calc:.2f} µg<br>
-    Vitamina B12: {vitb12_porcion_calc:.2f} µg<br>
-    Folatos: {folatos_porcion_calc:.1f} µg
-  </div>
-"""
-
-    # Texto que se mostrará como descripción de la porción en la etiqueta
-    if texto_porcion:
-        porcion_label = texto_porcion
-    else:
-        porcion_label = f"{porcion:.0f} g/ml"
-
-    html = f"""
-<div style="border:2px solid #000; width:340px; font-family:Arial,sans-serif; background:#ffffff; color:#000;">
-  <div style="background:#000; color:#fff; text-align:center; font-weight:bold; padding:4px 0; font-size:14px;">
-    INFORMACIÓN NUTRICIONAL
-  </div>
-  <div style="padding:4px 6px; border-bottom:1px solid #000; font-size:12px;">
-    <b>Porción:</b> {porcion_label}<br>
-    <b>Porciones por envase:</b> {porciones_envase:.0f}
-  </div>
-  <table style="width:100%; border-collapse:collapse; font-size:12px;">
-    <tr>
-      <th style="border-bottom:1px solid #000; padding:2px 4px; text-align:left;"></th>
-      <th style="border-bottom:1px solid #000; padding:2px 4px; text-align:center;">100 g</th>
-      <th style="border-bottom:1px solid #000; padding:2px 4px; text-align:center;">1 porción</th>
-    </tr>
-    {filas_html}
-  </table>
-  {micros_html}
-</div>
-"""
-    return html
-
+            funcion()
+        finally:
+            tramos_en_curso.pop()
+            tramos.cerrar()
+            if rerun.abierto:
+                rerun.duraciones.extend(tramos.duraciones)
+
+        # El panel de la barra lateral sólo cambia en un rerun completo: la
+        # sección muestra sus propios tiempos, al día también en sus reruns
+        if st.session_state.get("debug_tiempos"):
+            st.caption("⏱️ " + " · ".join(
+                f"{etapa} {segundos * 1000:.1f} ms" for etapa, segundos in tramos.duraciones
+            ))
+    return fragmento
+
+
+def opciones_detalle():
+    """Opciones de detalle de la etiqueta (se eligen en "Un solo alimento")."""
+    return {
+        clave: st.session_state.get(clave, False)
+        for clave in ("incluir_desglose_grasas", "incluir_fibra", "incluir_micros")
+    }
 
 
 # ----------------------------------------------------------
-# FUNCIÓN PARA GENERAR IMAGEN DE ETIQUETA (PNG)
-# (formato simple, usa mismos macros; se puede refinar luego)
+# SELLOS DE ADVERTENCIA (IMÁGENES Y DESCARGAS)
 # ----------------------------------------------------------
-def generar_imagen_etiqueta(
-    nombre_alimento,
-    porcion,
-    porciones_envase,
-    energia_porcion,
-    energia_100,
-    proteinas_porcion,
-    grasas_total_porcion,
-    grasas_sat_porcion,
-    hdc_porcion,
-    azucares_porcion,
-    sodio_porcion,
-    sodio_100,
-    fibra_porcion=0.0,
-    fibra_100=0.0,
-    trans_porcion=0.0,
-    trans_100=0.0,
-    incluir_fibra=False,
-    incluir_trans=False,
-    texto_porcion=None,
-):
-    # Tamaño base de la imagen
-    img = Image.new("RGB", (800, 900), "white")
-    draw = ImageDraw.Draw(img)
-
-    font_title = ImageFont.load_default()
-    font_bold = ImageFont.load_default()
-    font_normal = ImageFont.load_default()
-
-    x_margin = 40
-    y = 30
-
-    draw.text((x_margin, y), "INFORMACIÓN NUTRICIONAL", font=font_title, fill="black")
-    y += 30
-
-    draw.text((x_margin, y), f"Producto: {nombre_alimento}", font=font_normal, fill="black")
-    y += 25
-
-    # Texto de porción en la imagen
-    if texto_porcion:
-        porcion_label_img = texto_porcion
-    else:
-        porcion_label_img = f"{porcion:.0f} g/ml"
-
-    draw.text((x_margin, y), f"Porción: {porcion_label_img}", font=font_normal, fill="black")
-    y += 20
-    draw.text((x_margin, y), f"Porciones por envase: {porciones_envase}", font=font_normal, fill="black")
-    y += 30
-
-    draw.line((x_margin, y, 760, y), fill="black", width=2)
-    y += 10
-
-    draw.text((x_margin, y), "Nutriente", font=font_bold, fill="black")
-    draw.text((x_margin + 300, y), f"Por {porcion:.0f} g/ml", font=font_bold, fill="black")
-    draw.text((x_margin + 550, y), "Por 100 g/ml", font=font_bold, fill="black")
-    y += 25
-
-    draw.line((x_margin, y, 760, y), fill="black", width=1)
-    y += 10
-
-    def fila(nutriente, valor_porcion_str, valor_100_str):
-        nonlocal y
-        draw.text((x_margin, y), nutriente, font=font_normal, fill="black")
-        draw.text((x_margin + 300, y), valor_porcion_str, font=font_normal, fill="black")
-        draw.text((x_margin + 550, y), valor_100_str, font=font_normal, fill="black")
-        y += 22
-
-    fila("Energía (kcal)", f"{energia_porcion:.0f}", f"{energia_100:.0f}")
-    fila("Proteínas (g)", f"{proteinas_porcion:.1f}", "-")
-    fila("Grasas totales (g)", f"{grasas_total_porcion:.1f}", "-")
-    fila("   de las cuales saturadas (g)", f"{grasas_sat_porcion:.1f}", "-")
-    fila("Hidratos de carbono disp. (g)", f"{hdc_porcion:.1f}", "-")
-    fila("   azúcares totales (g)", f"{azucares_porcion:.1f}", "-")
-    fila("Sodio (mg)", f"{sodio_porcion:.0f}", f"{sodio_100:.0f}")
-
-    if incluir_fibra:
-        fila("Fibra alimentaria (g)", f"{fibra_porcion:.1f}", f"{fibra_100:.1f}")
-
-    if incluir_trans:
-        fila("Grasas trans (g)", f"{trans_porcion:.2f}", f"{trans_100:.2f}")
+def mostrar_sellos(sellos_activos, clave: str):
+    """Tira con los octógonos activos y un botón de descarga por sello."""
+    assets = recursos.obtener()
+    with tramo("sellos_imagenes"):
+        tira = assets.tira_sellos(sellos_activos)
+    st.image(tira, width=130 * len(sellos_activos))
+
+    cols = st.columns(len(sellos_activos))
+    for col, texto in zip(cols, sellos_activos):
+        with col:
+            st.download_button(
+                label=f"Descargar {texto}.png",
+                data=assets.sellos[texto],
+                file_name=f"{texto.replace(' ', '_').lower()}.png",
+                mime="image/png",
+                key=f"sello_{clave}_{texto}",
+            )
 
-    y += 20
-    draw.line((x_margin, y, 760, y), fill="black", width=2)
 
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return buf
+def leer_recetas_subidas(archivo):
+    """Recetas de un CSV/JSON subido (se lee con el mismo parser que la CLI)."""
+    sufijo = os.path.splitext(archivo.name)[1].lower()
+    with tempfile.TemporaryDirectory() as carpeta:
+        # Con el nombre original, para que los errores lo mencionen
+        ruta = os.path.join(carpeta, os.path.basename(archivo.name) or "recetas" + sufijo)
+        with open(ruta, "wb") as f:
+            f.write(archivo.getvalue())
+        return list(lote.leer_recetas(ruta))
 
 
 # ----------------------------------------------------------
@@ -424,29 +139,11 @@ def generar_imagen_etiqueta(
 st.set_page_config(page_title="Calculadora Nutricional Chile", layout="wide")
 
 # ================= CABECERA CENTRADA CON LOGO =================
-from PIL import Image
-import streamlit as st
-
-# Cargar logo (asegúrate del nombre del archivo)
-logo = Image.open("logonr-300x60.png")  # <-- cambia el nombre si es distinto
+# Logo y sellos se cargan una vez por proceso (ver etiquetado/recursos.py)
+assets = recursos.obtener()
 
-# Convertir logo a bytes para usarlo en HTML
-import base64
-from io import BytesIO
-
-buffer = BytesIO()
-logo.save(buffer, format="PNG")
-logo_b64 = base64.b64encode(buffer.getvalue()).decode()
-
-# Mostrar logo centrado con HTML puro
-st.markdown(
-    f"""
-    <div style="text-align:center; margin-top:20px; margin-bottom:10px;">
-        <img src="data:image/png;base64,{logo_b64}" width="250">
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+# Mostrar logo centrado con HTML puro (base64 precalculado)
+st.markdown(assets.logo_html(), unsafe_allow_html=True)
 
 # Título centrado
 st.markdown(
@@ -495,775 +192,747 @@ with st.expander("📘 Ver instrucciones de uso"):
 
 
 # ===================== MODO 1: UN SOLO ALIMENTO =====================
-st.header("🥛 Un solo alimento")
+@seccion
+def seccion_un_alimento():
+    cat = catalogo_vigente()
 
-col1, col2 = st.columns([2, 1])
+    st.header("🥛 Un solo alimento")
 
-with col1:
-    alimento_ingresado = st.text_input("🔍 Buscar alimento (con o sin tildes):", "")
+    col1, col2 = st.columns([2, 1])
 
-with col2:
-    # Descripción de la porción + equivalente en g/ml
-    col_por1, col_por2 = st.columns(2)
-    with col_por1:
-        descripcion_porcion = st.text_input(
-            "Descripción de la porción",
-            value="1 porción",
-            help="Ej: 1 mandarina, 1 unidad, 3/4 taza, 1 vaso, etc."
-        )
-    with col_por2:
-        porcion = st.number_input(
-            "Equivalente (g/ml) de esa porción",
-            value=100,
+    with col1:
+        alimento_ingresado = st.text_input("🔍 Buscar alimento (con o sin tildes):", "")
+
+    with col2:
+        # Descripción de la porción + equivalente en g/ml
+        col_por1, col_por2 = st.columns(2)
+        with col_por1:
+            descripcion_porcion = st.text_input(
+                "Descripción de la porción",
+                value="1 porción",
+                help="Ej: 1 mandarina, 1 unidad, 3/4 taza, 1 vaso, etc."
+            )
+        with col_por2:
+            porcion = st.number_input(
+                "Equivalente (g/ml) de esa porción",
+                value=100,
+                min_value=1,
+                step=1,
+                format="%d",
+                help="Cuántos g o ml son esa porción (ej: 1 mandarina = 120 g)"
+            )
+
+        porciones_envase = st.number_input(
+            "Porciones por envase",
+            value=1,
             min_value=1,
             step=1,
             format="%d",
-            help="Cuántos g o ml son esa porción (ej: 1 mandarina = 120 g)"
         )
 
-    porciones_envase = st.number_input(
-        "Porciones por envase",
-        value=1,
-        min_value=1,
-        step=1,
-        format="%d",
-    )
+        tipo_producto = st.radio("Tipo de producto", ["Sólido", "Líquido"])
 
-    tipo_producto = st.radio("Tipo de producto", ["Sólido", "Líquido"])
-
-    st.markdown("**Opciones de detalle en la etiqueta:**")
-    incluir_desglose_grasas = st.checkbox(
-        "Mostrar desglose de grasas (sat/mono/poli/trans)", value=False
-    )
-    incluir_fibra = st.checkbox("Incluir Fibra Alimentaria", value=False)
-    incluir_micros = st.checkbox(
-        "Incluir micronutrientes (Ca, Fe, Zn, Vit D, B12, Folatos)", value=False
-    )
-
-if alimento_ingresado:
+        st.markdown("**Opciones de detalle en la etiqueta:**")
+        # Con clave: las demás secciones las leen de session_state
+        incluir_desglose_grasas = st.checkbox(
+            "Mostrar desglose de grasas (sat/mono/poli/trans)", value=False,
+            key="incluir_desglose_grasas",
+        )
+        incluir_fibra = st.checkbox("Incluir Fibra Alimentaria", value=False, key="incluir_fibra")
+        incluir_micros = st.checkbox(
+            "Incluir micronutrientes (Ca, Fe, Zn, Vit D, B12, Folatos)", value=False,
+            key="incluir_micros",
+        )
 
-    resultado = buscar_alimento(alimento_ingresado)
+    if alimento_ingresado:
 
-    if resultado is None:
-        st.error("❌ No se encontró el alimento. Prueba con otra palabra o parte del nombre.")
-    else:
-        st.success(f"✔ Se encontró: **{resultado['Alimento']}**")
+        with tramo("busqueda"):
+            filas_encontradas = buscar_alimento(cat, alimento_ingresado)
 
-        # Factor de porción respecto a la columna Cantidad(g/ml)
-        cantidad_base = resultado.get("Cantidad(g/ml)", 100)
-        if not isinstance(cantidad_base, (int, float)) or cantidad_base == 0:
-            cantidad_base = 100  # seguridad
+        if not filas_encontradas:
+            st.error("❌ No se encontró el alimento. Prueba con otra palabra o parte del nombre.")
+        else:
+            resultado = cat.df.iloc[filas_encontradas[0]]
+            st.success(f"✔ Se encontró: **{resultado['Alimento']}**")
+            if normalizar(alimento_ingresado) not in resultado["Alimento_normalizado"]:
+                st.info("ℹ️ No hubo coincidencia exacta; se muestra el alimento más parecido.")
+
+            # Columnas numéricas de la fila (float32 en el catálogo) en float64
+            columnas_num = cat.matriz.columnas
+            valores_fila = pd.Series(
+                catalogo.a_float64(resultado[columnas_num].to_numpy()), index=columnas_num
+            )
 
-        factor = porcion / cantidad_base
+            # Factor de porción respecto a la columna Cantidad(g/ml)
+            cantidad_base = valores_fila.get("Cantidad(g/ml)", 100)
+            if not cantidad_base > 0:
+                cantidad_base = 100  # seguridad (NaN o 0)
 
-        # ------------------- DATOS POR PORCIÓN (TABLA COMPLETA) -------------------
-        st.subheader(f"Resultados nutricionales para {porcion:.0f} g/ml")
+            factor = porcion / cantidad_base
 
-        datos_porcionados = {}
-        for columna, valor in resultado.items():
-            if isinstance(valor, (int, float)):
-                datos_porcionados[columna] = round(valor * factor, 2)
-            else:
-                datos_porcionados[columna] = valor
+            # ------------------- DATOS POR PORCIÓN (TABLA COMPLETA) -------------------
+            st.subheader(f"Resultados nutricionales para {porcion:.0f} g/ml")
 
-        df_resultado = pd.DataFrame(datos_porcionados, index=[0])
+            # Todas las columnas numéricas se escalan de una vez; el texto se copia tal cual
+            datos_porcionados = {
+                **resultado.to_dict(),
+                **(valores_fila * factor).round(2).to_dict(),
+            }
+            # Valores por 100 g/ml: la fila con sus números ya en float64
+            valores_100 = {**resultado.to_dict(), **valores_fila.to_dict()}
 
-        columnas_ocultas = ["Columna1", "Fuente"]
-        df_mostrar = df_resultado.drop(
-            columns=[c for c in columnas_ocultas if c in df_resultado.columns],
-            errors="ignore"
-        )
-        st.dataframe(df_mostrar, use_container_width=True)
-
-        # ------------------- OBTENER VALORES CLAVE -------------------
-        energia_porcion = datos_porcionados.get("Energía(kcal)", 0.0)
-        energia_100 = resultado.get("Energía(kcal)", 0.0)
-
-        proteinas_porcion = datos_porcionados.get("Proteínas (g)", 0.0)
-        proteinas_100 = resultado.get("Proteínas (g)", 0.0)
-
-        grasas_total_porcion = datos_porcionados.get("Lípidos totales (g)", 0.0)
-        grasas_total_100 = resultado.get("Lípidos totales (g)", 0.0)
-
-        grasas_sat_porcion = datos_porcionados.get("AG Sat (g)", 0.0)
-        grasas_sat_100 = resultado.get("AG Sat (g)", 0.0)
-
-        hdc_porcion = datos_porcionados.get("HdeC disp (g)", 0.0)
-        hdc_100 = resultado.get("HdeC disp (g)", 0.0)
-
-        azucares_porcion = datos_porcionados.get("Azúcares totales (g)", 0.0)
-        azucares_100 = resultado.get("Azúcares totales (g)", 0.0)
-
-        sodio_porcion = datos_porcionados.get("Sodio (mg)", 0.0)
-        sodio_100 = resultado.get("Sodio (mg)", 0.0)
-
-        # Grasas mono/poli/trans
-        mono_porcion = datos_porcionados.get("AG Mono (g)", 0.0)
-        mono_100 = resultado.get("AG Mono (g)", 0.0)
-        poli_porcion = datos_porcionados.get("AG Poli (g)", 0.0)
-        poli_100 = resultado.get("AG Poli (g)", 0.0)
-
-        # Fibra y trans
-        fibra_porcion = datos_porcionados.get("Fibra Total (g)", 0.0)
-        fibra_100 = resultado.get("Fibra Total (g)", 0.0)
-        trans_porcion = datos_porcionados.get("AG Trans (g)", 0.0)
-        trans_100 = resultado.get("AG Trans (g)", 0.0)
-
-        # Micronutrientes
-        calcio_porcion = datos_porcionados.get("Calcio (mg)", 0.0)
-        calcio_100 = resultado.get("Calcio (mg)", 0.0)
-        hierro_porcion = datos_porcionados.get("Hierro (mg)", 0.0)
-        hierro_100 = resultado.get("Hierro (mg)", 0.0)
-        zinc_porcion = datos_porcionados.get("Zinc (mg)", 0.0)
-        zinc_100 = resultado.get("Zinc (mg)", 0.0)
-        vitd_porcion = datos_porcionados.get("Vit D (ug)", 0.0)
-        vitd_100 = resultado.get("Vit D (ug)", 0.0)
-        vitb12_porcion = datos_porcionados.get("Vit B12 (ug)", 0.0)
-        vitb12_100 = resultado.get("Vit B12 (ug)", 0.0)
-        folatos_porcion = datos_porcionados.get("Folatos (ug)", 0.0)
-        folatos_100 = resultado.get("Folatos (ug)", 0.0)
-
-        # ------------------- ETIQUETA NUTRICIONAL HTML (FORMATO MANUAL) -------------------
-        st.subheader("🧾 Etiqueta nutricional (vista previa)")
-        st.markdown(f"**Producto:** {resultado['Alimento']}")
-
-        # Texto de porción para mostrar en la etiqueta (ej: "1 mandarina (120 g/ml)")
-        desc_clean = (descripcion_porcion or "").strip()
-        if desc_clean:
-            texto_porcion = f"{desc_clean} ({porcion:.0f} g/ml)"
-        else:
-            texto_porcion = f"{porcion:.0f} g/ml"
-
-        etiqueta_html = construir_etiqueta_html_manual(
-            nombre_producto=resultado["Alimento"],
-            porcion=porcion,
-            porciones_envase=porciones_envase,
-            texto_porcion=texto_porcion,
-            energia_100=energia_100,
-            energia_porcion=energia_porcion,
-            prot_100=proteinas_100,
-            prot_porcion=proteinas_porcion,
-            grasa_total_100=grasas_total_100,
-            grasa_total_porcion=grasas_total_porcion,
-            grasa_sat_100=grasas_sat_100,
-            grasa_sat_porcion=grasas_sat_porcion,
-            hdc_100=hdc_100,
-            hdc_porcion=hdc_porcion,
-            azucar_100=azucares_100,
-            azucar_porcion=azucares_porcion,
-            sodio_100=sodio_100,
-            sodio_porcion=sodio_porcion,
-            mono_100=mono_100,
-            mono_porcion=mono_porcion,
-            poli_100=poli_100,
-            poli_porcion=poli_porcion,
-            trans_100=trans_100,
-            trans_porcion=trans_porcion,
-            incluir_desglose_grasas=incluir_desglose_grasas,
-            fibra_100=fibra_100,
-            fibra_porcion=fibra_porcion,
-            incluir_fibra=incluir_fibra,
-            calcio_100=calcio_100,
-            calcio_porcion=calcio_porcion,
-            hierro_100=hierro_100,
-            hierro_porcion=hierro_porcion,
-            zinc_100=zinc_100,
-            zinc_porcion=zinc_porcion,
-            vitd_100=vitd_100,
-            vitd_porcion=vitd_porcion,
-            vitb12_100=vitb12_100,
-            vitb12_porcion=vitb12_porcion,
-            folatos_100=folatos_100,
-            folatos_porcion=folatos_porcion,
-            incluir_micros=incluir_micros,
-        )
-        st.markdown(etiqueta_html, unsafe_allow_html=True)
-
-        # ------------------- GENERAR IMAGEN Y BOTÓN DE DESCARGA -------------------
-        st.subheader("📥 Descargar etiqueta como imagen PNG")
-
-        img_buf = generar_imagen_etiqueta(
-            nombre_alimento=resultado["Alimento"],
-            porcion=porcion,
-            porciones_envase=porciones_envase,
-            energia_porcion=energia_porcion,
-            energia_100=energia_100,
-            proteinas_porcion=proteinas_porcion,
-            grasas_total_porcion=grasas_total_porcion,
-            grasas_sat_porcion=grasas_sat_porcion,
-            hdc_porcion=hdc_porcion,
-            azucares_porcion=azucares_porcion,
-            sodio_porcion=sodio_porcion,
-            sodio_100=sodio_100,
-            fibra_porcion=fibra_porcion,
-            fibra_100=fibra_100,
-            trans_porcion=trans_porcion,
-            trans_100=trans_100,
-            incluir_fibra=incluir_fibra,
-            incluir_trans=incluir_desglose_grasas,  # trans como parte del desglose
-            texto_porcion=texto_porcion,
-        )
+            df_resultado = pd.DataFrame(datos_porcionados, index=[0])
 
-        st.download_button(
-            label="⬇️ Descargar etiqueta PNG",
-            data=img_buf,
-            file_name=f"etiqueta_{resultado['Alimento']}.png",
-            mime="image/png"
-        )
+            columnas_ocultas = ["Columna1", "Fuente"]
+            df_mostrar = df_resultado.drop(
+                columns=[c for c in columnas_ocultas if c in df_resultado.columns],
+                errors="ignore"
+            )
+            st.dataframe(df_mostrar, use_container_width=True)
+
+            # ------------------- ETIQUETA NUTRICIONAL HTML (FORMATO MANUAL) -------------------
+            st.subheader("🧾 Etiqueta nutricional (vista previa)")
+            st.markdown(f"**Producto:** {resultado['Alimento']}")
+
+            # Texto de porción para mostrar en la etiqueta (ej: "1 mandarina (120 g/ml)")
+            texto_porcion = etiquetas.texto_porcion(descripcion_porcion, porcion)
+
+            # Valores por 100 g/ml = fila del catálogo (valores_100); por porción = datos_porcionados
+            with tramo("html"):
+                etiqueta_html = etiquetas.etiqueta_html(
+                    valores_100=valores_100,
+                    porcion=porcion,
+                    porciones_envase=porciones_envase,
+                    texto_porcion=texto_porcion,
+                    incluir_desglose_grasas=incluir_desglose_grasas,
+                    incluir_fibra=incluir_fibra,
+                    incluir_micros=incluir_micros,
+                )
+            st.markdown(etiqueta_html, unsafe_allow_html=True)
+
+            # ------------------- GENERAR IMAGEN Y BOTÓN DE DESCARGA -------------------
+            st.subheader("📥 Descargar etiqueta como imagen PNG")
+
+            # La imagen se dibuja recién cuando se pide (y queda memoizada).
+            # Se recuerda para qué etiqueta se pidió: si cambia el alimento,
+            # la porción o las opciones, hay que volver a pedirla.
+            etiqueta_unidad = (
+                resultado["Alimento"], porcion, porciones_envase, texto_porcion,
+                incluir_desglose_grasas, incluir_fibra, incluir_micros,
+            )
+            if st.button("🖼️ Generar etiqueta PNG", key="png_unidad_btn"):
+                st.session_state["png_unidad"] = etiqueta_unidad
+
+            if st.session_state.get("png_unidad") == etiqueta_unidad:
+                with tramo("png"):
+                    png_bytes = etiquetas.etiqueta_png_bytes(
+                        resultado["Alimento"],
+                        valores_100=valores_100,
+                        valores_porcion=datos_porcionados,
+                        porcion=porcion,
+                        porciones_envase=porciones_envase,
+                        texto_porcion=texto_porcion,
+                        incluir_fibra=incluir_fibra,
+                        incluir_trans=incluir_desglose_grasas,  # trans como parte del desglose
+                    )
 
+                st.download_button(
+                    label="⬇️ Descargar etiqueta PNG",
+                    data=png_bytes,
+                    file_name=f"etiqueta_{resultado['Alimento']}.png",
+                    mime="image/png"
+                )
+
+                # Versión vectorial para imprenta (escala a cualquier tamaño)
+                with tramo("vectorial"):
+                    svg_unidad, pdf_unidad = vectorial.documentos_etiqueta(
+                        valores_100, porcion, porciones_envase, texto_porcion,
+                        incluir_desglose_grasas, incluir_fibra, incluir_micros,
+                    )
+                col_svg, col_pdf = st.columns(2)
+                with col_svg:
+                    st.download_button(
+                        label="⬇️ Descargar etiqueta SVG",
+                        data=svg_unidad,
+                        file_name=f"etiqueta_{resultado['Alimento']}.svg",
+                        mime="image/svg+xml",
+                    )
+                with col_pdf:
+                    st.download_button(
+                        label="⬇️ Descargar etiqueta PDF",
+                        data=pdf_unidad,
+                        file_name=f"etiqueta_{resultado['Alimento']}.pdf",
+                        mime="application/pdf",
+                    )
 
-        # ------------------- SELLOS MINSAL -------------------
-        st.subheader("⚠️ Sellos de advertencia (según 100 g o 100 ml)")
 
-        # Calculamos los sellos usando la misma función que ya existe
-        sellos_unidad = calcular_sellos(resultado, tipo_producto)
+            # ------------------- SELLOS MINSAL -------------------
+            st.subheader("⚠️ Sellos de advertencia (según 100 g o 100 ml)")
 
-        if not sellos_unidad:
-            st.success(
-                f"✅ Este producto ({tipo_producto.lower()}) NO presenta sellos de advertencia "
-                "según los umbrales oficiales de la fase actual."
-            )
-        else:
-            st.write("Sellos que debe llevar este alimento:")
-
-            # Texto -> clave interna
-            mapa_clave = {
-                "ALTO EN AZÚCARES": "azucares",
-                "ALTO EN CALORÍAS": "calorias",
-                "ALTO EN GRASAS SATURADAS": "grasas",
-                "ALTO EN SODIO": "sodio",
-            }
+            # Calculamos los sellos usando la misma función que ya existe
+            with tramo("sellos"):
+                sellos_unidad = calcular_sellos(valores_100, tipo_producto)
 
-            # Clave -> (ruta imagen, texto)
-            imagenes_sellos = {
-                "azucares": ("sellos/alto_azucares.png", "ALTO EN AZÚCARES"),
-                "calorias": ("sellos/alto_calorias.png", "ALTO EN CALORÍAS"),
-                "grasas": ("sellos/alto_grasas.png", "ALTO EN GRASAS SATURADAS"),
-                "sodio": ("sellos/alto_sodio.png", "ALTO EN SODIO"),
-            }
+            if not sellos_unidad:
+                st.success(
+                    f"✅ Este producto ({tipo_producto.lower()}) NO presenta sellos de advertencia "
+                    "según los umbrales oficiales de la fase actual."
+                )
+            else:
+                st.write("Sellos que debe llevar este alimento:")
 
-            claves_activas = [mapa_clave[s] for s in sellos_unidad if s in mapa_clave]
+                mostrar_sellos(sellos_unidad, "unidad")
 
-            cols = st.columns(len(claves_activas))
-            for col, clave in zip(cols, claves_activas):
-                ruta, texto = imagenes_sellos[clave]
-                with col:
-                    img = Image.open(ruta)
-                    st.image(img, width=120)
+            st.divider()
 
-                    with open(ruta, "rb") as f:
-                        img_bytes = f.read()
 
-                    st.download_button(
-                        label=f"Descargar {texto}.png",
-                        data=img_bytes,
-                        file_name=f"{texto.replace(' ', '_').lower()}.png",
-                        mime="image/png",
-                    )
+seccion_un_alimento()
 
-        st.divider()
 
 # ===================== MODO 2: PREPARACIÓN CON VARIOS ALIMENTOS =====================
-st.header("🥣 Preparación con varios alimentos")
+@seccion
+def seccion_preparacion():
+    cat = catalogo_vigente()
+    # Opciones de detalle elegidas en "Un solo alimento" (otro fragmento)
+    incluir_desglose_grasas, incluir_fibra, incluir_micros = opciones_detalle().values()
 
-nombre_prep = st.text_input("Nombre de la preparación", "Leche con plátano")
-tipo_producto_prep = st.radio("Tipo de producto de la preparación", ["Sólido", "Líquido"], key="tipo_prep_radio")
+    st.header("🥣 Preparación con varios alimentos")
 
-# Filtrar solo alimentos (sin títulos ni bibliografía)
-alimentos_filtrados = df["Alimento"].dropna().astype(str).str.strip()
+    nombre_prep = st.text_input("Nombre de la preparación", "Leche con plátano")
+    tipo_producto_prep = st.radio("Tipo de producto de la preparación", ["Sólido", "Líquido"], key="tipo_prep_radio")
 
-patron_titulos = r"^\s*\d+(\.\d+)*\s+[A-Za-zÁÉÍÓÚáéíóúñÑ]"
-patron_bibliografia = r"^\s*\d+\.\s+[A-Za-z]"
-patron_calculo = r"^\s*\d+\.\s+Valor"
+    # Lista ordenada de alimentos (sin títulos ni bibliografía) y su índice de
+    # subcadenas: se arman una vez por generación del catálogo
+    opciones_alimentos = cat.opciones_preparacion
 
-alimentos_filtrados = alimentos_filtrados[
-    ~alimentos_filtrados.str.match(patron_titulos) &
-    ~alimentos_filtrados.str.match(patron_bibliografia) &
-    ~alimentos_filtrados.str.match(patron_calculo)
-]
+    # 🔎 Búsqueda manual sin tildes para la lista de preparación
+    busqueda_prep = st.text_input(
+        "Buscar en la lista de alimentos para la preparación (con o sin tildes):",
+        ""
+    )
 
-alimentos_filtrados = alimentos_filtrados[alimentos_filtrados != ""]
+    if busqueda_prep:
+        filtro_norm = normalizar(busqueda_prep)
+        with tramo("busqueda_preparacion"):
+            opciones_filtradas = [
+                opciones_alimentos[i] for i in cat.indice_opciones.filtrar(filtro_norm)
+            ]
+    else:
+        opciones_filtradas = opciones_alimentos
 
-opciones_alimentos = sorted(alimentos_filtrados.unique().tolist(), key=normalizar)
+    seleccionados = st.multiselect(
+        "Selecciona los alimentos de la preparación",
+        opciones_filtradas
+    )
 
-# 🔎 Búsqueda manual sin tildes para la lista de preparación
-busqueda_prep = st.text_input(
-    "Buscar en la lista de alimentos para la preparación (con o sin tildes):",
-    ""
-)
 
-if busqueda_prep:
-    filtro_norm = normalizar(busqueda_prep)
-    opciones_filtradas = [
-        a for a in opciones_alimentos
-        if filtro_norm in normalizar(a)
-    ]
-else:
-    opciones_filtradas = opciones_alimentos
-
-seleccionados = st.multiselect(
-    "Selecciona los alimentos de la preparación",
-    opciones_filtradas
-)
+    cantidades = {}
+    total_peso = 0.0
 
+    for alim in seleccionados:
+        cant = st.number_input(
+            f"Cantidad de {alim} (g/ml)",
+            min_value=0.0,
+            value=100.0,
+            key=f"prep_{alim}"
+        )
+        cantidades[alim] = cant
+        total_peso += cant
 
-cantidades = {}
-total_peso = 0.0
+    # Definir porción de la preparación una vez calculado el peso total
+    default_porcion_prep = int(total_peso) if total_peso > 0 else 200
 
-for alim in seleccionados:
-    cant = st.number_input(
-        f"Cantidad de {alim} (g/ml)",
-        min_value=0.0,
-        value=100.0,
-        key=f"prep_{alim}"
-    )
-    cantidades[alim] = cant
-    total_peso += cant
-
-# Definir porción de la preparación una vez calculado el peso total
-default_porcion_prep = int(total_peso) if total_peso > 0 else 200
-
-col_prep1, col_prep2 = st.columns(2)
-with col_prep1:
-    descripcion_porcion_prep = st.text_input(
-        "Descripción de la porción de la preparación",
-        value="1 porción",
-        help="Ej: 1 taza, 1 vaso, 1 plato, etc.",
-        key="desc_porcion_prep",
-    )
-with col_prep2:
-    porcion_prep = st.number_input(
-        "Equivalente (g/ml) de esa porción",
-        value=default_porcion_prep,
+    col_prep1, col_prep2 = st.columns(2)
+    with col_prep1:
+        descripcion_porcion_prep = st.text_input(
+            "Descripción de la porción de la preparación",
+            value="1 porción",
+            help="Ej: 1 taza, 1 vaso, 1 plato, etc.",
+            key="desc_porcion_prep",
+        )
+    with col_prep2:
+        porcion_prep = st.number_input(
+            "Equivalente (g/ml) de esa porción",
+            value=default_porcion_prep,
+            min_value=1,
+            step=1,
+            format="%d",
+            key="porcion_prep",
+        )
+
+    porciones_envase_prep = st.number_input(
+        "Porciones por envase/preparación",
+        value=1,
         min_value=1,
         step=1,
         format="%d",
-        key="porcion_prep",
+        key="porciones_envase_prep",
     )
 
-porciones_envase_prep = st.number_input(
-    "Porciones por envase/preparación",
-    value=1,
-    min_value=1,
-    step=1,
-    format="%d",
-    key="porciones_envase_prep",
-)
-
 
-if st.button("Calcular preparación"):
-    if not seleccionados or total_peso == 0:
-        st.error("Debes seleccionar al menos un alimento y asignar cantidades mayores a 0.")
-    else:
-        # Columnas numéricas (macro + micro)
-        numeric_cols = df.select_dtypes(include="number").columns
-        total_nutr = {col: 0.0 for col in numeric_cols}
-
-        for alim in seleccionados:
-            cant = cantidades[alim]
-            if cant <= 0:
-                continue
-            fila = df[df["Alimento"] == alim].iloc[0]
-            base = fila.get("Cantidad(g/ml)", 100)
-            if not isinstance(base, (int, float)) or base == 0:
-                base = 100
-            factor_alim = cant / base
-            for col in numeric_cols:
-                val = fila.get(col, 0)
-                if pd.notna(val):
-                    total_nutr[col] += float(val) * factor_alim
-
-        factor_porcion_prep = porcion_prep / total_peso
-        datos_porcion_prep = {col: round(total_nutr[col] * factor_porcion_prep, 2) for col in numeric_cols}
-
-        st.subheader(f"Resultados nutricionales de la preparación por {porcion_prep:.0f} g/ml")
-
-        df_prep = pd.DataFrame(datos_porcion_prep, index=[0])
-
-        columnas_ocultas = ["Columna1", "Fuente"]
-        df_prep_mostrar = df_prep.drop(
-            columns=[c for c in columnas_ocultas if c in df_prep.columns],
-            errors="ignore"
-        )
-        st.dataframe(df_prep_mostrar, use_container_width=True)
-
-        # Totales y valores por 100 g/ml
-        energia_total = total_nutr.get("Energía(kcal)", 0.0)
-        energia_porcion_prep = datos_porcion_prep.get("Energía(kcal)", 0.0)
-        energia_100_prep = energia_total / total_peso * 100 if total_peso > 0 else 0.0
-
-        prot_total_prep = total_nutr.get("Proteínas (g)", 0.0)
-        proteinas_porcion_prep = datos_porcion_prep.get("Proteínas (g)", 0.0)
-        proteinas_100_prep = prot_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        grasa_total_total = total_nutr.get("Lípidos totales (g)", 0.0)
-        grasas_total_porcion_prep = datos_porcion_prep.get("Lípidos totales (g)", 0.0)
-        grasas_total_100_prep = grasa_total_total / total_peso * 100 if total_peso > 0 else 0.0
-
-        grasa_sat_total = total_nutr.get("AG Sat (g)", 0.0)
-        grasas_sat_porcion_prep = datos_porcion_prep.get("AG Sat (g)", 0.0)
-        grasas_sat_100_prep = grasa_sat_total / total_peso * 100 if total_peso > 0 else 0.0
-
-        hdc_total_prep = total_nutr.get("HdeC disp (g)", 0.0)
-        hdc_porcion_prep = datos_porcion_prep.get("HdeC disp (g)", 0.0)
-        hdc_100_prep = hdc_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        azucares_total = total_nutr.get("Azúcares totales (g)", 0.0)
-        azucares_porcion_prep = datos_porcion_prep.get("Azúcares totales (g)", 0.0)
-        azucares_100_prep = azucares_total / total_peso * 100 if total_peso > 0 else 0.0
-
-        sodio_total = total_nutr.get("Sodio (mg)", 0.0)
-        sodio_porcion_prep = datos_porcion_prep.get("Sodio (mg)", 0.0)
-        sodio_100_prep = sodio_total / total_peso * 100 if total_peso > 0 else 0.0
-
-        # Grasas mono/poli/trans
-        mono_total_prep = total_nutr.get("AG Mono (g)", 0.0)
-        mono_porcion_prep = datos_porcion_prep.get("AG Mono (g)", 0.0)
-        mono_100_prep = mono_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        poli_total_prep = total_nutr.get("AG Poli (g)", 0.0)
-        poli_porcion_prep = datos_porcion_prep.get("AG Poli (g)", 0.0)
-        poli_100_prep = poli_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        # Fibra y trans
-        fibra_total_prep = total_nutr.get("Fibra Total (g)", 0.0)
-        fibra_porcion_prep = datos_porcion_prep.get("Fibra Total (g)", 0.0)
-        fibra_100_prep = fibra_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        trans_total_prep = total_nutr.get("AG Trans (g)", 0.0)
-        trans_porcion_prep = datos_porcion_prep.get("AG Trans (g)", 0.0)
-        trans_100_prep = trans_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        # Micronutrientes
-        calcio_total_prep = total_nutr.get("Calcio (mg)", 0.0)
-        calcio_porcion_prep = datos_porcion_prep.get("Calcio (mg)", 0.0)
-        calcio_100_prep = calcio_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        hierro_total_prep = total_nutr.get("Hierro (mg)", 0.0)
-        hierro_porcion_prep = datos_porcion_prep.get("Hierro (mg)", 0.0)
-        hierro_100_prep = hierro_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        zinc_total_prep = total_nutr.get("Zinc (mg)", 0.0)
-        zinc_porcion_prep = datos_porcion_prep.get("Zinc (mg)", 0.0)
-        zinc_100_prep = zinc_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        vitd_total_prep = total_nutr.get("Vit D (ug)", 0.0)
-        vitd_porcion_prep = datos_porcion_prep.get("Vit D (ug)", 0.0)
-        vitd_100_prep = vitd_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        vitb12_total_prep = total_nutr.get("Vit B12 (ug)", 0.0)
-        vitb12_porcion_prep = datos_porcion_prep.get("Vit B12 (ug)", 0.0)
-        vitb12_100_prep = vitb12_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        folatos_total_prep = total_nutr.get("Folatos (ug)", 0.0)
-        folatos_porcion_prep = datos_porcion_prep.get("Folatos (ug)", 0.0)
-        folatos_100_prep = folatos_total_prep / total_peso * 100 if total_peso > 0 else 0.0
-
-        # ------------------- ETIQUETA NUTRICIONAL HTML PREPARACIÓN -------------------
-        st.subheader("🧾 Etiqueta nutricional de la preparación (vista previa)")
-        st.markdown(f"**Preparación:** {nombre_prep}")
-
-        # Texto de porción de la preparación (ej: "1 taza (250 g/ml)")
-        desc_prep_clean = (descripcion_porcion_prep or "").strip()
-        if desc_prep_clean:
-            texto_porcion_prep = f"{desc_prep_clean} ({porcion_prep:.0f} g/ml)"
+    if st.button("Calcular preparación"):
+        if not seleccionados or total_peso == 0:
+            st.error("Debes seleccionar al menos un alimento y asignar cantidades mayores a 0.")
         else:
-            texto_porcion_prep = f"{porcion_prep:.0f} g/ml"
-
-        etiqueta_prep_html = construir_etiqueta_html_manual(
-            nombre_producto=nombre_prep,
-            porcion=porcion_prep,
-            porciones_envase=porciones_envase_prep,
-            texto_porcion=texto_porcion_prep,
-            energia_100=energia_100_prep,
-            energia_porcion=energia_porcion_prep,
-            prot_100=proteinas_100_prep,
-            prot_porcion=proteinas_porcion_prep,
-            grasa_total_100=grasas_total_100_prep,
-            grasa_total_porcion=grasas_total_porcion_prep,
-            grasa_sat_100=grasas_sat_100_prep,
-            grasa_sat_porcion=grasas_sat_porcion_prep,
-            hdc_100=hdc_100_prep,
-            hdc_porcion=hdc_porcion_prep,
-            azucar_100=azucares_100_prep,
-            azucar_porcion=azucares_porcion_prep,
-            sodio_100=sodio_100_prep,
-            sodio_porcion=sodio_porcion_prep,
-            mono_100=mono_100_prep,
-            mono_porcion=mono_porcion_prep,
-            poli_100=poli_100_prep,
-            poli_porcion=poli_porcion_prep,
-            trans_100=trans_100_prep,
-            trans_porcion=trans_porcion_prep,
-            incluir_desglose_grasas=incluir_desglose_grasas,
-            fibra_100=fibra_100_prep,
-            fibra_porcion=fibra_porcion_prep,
-            incluir_fibra=incluir_fibra,
-            calcio_100=calcio_100_prep,
-            calcio_porcion=calcio_porcion_prep,
-            hierro_100=hierro_100_prep,
-            hierro_porcion=hierro_porcion_prep,
-            zinc_100=zinc_100_prep,
-            zinc_porcion=zinc_porcion_prep,
-            vitd_100=vitd_100_prep,
-            vitd_porcion=vitd_porcion_prep,
-            vitb12_100=vitb12_100_prep,
-            vitb12_porcion=vitb12_porcion_prep,
-            folatos_100=folatos_100_prep,
-            folatos_porcion=folatos_porcion_prep,
-            incluir_micros=incluir_micros,
-        )
-        st.markdown(etiqueta_prep_html, unsafe_allow_html=True)
-
-        # ------------------- IMAGEN PNG DE LA PREPARACIÓN -------------------
-        st.subheader("📥 Descargar etiqueta de la preparación como PNG")
-
-        img_buf_prep = generar_imagen_etiqueta(
-            nombre_alimento=nombre_prep,
-            porcion=porcion_prep,
-            porciones_envase=porciones_envase_prep,
-            energia_porcion=energia_porcion_prep,
-            energia_100=energia_100_prep,
-            proteinas_porcion=proteinas_porcion_prep,
-            grasas_total_porcion=grasas_total_porcion_prep,
-            grasas_sat_porcion=grasas_sat_porcion_prep,
-            hdc_porcion=hdc_porcion_prep,
-            azucares_porcion=azucares_porcion_prep,
-            sodio_porcion=sodio_porcion_prep,
-            sodio_100=sodio_100_prep,
-            fibra_porcion=fibra_porcion_prep,
-            fibra_100=fibra_100_prep,
-            trans_porcion=trans_porcion_prep,
-            trans_100=trans_100_prep,
-            incluir_fibra=incluir_fibra,
-            incluir_trans=incluir_desglose_grasas,
-            texto_porcion=texto_porcion_prep,
-        )
+            # Totales con la matriz por gramo del catálogo, llevados en la
+            # sesión: sólo se ajusta lo que cambió desde el cálculo anterior
+            totales_prep = st.session_state.get("totales_prep")
+            if totales_prep is None or totales_prep.matriz is not cat.matriz:
+                totales_prep = st.session_state["totales_prep"] = recetas.TotalesIncrementales(cat.matriz)
+            with tramo("receta"):
+                resultado_prep = totales_prep.calcular(cantidades, porcion_prep)
+            datos_porcion_prep = resultado_prep.como_dict(resultado_prep.por_porcion, 2)
+            datos_100_prep = resultado_prep.como_dict(resultado_prep.por_100)
+
+            st.subheader(f"Resultados nutricionales de la preparación por {porcion_prep:.0f} g/ml")
+
+            df_prep = pd.DataFrame(datos_porcion_prep, index=[0])
+
+            columnas_ocultas = ["Columna1", "Fuente"]
+            df_prep_mostrar = df_prep.drop(
+                columns=[c for c in columnas_ocultas if c in df_prep.columns],
+                errors="ignore"
+            )
+            st.dataframe(df_prep_mostrar, use_container_width=True)
+
+            # ------------------- ETIQUETA NUTRICIONAL HTML PREPARACIÓN -------------------
+            st.subheader("🧾 Etiqueta nutricional de la preparación (vista previa)")
+            st.markdown(f"**Preparación:** {nombre_prep}")
+
+            # Texto de porción de la preparación (ej: "1 taza (250 g/ml)")
+            texto_porcion_prep = etiquetas.texto_porcion(descripcion_porcion_prep, porcion_prep)
+
+            with tramo("html"):
+                etiqueta_prep_html = etiquetas.etiqueta_html(
+                    valores_100=datos_100_prep,
+                    porcion=porcion_prep,
+                    porciones_envase=porciones_envase_prep,
+                    texto_porcion=texto_porcion_prep,
+                    incluir_desglose_grasas=incluir_desglose_grasas,
+                    incluir_fibra=incluir_fibra,
+                    incluir_micros=incluir_micros,
+                )
+            st.markdown(etiqueta_prep_html, unsafe_allow_html=True)
+
+            # ------------------- IMAGEN PNG DE LA PREPARACIÓN -------------------
+            st.subheader("📥 Descargar etiqueta de la preparación como PNG")
+
+            # Sólo se llega aquí al pulsar "Calcular preparación"; la imagen
+            # queda memoizada para los mismos valores
+            with tramo("png"):
+                png_bytes_prep = etiquetas.etiqueta_png_bytes(
+                    nombre_prep,
+                    valores_100=datos_100_prep,
+                    valores_porcion=datos_porcion_prep,
+                    porcion=porcion_prep,
+                    porciones_envase=porciones_envase_prep,
+                    texto_porcion=texto_porcion_prep,
+                    incluir_fibra=incluir_fibra,
+                    incluir_trans=incluir_desglose_grasas,
+                )
+
+            st.download_button(
+                label="⬇️ Descargar etiqueta PNG de la preparación",
+                data=png_bytes_prep,
+                file_name=f"etiqueta_{nombre_prep}.png",
+                mime="image/png"
+            )
 
-        st.download_button(
-            label="⬇️ Descargar etiqueta PNG de la preparación",
-            data=img_buf_prep,
-            file_name=f"etiqueta_{nombre_prep}.png",
-            mime="image/png"
-        )
+            with tramo("vectorial"):
+                svg_prep, pdf_prep = vectorial.documentos_etiqueta(
+                    datos_100_prep, porcion_prep, porciones_envase_prep, texto_porcion_prep,
+                    incluir_desglose_grasas, incluir_fibra, incluir_micros,
+                )
+            col_svg_prep, col_pdf_prep = st.columns(2)
+            with col_svg_prep:
+                st.download_button(
+                    label="⬇️ Descargar etiqueta SVG de la preparación",
+                    data=svg_prep,
+                    file_name=f"etiqueta_{nombre_prep}.svg",
+                    mime="image/svg+xml",
+                )
+            with col_pdf_prep:
+                st.download_button(
+                    label="⬇️ Descargar etiqueta PDF de la preparación",
+                    data=pdf_prep,
+                    file_name=f"etiqueta_{nombre_prep}.pdf",
+                    mime="application/pdf",
+                )
+
+
+            # ------------------- SELLOS MINSAL PARA LA PREPARACIÓN -------------------
+            st.subheader("⚠️ Sellos de advertencia de la preparación (según 100 g/ml)")
+
+            with tramo("sellos"):
+                sellos_prep = calcular_sellos(datos_100_prep, tipo_producto_prep)
+
+            if not sellos_prep:
+                st.success(
+                    f"✅ Esta preparación ({tipo_producto_prep.lower()}) NO presenta sellos de advertencia "
+                    "según los umbrales oficiales de la fase actual."
+                )
+            else:
+                st.write("Sellos que debe llevar esta preparación:")
 
+                mostrar_sellos(sellos_prep, "prep")
 
-        # ------------------- SELLOS MINSAL PARA LA PREPARACIÓN -------------------
-        st.subheader("⚠️ Sellos de advertencia de la preparación (según 100 g/ml)")
+            st.divider()
 
-        fila_sellos_prep = {
-            "Energía(kcal)": energia_100_prep,
-            "Azúcares totales (g)": azucares_100_prep,
-            "AG Sat (g)": grasas_sat_100_prep,
-            "Sodio (mg)": sodio_100_prep,
-        }
 
-        sellos_prep = calcular_sellos(fila_sellos_prep, tipo_producto_prep)
+seccion_preparacion()
 
-        if not sellos_prep:
-            st.success(
-                f"✅ Esta preparación ({tipo_producto_prep.lower()}) NO presenta sellos de advertencia "
-                "según los umbrales oficiales de la fase actual."
-            )
-        else:
-            st.write("Sellos que debe llevar esta preparación:")
 
-            mapa_clave = {
-                "ALTO EN AZÚCARES": "azucares",
-                "ALTO EN CALORÍAS": "calorias",
-                "ALTO EN GRASAS SATURADAS": "grasas",
-                "ALTO EN SODIO": "sodio",
-            }
+# ===================== FILTRO POR SELLOS =====================
+@seccion
+def seccion_filtro_sellos():
+    cat = catalogo_vigente()
+    df = cat.df
 
-            imagenes_sellos = {
-                "azucares": ("sellos/alto_azucares.png", "ALTO EN AZÚCARES"),
-                "calorias": ("sellos/alto_calorias.png", "ALTO EN CALORÍAS"),
-                "grasas": ("sellos/alto_grasas.png", "ALTO EN GRASAS SATURADAS"),
-                "sodio": ("sellos/alto_sodio.png", "ALTO EN SODIO"),
-            }
+    st.header("🚦 Alimentos por sellos")
 
-            claves_activas = [mapa_clave[s] for s in sellos_prep if s in mapa_clave]
+    with st.expander("Buscar en la tabla según sus sellos de advertencia"):
+        col_fs1, col_fs2 = st.columns([1, 2])
+        with col_fs1:
+            tipo_filtro = st.radio("Evaluar como", list(TIPOS_PRODUCTO), key="tipo_filtro_sellos")
+            solo_sin_sellos = st.checkbox("Sólo alimentos sin sellos", key="sin_sellos_filtro")
+        with col_fs2:
+            sellos_filtro = st.multiselect(
+                "Con los sellos",
+                [sello for sello, _, _ in SELLOS],
+                disabled=solo_sin_sellos,
+                key="sellos_filtro",
+            )
 
-            cols = st.columns(len(claves_activas))
-            for col, clave in zip(cols, claves_activas):
-                ruta, texto = imagenes_sellos[clave]
-                with col:
-                    img = Image.open(ruta)
-                    st.image(img, width=120)
+        with tramo("filtro_sellos"):
+            filas_filtradas = cat.sellos.filtrar(
+                tipo_filtro,
+                con=() if solo_sin_sellos else sellos_filtro,
+                sin_sellos=solo_sin_sellos,
+            )
+        columnas_filtro = ["Alimento"] + [col for _, col, _ in SELLOS if col in df.columns]
 
-                    with open(ruta, "rb") as f:
-                        img_bytes = f.read()
+        st.caption(f"{len(filas_filtradas)} alimentos (valores por 100 g/ml)")
+        st.dataframe(df.iloc[filas_filtradas][columnas_filtro], use_container_width=True, hide_index=True)
 
-                    st.download_button(
-                        label=f"Descargar {texto}.png",
-                        data=img_bytes,
-                        file_name=f"{texto.replace(' ', '_').lower()}.png",
-                        mime="image/png",
-                    )
 
-        st.divider()
+seccion_filtro_sellos()
 
 
-# Mostrar tabla completa
-with st.expander("📊 Ver tabla completa del Excel"):
-    st.dataframe(df, use_container_width=True)
+# ===================== ETIQUETAS DE VARIAS RECETAS =====================
+@seccion
+def seccion_varias_recetas():
+    cat = catalogo_vigente()
 
-# ===================== ALIMENTOS PERSONALIZADOS =====================
-st.header("➕ Agregar alimento personalizado")
-
-with st.expander("Agregar un alimento que no está en la tabla"):
-    nombre_nuevo = st.text_input("Nombre del alimento nuevo")
-
-    st.markdown("Valores nutricionales por **100 g/ml** (como en la tabla oficial):")
-    cant_base = 100.0
-
-    energia_nueva = st.number_input("Energía (kcal)", min_value=0.0, step=0.1)
-    prot_nueva   = st.number_input("Proteínas (g)", min_value=0.0, step=0.1)
-    grasa_tot_n  = st.number_input("Grasa Total (g)", min_value=0.0, step=0.1)
-    grasa_sat_n  = st.number_input("Grasa Saturada (g)", min_value=0.0, step=0.1)
-    hdc_nueva    = st.number_input("H. de C. Disp. (g)", min_value=0.0, step=0.1)
-    azuc_nueva   = st.number_input("Azúcares Totales (g)", min_value=0.0, step=0.1)
-    fibra_nueva  = st.number_input("Fibra Total (g)", min_value=0.0, step=0.1)
-    sodio_nuevo  = st.number_input("Sodio (mg)", min_value=0.0, step=1.0)
-
-    st.markdown("Opcional: grasas específicas")
-    ag_mono_n = st.number_input("AG Mono (g)", min_value=0.0, step=0.1)
-    ag_poli_n = st.number_input("AG Poli (g)", min_value=0.0, step=0.1)
-    ag_trans_n = st.number_input("AG Trans (g)", min_value=0.0, step=0.01)
-
-    if st.button("Guardar alimento personalizado"):
-        if not nombre_nuevo.strip():
-            st.error("Escribe un nombre para el alimento.")
-        else:
-            nueva_fila = {col: 0 for col in df_base.columns}
-            nueva_fila["Alimento"] = nombre_nuevo.strip()
-            nueva_fila["Cantidad(g/ml)"] = cant_base
-            nueva_fila["Energía(kcal)"] = energia_nueva
-            nueva_fila["Proteínas (g)"] = prot_nueva
-            nueva_fila["Lípidos totales (g)"] = grasa_tot_n
-            nueva_fila["AG Sat (g)"] = grasa_sat_n
-            nueva_fila["HdeC disp (g)"] = hdc_nueva
-            nueva_fila["Azúcares totales (g)"] = azuc_nueva
-            nueva_fila["Fibra Total (g)"] = fibra_nueva
-            nueva_fila["Sodio (mg)"] = sodio_nuevo
-            nueva_fila["AG Mono (g)"] = ag_mono_n
-            nueva_fila["AG Poli (g)"] = ag_poli_n
-            nueva_fila["AG Trans (g)"] = ag_trans_n
+    st.header("🗂️ Etiquetas de varias recetas")
 
+    with st.expander("Pliego PDF para imprenta o ZIP con las etiquetas y sellos de cada receta"):
+        st.markdown(
+            "Sube un **CSV** (una fila por ingrediente: `receta, alimento, gramos, porcion, "
+            "porciones_envase, tipo, descripcion_porcion`) o un **JSON** con la lista de recetas."
+        )
+        archivo_recetas = st.file_uploader("Recetas", type=["csv", "json"], key="pliego_recetas")
+        col_pl1, col_pl2 = st.columns(2)
+        with col_pl1:
+            columnas_pliego = st.slider("Etiquetas por fila", 1, 6, 3, key="pliego_columnas")
+        with col_pl2:
+            pagina_pliego = st.selectbox("Tamaño de página", list(pliegos.TAMANOS_PAGINA), key="pliego_pagina")
+
+        col_pl3, col_pl4 = st.columns(2)
+        with col_pl3:
+            generar_pliego = st.button("Generar pliego PDF", key="pliego_btn", disabled=archivo_recetas is None)
+        with col_pl4:
+            generar_zip = st.button("Exportar ZIP (HTML, PNG y sellos)", key="zip_btn", disabled=archivo_recetas is None)
+
+        if archivo_recetas is not None and (generar_pliego or generar_zip):
             try:
-                dfp = pd.read_csv("alimentos_personalizados.csv")
-            except FileNotFoundError:
-                dfp = pd.DataFrame(columns=df_base.columns)
+                recetas_subidas = leer_recetas_subidas(archivo_recetas)
+            except lote.DatosRecetaError as e:
+                st.error(f"No se pudo leer el archivo de recetas. {e}")
+                return
+            opciones_lote = opciones_detalle()
+
+        if archivo_recetas is not None and generar_pliego:
+            salida_pliego = BytesIO()
+            # Cada tesela cuesta menos de un milisegundo: en el servidor se
+            # arma en el mismo proceso (la CLI usa un pool de procesos)
+            ubicadas, errores_pliego, paginas = pliegos.pliego_pdf(
+                recetas_subidas,
+                salida_pliego,
+                columnas=columnas_pliego,
+                pagina=pagina_pliego,
+                workers=1,
+                cat=cat,
+                **opciones_lote,
+            )
 
-            dfp = pd.concat([dfp, pd.DataFrame([nueva_fila])], ignore_index=True)
-            dfp.to_csv("alimentos_personalizados.csv", index=False)
+            for e in errores_pliego:
+                st.warning(f"{e['nombre']}: {e['error']}")
+            st.success(f"{ubicadas} etiquetas en {paginas} páginas.")
+            st.download_button(
+                label="⬇️ Descargar pliego PDF",
+                data=salida_pliego.getvalue(),
+                file_name="pliego_etiquetas.pdf",
+                mime="application/pdf",
+            )
 
-            st.success("👏 Alimento guardado correctamente.")
-            st.rerun()
+        if archivo_recetas is not None and generar_zip:
+            # El ZIP se genera en flujo, pero st.download_button guarda los
+            # bytes completos igual (en su almacén de medios): se juntan acá
+            salida_zip = BytesIO()
+            resultados_zip = lote.procesar_lote(
+                recetas_subidas, workers=1, cat=cat, **opciones_lote
+            )
+            for parte in exportar.exportar(resultados_zip):
+                salida_zip.write(parte)
+
+            st.download_button(
+                label="⬇️ Descargar ZIP de etiquetas",
+                data=salida_zip.getvalue(),
+                file_name="etiquetas.zip",
+                mime="application/zip",
+            )
 
 
-# ===================== ADMINISTRAR PERSONALIZADOS =====================
-st.subheader("🛠 Administrar alimentos personalizados")
+seccion_varias_recetas()
 
-df_personal = cargar_personalizados()
 
-if df_personal is not None and not df_personal.empty:
-    st.markdown("Alimentos personalizados actualmente registrados:")
-    st.dataframe(
-        df_personal[["Alimento"] + [c for c in df_personal.columns if c != "Alimento"]],
-        use_container_width=True
-    )
+# Mostrar tabla completa (por páginas: sólo viajan las filas visibles)
+@seccion
+def seccion_tabla_completa():
+    cat = catalogo_vigente()
 
-    col_admin1, col_admin2 = st.columns(2)
+    with st.expander("📊 Ver tabla completa del Excel"):
+        tabla = cat.tabla
 
-    # ----------- BORRAR -----------
-    with col_admin1:
-        st.markdown("### 🗑 Eliminar alimento")
+        col_tb1, col_tb2 = st.columns([2, 1])
+        with col_tb1:
+            filtro_tabla = st.text_input("Filtrar por nombre", key="tabla_filtro")
+        with col_tb2:
+            tamano_tabla = st.selectbox("Filas por página", TAMANOS_PAGINA, index=1, key="tabla_tamano")
+        columnas_tabla = st.multiselect(
+            "Columnas", tabla.columnas, default=tabla.columnas, key="tabla_columnas"
+        )
 
-        nombre_borrar = st.selectbox(
-            "Selecciona un alimento personalizado para eliminar",
-            ["(ninguno)"] + df_personal["Alimento"].astype(str).tolist()
+        with tramo("tabla"):
+            filas_tabla = tabla.filtrar(filtro_tabla)
+        total_paginas = tabla.paginas(filas_tabla, tamano_tabla)
+        # Si el filtro achicó la tabla, volver a una página que exista
+        if st.session_state.get("tabla_pagina", 1) > total_paginas:
+            st.session_state["tabla_pagina"] = total_paginas
+        pagina_tabla = st.number_input(
+            f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, step=1, key="tabla_pagina"
         )
 
-        if nombre_borrar != "(ninguno)":
-            if st.button("🗑 Eliminar este alimento"):
-                dfp = pd.read_csv("alimentos_personalizados.csv")
-                dfp = dfp[dfp["Alimento"] != nombre_borrar]
-                dfp.to_csv("alimentos_personalizados.csv", index=False)
+        total_filas = len(tabla) if filas_tabla is None else len(filas_tabla)
+        st.caption(f"{total_filas} alimentos")
+        with tramo("tabla"):
+            pagina_arrow = tabla.pagina(filas_tabla, pagina_tabla, tamano_tabla, ["Alimento"] + [
+                c for c in columnas_tabla if c != "Alimento"
+            ])
+        st.dataframe(pagina_arrow, use_container_width=True, hide_index=True)
+
+
+seccion_tabla_completa()
 
-                st.success(f"Se eliminó '{nombre_borrar}'.")
+
+# ===================== ALIMENTOS PERSONALIZADOS =====================
+@seccion
+def seccion_agregar_personalizado():
+    cat = catalogo_vigente()
+
+    st.header("➕ Agregar alimento personalizado")
+
+    with st.expander("Agregar un alimento que no está en la tabla"):
+        nombre_nuevo = st.text_input("Nombre del alimento nuevo")
+
+        st.markdown("Valores nutricionales por **100 g/ml** (como en la tabla oficial):")
+        cant_base = 100.0
+
+        energia_nueva = st.number_input("Energía (kcal)", min_value=0.0, step=0.1)
+        prot_nueva   = st.number_input("Proteínas (g)", min_value=0.0, step=0.1)
+        grasa_tot_n  = st.number_input("Grasa Total (g)", min_value=0.0, step=0.1)
+        grasa_sat_n  = st.number_input("Grasa Saturada (g)", min_value=0.0, step=0.1)
+        hdc_nueva    = st.number_input("H. de C. Disp. (g)", min_value=0.0, step=0.1)
+        azuc_nueva   = st.number_input("Azúcares Totales (g)", min_value=0.0, step=0.1)
+        fibra_nueva  = st.number_input("Fibra Total (g)", min_value=0.0, step=0.1)
+        sodio_nuevo  = st.number_input("Sodio (mg)", min_value=0.0, step=1.0)
+
+        st.markdown("Opcional: grasas específicas")
+        ag_mono_n = st.number_input("AG Mono (g)", min_value=0.0, step=0.1)
+        ag_poli_n = st.number_input("AG Poli (g)", min_value=0.0, step=0.1)
+        ag_trans_n = st.number_input("AG Trans (g)", min_value=0.0, step=0.01)
+
+        if st.button("Guardar alimento personalizado"):
+            if not nombre_nuevo.strip():
+                st.error("Escribe un nombre para el alimento.")
+            else:
+                nueva_fila = {col: 0 for col in cat.columnas_base}
+                nueva_fila["Alimento"] = nombre_nuevo.strip()
+                nueva_fila["Cantidad(g/ml)"] = cant_base
+                nueva_fila["Energía(kcal)"] = energia_nueva
+                nueva_fila["Proteínas (g)"] = prot_nueva
+                nueva_fila["Lípidos totales (g)"] = grasa_tot_n
+                nueva_fila["AG Sat (g)"] = grasa_sat_n
+                nueva_fila["HdeC disp (g)"] = hdc_nueva
+                nueva_fila["Azúcares totales (g)"] = azuc_nueva
+                nueva_fila["Fibra Total (g)"] = fibra_nueva
+                nueva_fila["Sodio (mg)"] = sodio_nuevo
+                nueva_fila["AG Mono (g)"] = ag_mono_n
+                nueva_fila["AG Poli (g)"] = ag_poli_n
+                nueva_fila["AG Trans (g)"] = ag_trans_n
+
+                catalogo.almacen_personalizados().guardar(nueva_fila["Alimento"], nueva_fila)
+                catalogo.nueva_generacion()
+
+                st.success("👏 Alimento guardado correctamente.")
                 st.rerun()
 
-    # ----------- EDITAR -----------
-    with col_admin2:
-        st.markdown("### ✏️ Editar alimento")
 
-        nombre_editar = st.selectbox(
-            "Selecciona un alimento para editar",
-            ["(ninguno)"] + df_personal["Alimento"].astype(str).tolist()
-        )
+seccion_agregar_personalizado()
 
-        if nombre_editar != "(ninguno)":
-            fila_edit = df_personal[df_personal["Alimento"] == nombre_editar].iloc[0]
 
-            nuevo_nombre = st.text_input(
-                "Nuevo nombre",
-                value=str(fila_edit["Alimento"])
-            )
+# ===================== ADMINISTRAR PERSONALIZADOS =====================
+@seccion
+def seccion_administrar_personalizados():
+    cat = catalogo_vigente()
 
-            energia_edit = st.number_input("Energía (kcal)",
-                value=float(fila_edit["Energía(kcal)"]), step=0.1)
+    st.subheader("🛠 Administrar alimentos personalizados")
 
-            prot_edit = st.number_input("Proteínas (g)",
-                value=float(fila_edit["Proteínas (g)"]), step=0.1)
+    df_personal = cat.personal
 
-            grasa_tot_edit = st.number_input("Grasa Total (g)",
-                value=float(fila_edit["Lípidos totales (g)"]), step=0.1)
+    if df_personal is not None and not df_personal.empty:
+        st.markdown("Alimentos personalizados actualmente registrados:")
+        st.dataframe(
+            df_personal[["Alimento"] + [c for c in df_personal.columns if c != "Alimento"]],
+            use_container_width=True
+        )
 
-            grasa_sat_edit = st.number_input("Grasa Saturada (g)",
-                value=float(fila_edit["AG Sat (g)"]), step=0.1)
+        col_admin1, col_admin2 = st.columns(2)
 
-            hdc_edit = st.number_input("H. de C. Disp. (g)",
-                value=float(fila_edit["HdeC disp (g)"]), step=0.1)
+        # ----------- BORRAR -----------
+        with col_admin1:
+            st.markdown("### 🗑 Eliminar alimento")
 
-            azuc_edit = st.number_input("Azúcares Totales (g)",
-                value=float(fila_edit["Azúcares totales (g)"]), step=0.1)
+            nombre_borrar = st.selectbox(
+                "Selecciona un alimento personalizado para eliminar",
+                ["(ninguno)"] + df_personal["Alimento"].astype(str).tolist()
+            )
 
-            fibra_edit = st.number_input("Fibra Total (g)",
-                value=float(fila_edit["Fibra Total (g)"]), step=0.1)
+            if nombre_borrar != "(ninguno)":
+                if st.button("🗑 Eliminar este alimento"):
+                    catalogo.almacen_personalizados().eliminar(nombre_borrar)
+                    catalogo.nueva_generacion()
 
-            sodio_edit = st.number_input("Sodio (mg)",
-                value=float(fila_edit["Sodio (mg)"]), step=1.0)
+                    st.success(f"Se eliminó '{nombre_borrar}'.")
+                    st.rerun()
 
-            # grasas detalladas
-            mono_edit = st.number_input("AG Mono (g)",
-                value=float(fila_edit["AG Mono (g)"]), step=0.1)
-            poli_edit = st.number_input("AG Poli (g)",
-                value=float(fila_edit["AG Poli (g)"]), step=0.1)
-            trans_edit = st.number_input("AG Trans (g)",
-                value=float(fila_edit["AG Trans (g)"]), step=0.01)
+        # ----------- EDITAR -----------
+        with col_admin2:
+            st.markdown("### ✏️ Editar alimento")
 
-            if st.button("💾 Guardar cambios"):
-                dfp = pd.read_csv("alimentos_personalizados.csv")
-                mask = dfp["Alimento"] == nombre_editar
+            nombre_editar = st.selectbox(
+                "Selecciona un alimento para editar",
+                ["(ninguno)"] + df_personal["Alimento"].astype(str).tolist()
+            )
 
-                dfp.loc[mask, "Alimento"] = nuevo_nombre
-                dfp.loc[mask, "Energía(kcal)"] = energia_edit
-                dfp.loc[mask, "Proteínas (g)"] = prot_edit
-                dfp.loc[mask, "Lípidos totales (g)"] = grasa_tot_edit
-                dfp.loc[mask, "AG Sat (g)"] = grasa_sat_edit
-                dfp.loc[mask, "HdeC disp (g)"] = hdc_edit
-                dfp.loc[mask, "Azúcares totales (g)"] = azuc_edit
-                dfp.loc[mask, "Fibra Total (g)"] = fibra_edit
-                dfp.loc[mask, "Sodio (mg)"] = sodio_edit
-                dfp.loc[mask, "AG Mono (g)"] = mono_edit
-                dfp.loc[mask, "AG Poli (g)"] = poli_edit
-                dfp.loc[mask, "AG Trans (g)"] = trans_edit
+            if nombre_editar != "(ninguno)":
+                fila_edit = df_personal[df_personal["Alimento"] == nombre_editar].iloc[0]
+
+                nuevo_nombre = st.text_input(
+                    "Nuevo nombre",
+                    value=str(fila_edit["Alimento"])
+                )
+
+                energia_edit = st.number_input("Energía (kcal)",
+                    value=float(fila_edit["Energía(kcal)"]), step=0.1)
+
+                prot_edit = st.number_input("Proteínas (g)",
+                    value=float(fila_edit["Proteínas (g)"]), step=0.1)
+
+                grasa_tot_edit = st.number_input("Grasa Total (g)",
+                    value=float(fila_edit["Lípidos totales (g)"]), step=0.1)
+
+                grasa_sat_edit = st.number_input("Grasa Saturada (g)",
+                    value=float(fila_edit["AG Sat (g)"]), step=0.1)
+
+                hdc_edit = st.number_input("H. de C. Disp. (g)",
+                    value=float(fila_edit["HdeC disp (g)"]), step=0.1)
+
+                azuc_edit = st.number_input("Azúcares Totales (g)",
+                    value=float(fila_edit["Azúcares totales (g)"]), step=0.1)
+
+                fibra_edit = st.number_input("Fibra Total (g)",
+                    value=float(fila_edit["Fibra Total (g)"]), step=0.1)
+
+                sodio_edit = st.number_input("Sodio (mg)",
+                    value=float(fila_edit["Sodio (mg)"]), step=1.0)
+
+                # grasas detalladas
+                mono_edit = st.number_input("AG Mono (g)",
+                    value=float(fila_edit["AG Mono (g)"]), step=0.1)
+                poli_edit = st.number_input("AG Poli (g)",
+                    value=float(fila_edit["AG Poli (g)"]), step=0.1)
+                trans_edit = st.number_input("AG Trans (g)",
+                    value=float(fila_edit["AG Trans (g)"]), step=0.01)
+
+                if st.button("💾 Guardar cambios"):
+                    try:
+                        catalogo.almacen_personalizados().editar(nombre_editar, nuevo_nombre, {
+                            "Energía(kcal)": energia_edit,
+                            "Proteínas (g)": prot_edit,
+                            "Lípidos totales (g)": grasa_tot_edit,
+                            "AG Sat (g)": grasa_sat_edit,
+                            "HdeC disp (g)": hdc_edit,
+                            "Azúcares totales (g)": azuc_edit,
+                            "Fibra Total (g)": fibra_edit,
+                            "Sodio (mg)": sodio_edit,
+                            "AG Mono (g)": mono_edit,
+                            "AG Poli (g)": poli_edit,
+                            "AG Trans (g)": trans_edit,
+                        })
+                    except personalizados.PersonalizadoError as e:
+                        st.error(str(e))
+                        st.stop()
+
+                    catalogo.nueva_generacion()
+
+                    st.success("Cambios guardados correctamente.")
+                    st.rerun()
 
-                dfp.to_csv("alimentos_personalizados.csv", index=False)
+    else:
+        st.info("No hay alimentos personalizados.")
+
+
+seccion_administrar_personalizados()
 
-                st.success("Cambios guardados correctamente.")
-                st.rerun()
 
-else:
-    st.info("No hay alimentos personalizados.")
+# ===================== DEPURACIÓN: TIEMPOS POR ETAPA =====================
+# (los reruns que terminan en st.rerun()/st.stop() no llegan hasta aquí;
+# los reruns de un solo fragmento muestran sus tiempos en la sección)
+tramos_rerun = tramos_en_curso[0]
+total_rerun = tramos_rerun.cerrar()
+
+if st.sidebar.toggle("🐞 Tiempos por etapa", key="debug_tiempos"):
+    st.sidebar.caption(f"Este rerun: {total_rerun * 1000:.1f} ms")
+    st.sidebar.dataframe(
+        pd.DataFrame(
+            [(etapa, round(segundos * 1000, 2)) for etapa, segundos in tramos_rerun.duraciones],
+            columns=["Etapa", "ms"],
+        ),
+        hide_index=True,
+    )
+
+    st.sidebar.caption("Proceso (últimas muestras por etapa)")
+    st.sidebar.dataframe(
+        pd.DataFrame([
+            {
+                "Etapa": etapa,
+                "n": fila["cuenta"],
+                "p50 ms": round(fila["p50"] * 1000, 2),
+                "p95 ms": round(fila["p95"] * 1000, 2),
+                "p99 ms": round(fila["p99"] * 1000, 2),
+            }
+            for etapa, fila in sorted(metricas.obtener().resumen().items())
+        ]),
+        hide_index=True,
+    )
@@ -0,0 +1 @@
+"""Cálculo de etiquetado nutricional chileno (núcleo reutilizable de app.py)."""
@@ -0,0 +1,416 @@
+"""
+API HTTP local (JSON) para nutrientes, sellos y etiquetas, sin Streamlit.
+
+Sirve el mismo cálculo que la app y que etiquetado.lote a otros sistemas
+(por ejemplo el ERP) en la misma máquina. Usa sólo la biblioteca estándar:
+cada conexión se atiende en su propio hilo y, con --workers N, N procesos
+comparten el socket. El catálogo se carga una vez por proceso al arrancar
+(antes de crear los workers, que lo heredan ya construido).
+
+    python -m etiquetado.api                     # http://127.0.0.1:8502
+    python -m etiquetado.api --puerto 9000 --workers 4
+
+Rutas:
+
+    GET  /salud               estado, generación y tamaño del catálogo
+    GET  /alimentos?q=...&k=  alimentos del catálogo que coinciden con q
+    GET  /metricas            tiempos por ruta (texto de Prometheus)
+    POST /receta              nutrientes, sellos y etiqueta de una receta
+    POST /etiqueta            etiqueta a partir de valores por 100 g/ml
+    POST /sellos              sellos a partir de valores por 100 g/ml
+
+Cada POST acepta un objeto o, para procesar en lote, una lista de
+objetos; en ese caso la respuesta es {"resultados": [...]} en el mismo
+orden, y un elemento inválido trae {"error": ...} sin botar al resto.
+
+Una receta usa el mismo formato que el JSON de etiquetado.lote:
+
+    {"nombre": "Leche con plátano",
+     "ingredientes": {"Leche fluida entera(1)": 200, "Plátano": 100},
+     "porcion": 250, "porciones_envase": 1, "tipo": "Líquido",
+     "descripcion_porcion": "1 vaso"}
+
+/etiqueta y /sellos reciben "valores_100" ({columna: valor}) o
+"alimento" (un nombre del catálogo). Opciones de etiqueta en el mismo
+objeto: "desglose_grasas", "fibra", "micros", "png" (por defecto true) y
+"vectorial". Los PNG y PDF van en base64.
+
+Los alimentos personalizados se leen al arrancar: para ver los que se
+agreguen después desde la app hay que reiniciar el servicio.
+"""
+import argparse
+import base64
+import json
+import math
+import os
+import signal
+import sys
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from . import catalogo, etiquetas, metricas
+from .busqueda import buscar_alimento
+from .lote import Receta, procesar_receta, resolver_alimento
+from .sellos import calcular_sellos, resolver_tipo
+from .vectorial import EtiquetaVectorial, documento_pdf, documento_svg, pagina_pdf
+
+PUERTO = 8502
+
+# Límites por pedido (el servicio es local, pero un lote no debe tomarse la memoria)
+_MAX_CUERPO = 8 * 1024 * 1024
+_MAX_LOTE = 1000
+_MAX_ALIMENTOS = 50
+
+
+# ----------------------------------------------------------
+# CÁLCULO DE CADA RUTA
+# ----------------------------------------------------------
+def _opciones(d):
+    return {
+        "incluir_desglose_grasas": bool(d.get("desglose_grasas", False)),
+        "incluir_fibra": bool(d.get("fibra", False)),
+        "incluir_micros": bool(d.get("micros", False)),
+        "png": bool(d.get("png", True)),
+        "vectorial": bool(d.get("vectorial", False)),
+    }
+
+
+def _binarios_en_base64(salida):
+    """PNG y PDF en base64, para que la salida sea JSON."""
+    for clave in ("png", "pdf"):
+        if clave in salida:
+            salida[clave] = base64.b64encode(salida[clave]).decode("ascii")
+    return salida
+
+
+def _valores_100(cat, d):
+    """{columna: valor por 100 g/ml} desde "valores_100" o desde "alimento"."""
+    if "valores_100" in d:
+        return {str(k): float(v) for k, v in d["valores_100"].items()}
+
+    nombre = resolver_alimento(cat, str(d["alimento"]))
+    fila = cat.df.iloc[cat.matriz.fila_por_nombre[nombre]]
+    columnas = cat.matriz.columnas
+    valores = catalogo.a_float64(fila[columnas].to_numpy())
+    return {col: v for col, v in zip(columnas, valores.tolist()) if v == v}  # sin NaN
+
+
+def receta(cat, d):
+    """Igual que una receta de etiquetado.lote, con PNG/PDF en base64."""
+    return _binarios_en_base64(procesar_receta(cat, Receta.desde_dict(d), **_opciones(d)))
+
+
+def etiqueta(cat, d):
+    """Etiqueta (y sellos) de un producto con valores por 100 g/ml ya conocidos."""
+    opciones = _opciones(d)
+    nombre = str(d.get("nombre") or d.get("alimento") or "")
+    valores_100 = _valores_100(cat, d)
+    # Porción, porciones y tipo se validan igual que en una receta del lote
+    datos = Receta(
+        nombre, {}, d.get("porcion", 100), d.get("porciones_envase", 1),
+        d.get("tipo", "Sólido"), d.get("descripcion_porcion", ""),
+    )
+    porcion, porciones_envase = datos.porcion, datos.porciones_envase
+    texto_porcion = etiquetas.texto_porcion(datos.descripcion_porcion, porcion)
+    valores_porcion = {col: round(v * porcion / 100, 2) for col, v in valores_100.items()}
+
+    salida = {
+        "nombre": nombre,
+        "por_100": valores_100,
+        "por_porcion": valores_porcion,
+        "sellos": calcular_sellos(valores_100, datos.tipo),
+        "html": etiquetas.etiqueta_html(
+            valores_100=valores_100,
+            porcion=porcion,
+            porciones_envase=porciones_envase,
+            texto_porcion=texto_porcion,
+            incluir_desglose_grasas=opciones["incluir_desglose_grasas"],
+            incluir_fibra=opciones["incluir_fibra"],
+            incluir_micros=opciones["incluir_micros"],
+        ),
+    }
+    if opciones["png"]:
+        salida["png"] = etiquetas.etiqueta_png_bytes(
+            nombre,
+            valores_100=valores_100,
+            valores_porcion=valores_porcion,
+            porcion=porcion,
+            porciones_envase=porciones_envase,
+            texto_porcion=texto_porcion,
+            incluir_fibra=opciones["incluir_fibra"],
+            incluir_trans=opciones["incluir_desglose_grasas"],
+        )
+    if opciones["vectorial"]:
+        etiqueta_vec = EtiquetaVectorial(
+            valores_100, porcion, porciones_envase, texto_porcion,
+            opciones["incluir_desglose_grasas"], opciones["incluir_fibra"],
+            opciones["incluir_micros"],
+        )
+        salida["svg"] = documento_svg(etiqueta_vec)
+        salida["pdf"] = documento_pdf([pagina_pdf(etiqueta_vec)])
+    return _binarios_en_base64(salida)
+
+
+def sellos(cat, d):
+    tipo = resolver_tipo(d.get("tipo", "Sólido"))
+    return {"tipo": tipo, "sellos": calcular_sellos(_valores_100(cat, d), tipo)}
+
+
+RUTAS_POST = {
+    "/receta": receta,
+    "/etiqueta": etiqueta,
+    "/sellos": sellos,
+}
+
+
+def _uno(funcion, cat, d):
+    """Resultado de un elemento; los errores de datos quedan en la respuesta."""
+    if not isinstance(d, dict):
+        return {"error": "Cada elemento debe ser un objeto JSON."}
+    try:
+        return funcion(cat, d)
+    except KeyError as e:
+        return {"nombre": d.get("nombre"), "error": f"Falta el campo {e}"}
+    except (TypeError, ValueError, AttributeError, OverflowError) as e:
+        return {"nombre": d.get("nombre"), "error": str(e)}
+
+
+# ----------------------------------------------------------
+# JSON SÓLO CON NÚMEROS FINITOS
+# ----------------------------------------------------------
+class _NoFinito(ValueError):
+    pass
+
+
+def _constante_json(nombre):
+    # NaN, Infinity y -Infinity: json los acepta, pero no son JSON válido
+    raise _NoFinito(nombre)
+
+
+def _decimal_json(texto):
+    valor = float(texto)
+    if not math.isfinite(valor):  # 1e999 y similares
+        raise _NoFinito(texto)
+    return valor
+
+
+def leer_json(cuerpo):
+    """Cuerpo de un pedido; levanta ValueError si no es JSON o trae números no finitos."""
+    return json.loads(cuerpo, parse_constant=_constante_json, parse_float=_decimal_json)
+
+
+def escribir_json(datos) -> bytes:
+    """Respuesta en JSON estricto (ValueError si quedara un NaN o infinito)."""
+    return json.dumps(datos, ensure_ascii=False, allow_nan=False).encode("utf-8")
+
+
+# ----------------------------------------------------------
+# SERVIDOR HTTP
+# ----------------------------------------------------------
+class _Manejador(BaseHTTPRequestHandler):
+    server_version = "etiquetado"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        if not self.server.silencioso:
+            super().log_message(formato, *args)
+
+    def _responder(self, estado, cuerpo, tipo="application/json; charset=utf-8"):
+        if not isinstance(cuerpo, bytes):
+            try:
+                cuerpo = escribir_json(cuerpo)
+            except ValueError:
+                # Un cálculo que se desbordó: mejor un error que JSON inválido
+                estado = HTTPStatus.INTERNAL_SERVER_ERROR
+                cuerpo = escribir_json({"error": "El resultado tiene números no finitos."})
+        self.send_response(estado)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _error(self, estado, mensaje):
+        self._responder(estado, {"error": mensaje})
+
+    def _error_y_cerrar(self, estado, mensaje):
+        """Error tras el cual la conexión se cierra (el cuerpo pudo quedar sin leer)."""
+        self.close_connection = True
+        self._responder(estado, {"error": mensaje})
+
+    def _medido(self, ruta, atender):
+        t = time.perf_counter()
+        try:
+            atender()
+        finally:
+            registro = metricas.obtener()
+            registro.registrar(f"api{ruta}", time.perf_counter() - t)
+            registro.escribir_si_corresponde()
+
+    # ----------------------------------------------------------
+    # GET
+    # ----------------------------------------------------------
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        ruta = partes.path.rstrip("/") or "/"
+        parametros = parse_qs(partes.query)
+        cat = self.server.catalogo
+
+        if ruta == "/salud":
+            self._responder(HTTPStatus.OK, {
+                "estado": "ok",
+                "pid": os.getpid(),
+                "generacion": cat.generacion,
+                "alimentos": len(cat.filas_alimentos),
+            })
+        elif ruta == "/alimentos":
+            def atender():
+                consulta = parametros.get("q", [""])[0]
+                try:
+                    k = min(_MAX_ALIMENTOS, int(parametros.get("k", ["10"])[0]))
+                except ValueError:
+                    return self._error(HTTPStatus.BAD_REQUEST, "k debe ser un entero.")
+                filas = buscar_alimento(cat, consulta, k=k)
+                self._responder(HTTPStatus.OK, {
+                    "alimentos": [cat.df["Alimento"].iat[f] for f in filas],
+                })
+
+            self._medido(ruta, atender)
+        elif ruta == "/metricas":
+            texto = metricas.obtener().prometheus().encode("utf-8")
+            self._responder(HTTPStatus.OK, texto, "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"Ruta desconocida: {ruta}")
+
+    # ----------------------------------------------------------
+    # POST
+    # ----------------------------------------------------------
+    def do_POST(self):
+        ruta = urlsplit(self.path).path.rstrip("/")
+        funcion = RUTAS_POST.get(ruta)
+
+        try:
+            largo = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            largo = -1
+
+        # Con keep-alive, un cuerpo sin leer se tomaría como el comienzo del
+        # pedido siguiente: ante un error temprano se cierra la conexión
+        if funcion is None:
+            if 0 < largo <= _MAX_CUERPO:
+                self.rfile.read(largo)
+            return self._error_y_cerrar(HTTPStatus.NOT_FOUND, f"Ruta desconocida: {ruta}")
+        if largo <= 0:
+            return self._error_y_cerrar(
+                HTTPStatus.LENGTH_REQUIRED, "Falta el cuerpo JSON (Content-Length)."
+            )
+        if largo > _MAX_CUERPO:
+            return self._error_y_cerrar(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Cuerpo demasiado grande.")
+
+        try:
+            pedido = leer_json(self.rfile.read(largo))
+        except _NoFinito as e:
+            return self._error(HTTPStatus.BAD_REQUEST, f"Número no finito en el cuerpo: {e}")
+        except ValueError:
+            return self._error(HTTPStatus.BAD_REQUEST, "El cuerpo no es JSON válido.")
+
+        cat = self.server.catalogo
+
+        def atender():
+            if isinstance(pedido, list):
+                if len(pedido) > _MAX_LOTE:
+                    return self._error(
+                        HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                        f"Máximo {_MAX_LOTE} elementos por lote.",
+                    )
+                self._responder(HTTPStatus.OK, {"resultados": [_uno(funcion, cat, d) for d in pedido]})
+                return
+
+            resultado = _uno(funcion, cat, pedido)
+            estado = HTTPStatus.UNPROCESSABLE_ENTITY if "error" in resultado else HTTPStatus.OK
+            self._responder(estado, resultado)
+
+        self._medido(ruta, atender)
+
+
+class ServidorAPI(ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexión y el catálogo del proceso."""
+
+    daemon_threads = True
+
+    def __init__(self, direccion, cat=None, silencioso=False):
+        super().__init__(direccion, _Manejador)
+        self.silencioso = silencioso
+        self.catalogo = cat or cargar_catalogo()
+
+
+def cargar_catalogo():
+    """Catálogo del proceso con sus índices y matriz ya construidos."""
+    cat = catalogo.obtener()
+    # Las propiedades se construyen acá y no en el primer pedido (y en
+    # paralelo) de cada hilo
+    cat.matriz
+    cat.indice
+    cat.indice_difuso
+    return cat
+
+
+def _servir_workers(servidor, workers: int):
+    """Reparte el socket ya abierto entre `workers` procesos (fork)."""
+    hijos = []
+    for _ in range(workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                servidor.serve_forever()
+            finally:
+                os._exit(0)
+        hijos.append(pid)
+
+    # Si terminan al proceso principal, que alcance a cerrar a los workers
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        servidor.serve_forever()
+    finally:
+        for pid in hijos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m etiquetado.api",
+        description="API HTTP local (JSON) de nutrientes, sellos y etiquetas.",
+    )
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="dirección donde escuchar (por defecto sólo esta máquina)")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="procesos que atienden pedidos (requiere fork)")
+    parser.add_argument("--silencioso", action="store_true", help="no registrar cada pedido")
+    args = parser.parse_args(argv)
+
+    servidor = ServidorAPI((args.host, args.puerto), silencioso=args.silencioso)
+    workers = args.workers if hasattr(os, "fork") else 1
+    print(f"API de etiquetado en http://{args.host}:{servidor.server_address[1]} "
+          f"({len(servidor.catalogo.filas_alimentos)} alimentos, {workers} workers)")
+    try:
+        if workers > 1:
+            _servir_workers(servidor, workers)
+        else:
+            servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+Índices de búsqueda sobre los nombres normalizados del catálogo.
+
+Se construyen una vez por generación del catálogo (ver Catalogo en
+catalogo.py) y después cada consulta sólo toca las filas candidatas.
+"""
+import heapq
+import itertools
+from array import array
+from collections import Counter, defaultdict
+
+from .texto import expandir_sinonimos, normalizar
+
+# Prioridad de cada tipo de coincidencia (menor = mejor)
+EXACTA = 0
+PREFIJO_PALABRA = 1
+SUBCADENA = 2
+
+
+def trigramas(texto: str):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def tipo_coincidencia(consulta: str, nombre: str):
+    """EXACTA / PREFIJO_PALABRA / SUBCADENA, o None si no coincide."""
+    if nombre == consulta:
+        return EXACTA
+    if consulta not in nombre:
+        return None
+    if nombre.startswith(consulta) or (" " + consulta) in nombre:
+        return PREFIJO_PALABRA
+    return SUBCADENA
+
+
+class IndiceNgramas:
+    """
+    Índice invertido de trigramas sobre nombres ya normalizados.
+
+    buscar() devuelve posiciones de fila ordenadas por tipo de coincidencia
+    (exacta > prefijo de palabra > subcadena), luego nombre más corto y
+    luego orden original del catálogo.
+
+    Cada nombre se indexa junto con sus variantes de sinónimos (ver
+    texto.SINONIMOS), de modo que la expansión no cuesta nada por consulta.
+    Las listas se guardan ya en orden de ranking (texto más corto primero),
+    así que la búsqueda se detiene apenas junta k filas con coincidencia
+    exacta o de prefijo: una coincidencia exacta es siempre el texto más
+    corto posible.
+    """
+
+    def __init__(self, nombres, sinonimos=None):
+        self.nombres = [str(n) for n in nombres]
+
+        # Entradas indexadas: cada nombre y sus variantes con sinónimos
+        self.textos = []
+        self._filas = []
+        for fila, nombre in enumerate(self.nombres):
+            for variante in expandir_sinonimos(nombre, sinonimos):
+                self.textos.append(variante)
+                self._filas.append(fila)
+
+        # Orden de ranking: texto más corto primero, luego orden del catálogo
+        self._orden = sorted(range(len(self.textos)), key=lambda e: (len(self.textos[e]), e))
+        self._rango = [0] * len(self.textos)
+
+        postings = defaultdict(list)
+        prefijos = defaultdict(list)
+        cortos = defaultdict(list)
+        for rango, entrada in enumerate(self._orden):
+            self._rango[entrada] = rango
+            texto = self.textos[entrada]
+            for tri in trigramas(texto):
+                postings[tri].append(entrada)
+            # Prefijos de 1 y 2 letras de cada palabra (consultas sin trigramas)
+            for pref in {p[:n] for p in texto.split() for n in (1, 2)}:
+                prefijos[pref].append(entrada)
+            # Subcadenas de 1 y 2 letras, para cuando los prefijos no bastan
+            for corto in {texto[i:i + n] for n in (1, 2) for i in range(len(texto) - n + 1)}:
+                cortos[corto].append(entrada)
+
+        self._postings = dict(postings)
+        self._prefijos = dict(prefijos)
+        self._cortos = dict(cortos)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def _candidatos(self, consulta: str):
+        """Entradas que podrían contener `consulta`, en orden de ranking."""
+        listas = []
+        for tri in trigramas(consulta):
+            lista = self._postings.get(tri)
+            if lista is None:
+                return ()
+            listas.append(lista)
+        # Basta con recorrer la lista del trigrama más raro
+        return min(listas, key=len)
+
+    def buscar(self, consulta: str, k: int = 10):
+        """Top-k posiciones de fila que contienen `consulta` (ya normalizada)."""
+        if not consulta or k <= 0:
+            return []
+
+        if len(consulta) < 3:
+            # Todas son exactas o prefijo de palabra, ya ordenadas
+            filas = []
+            vistas = set()
+            for entrada in self._prefijos.get(consulta, ()):
+                fila = self._filas[entrada]
+                if fila not in vistas:
+                    vistas.add(fila)
+                    filas.append(fila)
+                    if len(filas) >= k:
+                        return filas
+            # Muy pocas palabras empiezan así: revisar también las que la contienen
+            candidatos = self._cortos.get(consulta, ())
+        else:
+            candidatos = self._candidatos(consulta)
+
+        mejor = {}
+        buenas = 0
+        for entrada in candidatos:
+            tipo = tipo_coincidencia(consulta, self.textos[entrada])
+            if tipo is None:
+                continue
+            fila = self._filas[entrada]
+            clave = (tipo, self._rango[entrada])
+            anterior = mejor.get(fila)
+            if anterior is None or clave < anterior:
+                mejor[fila] = clave
+                if tipo <= PREFIJO_PALABRA and (anterior is None or anterior[0] > PREFIJO_PALABRA):
+                    buenas += 1
+                    if buenas >= k:
+                        # Ninguna entrada posterior puede superar a estas
+                        break
+
+        return heapq.nsmallest(k, mejor, key=mejor.get)
+
+
+# ----------------------------------------------------------
+# FILTRO POR SUBCADENA (LISTA DE ALIMENTOS DE LA PREPARACIÓN)
+# ----------------------------------------------------------
+class IndiceSubcadenas:
+    """
+    Filtro por subcadena sobre una lista de textos normalizados.
+
+    Guarda, por cada trigrama, las posiciones (en orden) de los textos que
+    lo contienen. Una consulta de 3 o más letras sólo revisa con `in` los
+    textos de su trigrama más raro; las de 1 o 2 letras coinciden con casi
+    toda la lista, así que se recorre completa. La memoria es un entero
+    por trigrama distinto de cada texto (no una copia de cada sufijo).
+    """
+
+    def __init__(self, textos):
+        self.textos = [str(t) for t in textos]
+
+        postings = defaultdict(lambda: array("I"))
+        for i, texto in enumerate(self.textos):
+            for tri in trigramas(texto):
+                postings[tri].append(i)
+        self._postings = dict(postings)
+
+    def __len__(self):
+        return len(self.textos)
+
+    def filtrar(self, consulta: str):
+        """Posiciones (en orden) de los textos que contienen `consulta`."""
+        textos = self.textos
+        if not consulta:
+            return list(range(len(textos)))
+        if len(consulta) < 3:
+            return [i for i, texto in enumerate(textos) if consulta in texto]
+
+        listas = []
+        for tri in trigramas(consulta):
+            lista = self._postings.get(tri)
+            if lista is None:
+                return []
+            listas.append(lista)
+        return [i for i in min(listas, key=len) if consulta in textos[i]]
+
+
+# ----------------------------------------------------------
+# BÚSQUEDA TOLERANTE A ERRORES DE TIPEO
+# ----------------------------------------------------------
+# Distancia máxima que se indexa (borrados por palabra del vocabulario)
+MAX_DISTANCIA = 2
+
+# Correcciones que se prueban por palabra y combinaciones por consulta
+_SUGERENCIAS_POR_PALABRA = 3
+_MAX_COMBINACIONES = 20
+
+
+def distancia_edicion(a: str, b: str, tope: int = MAX_DISTANCIA) -> int:
+    """
+    Distancia de Damerau-Levenshtein (transposiciones adyacentes).
+    Devuelve tope + 1 apenas se sabe que la distancia supera el tope.
+    """
+    if abs(len(a) - len(b)) > tope:
+        return tope + 1
+
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if (anterior2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        if min(actual) > tope:
+            return tope + 1
+        anterior2, anterior = anterior, actual
+
+    return anterior[-1] if anterior[-1] <= tope else tope + 1
+
+
+def _borrados(palabra: str, max_dist: int):
+    """La palabra y todas las variantes con hasta max_dist letras borradas."""
+    resultado = {palabra}
+    frontera = {palabra}
+    for _ in range(max_dist):
+        frontera = {p[:i] + p[i + 1:] for p in frontera for i in range(len(p))}
+        resultado |= frontera
+    return resultado
+
+
+def _distancia_permitida(palabra: str) -> int:
+    # Palabras cortas admiten menos errores (si no, todo se parece a todo)
+    if len(palabra) <= 2:
+        return 0
+    if len(palabra) <= 5:
+        return 1
+    return MAX_DISTANCIA
+
+
+class IndiceDifuso:
+    """
+    Diccionario de borrados estilo SymSpell sobre las palabras del catálogo.
+
+    Cada palabra del vocabulario se indexa bajo todas sus variantes con
+    hasta MAX_DISTANCIA letras borradas; una consulta sólo genera sus
+    propios borrados y compara contra los pocos candidatos que comparten
+    alguno, sin recorrer el vocabulario. Las palabras corregidas se buscan
+    después en el IndiceNgramas, así que el ranking es el mismo.
+    """
+
+    def __init__(self, indice: IndiceNgramas):
+        self.indice = indice
+
+        # Frecuencia de cada palabra (en cuántos nombres aparece)
+        self._frecuencia = Counter(
+            palabra for texto in indice.textos for palabra in set(texto.split())
+        )
+
+        borrados = defaultdict(list)
+        for palabra in self._frecuencia:
+            for variante in _borrados(palabra, MAX_DISTANCIA):
+                borrados[variante].append(palabra)
+        self._borrados = dict(borrados)
+
+    def sugerencias(self, palabra: str):
+        """[(palabra_del_vocabulario, distancia)] por distancia y frecuencia."""
+        if palabra in self._frecuencia:
+            return [(palabra, 0)]
+
+        max_dist = _distancia_permitida(palabra)
+        if max_dist == 0:
+            return []
+
+        candidatas = set()
+        for variante in _borrados(palabra, max_dist):
+            candidatas.update(self._borrados.get(variante, ()))
+
+        encontradas = []
+        for candidata in candidatas:
+            dist = distancia_edicion(palabra, candidata, max_dist)
+            if dist <= max_dist:
+                encontradas.append((candidata, dist))
+
+        encontradas.sort(key=lambda s: (s[1], -self._frecuencia[s[0]], s[0]))
+        return encontradas
+
+    def buscar(self, consulta: str, k: int = 10):
+        """
+        Top-k posiciones de fila para una consulta con errores de tipeo.
+        Corrige palabra por palabra (hasta distancia 2) y prueba las
+        combinaciones de menor distancia total en el índice de trigramas.
+        Si la frase completa no existe en el catálogo, se prueba con menos
+        palabras, quitándolas desde el final.
+        """
+        palabras = consulta.split()
+        if not palabras or k <= 0:
+            return []
+
+        opciones = []
+        for palabra in palabras:
+            # Sin sugerencias se deja tal cual: puede ser un trozo de palabra
+            sugeridas = self.sugerencias(palabra)[:_SUGERENCIAS_POR_PALABRA]
+            opciones.append(sugeridas or [(palabra, 0)])
+
+        for n in range(len(opciones), 0, -1):
+            filas = self._buscar_combinaciones(opciones[:n], k)
+            if filas:
+                return filas
+        return []
+
+    def _buscar_combinaciones(self, opciones, k: int):
+        combinaciones = heapq.nsmallest(
+            _MAX_COMBINACIONES,
+            itertools.product(*opciones),
+            key=lambda combo: sum(dist for _, dist in combo),
+        )
+
+        filas = []
+        vistas = set()
+        for combo in combinaciones:
+            corregida = " ".join(palabra for palabra, _ in combo)
+            for fila in self.indice.buscar(corregida, k):
+                if fila not in vistas:
+                    vistas.add(fila)
+                    filas.append(fila)
+            if len(filas) >= k:
+                break
+
+        return filas[:k]
+
+
+# ----------------------------------------------------------
+# BÚSQUEDA DE UN ALIMENTO EN EL CATÁLOGO
+# ----------------------------------------------------------
+def buscar_alimento(cat, consulta: str, k: int = 1):
+    """
+    Top-k posiciones de fila de cat.df para `consulta` (sin normalizar):
+    exacta > inicio de palabra > parcial según los trigramas y, si no hay
+    ninguna, tolerando errores de tipeo. Es la búsqueda de la app, la API
+    y el lote.
+    """
+    consulta = normalizar(consulta)
+    return cat.indice.buscar(consulta, k=k) or cat.indice_difuso.buscar(consulta, k=k)
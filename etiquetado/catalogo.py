@@ -0,0 +1,555 @@
+"""
+Carga del catálogo oficial (tabla INTA dentro de CALCULADORA.zip).
+
+Leer el .xlsm con openpyxl tarda varios segundos, así que el catálogo ya
+procesado se guarda como snapshot Parquet junto al ZIP. El snapshot lleva
+en sus metadatos el hash SHA-256 del ZIP con que se generó; si el ZIP
+cambia, se vuelve a leer el Excel y se regenera el snapshot.
+
+Paso de build (genera el snapshot antes de levantar la app):
+
+    python -m etiquetado.catalogo
+
+Importar el módulo no lee nada ni carga pandas: el catálogo se arma
+recién al llamar a cargar_excel() / obtener().
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import zipfile
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .texto import SINONIMOS, normalizar, normalizar_serie
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .busqueda import IndiceDifuso, IndiceNgramas, IndiceSubcadenas
+    from .recetas import MatrizNutrientes
+    from .sellos import SellosCatalogo
+    from .tabla import TablaPaginada
+
+# Carpeta raíz del proyecto (donde viven app.py y CALCULADORA.zip)
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Ruta del archivo ZIP en Hugging Face
+ZIP_PATH = RAIZ / "CALCULADORA.zip"
+
+# Archivo Excel dentro del ZIP
+XLSM_NAME = "CALCULADORA DE MACRO Y MICRONUTRIENTES 2023.xlsm"
+
+# Base SQLite con los alimentos agregados por el usuario
+PERSONALIZADOS_DB = RAIZ / "alimentos_personalizados.db"
+
+# CSV donde se guardaban antes; se importa una vez a la base
+PERSONALIZADOS_PATH = RAIZ / "alimentos_personalizados.csv"
+
+# Snapshot columnar del catálogo ya procesado
+SNAPSHOT_PATH = RAIZ / "catalogo.parquet"
+
+# Informe de celdas del Excel que no eran número (se escribe al leerlo)
+INFORME_CELDAS_PATH = RAIZ / "catalogo_celdas.csv"
+
+# cargar_excel, almacen_personalizados y construir_catalogo leen las tres
+# rutas anteriores al llamarse (no al importar), así las pruebas pueden
+# apuntarlas a una carpeta temporal
+
+# Clave de metadatos Parquet donde se guarda el hash del ZIP
+_CLAVE_HASH = b"etiquetado.zip_sha256"
+
+# Versión de las columnas que escribe _preparar(); subirla cuando cambien
+# invalida los snapshots ya generados aunque el ZIP sea el mismo
+VERSION_ESQUEMA = 3
+_CLAVE_ESQUEMA = b"etiquetado.esquema"
+
+# Tipo de cada fila del Excel: sólo las de "alimento" son seleccionables
+COLUMNA_TIPO = "Tipo_fila"
+TIPOS_FILA = ("alimento", "titulo", "bibliografia", "nota", "vacia")
+
+# Columnas que no son nutrientes
+_COLUMNAS_TEXTO = ("Alimento", "Alimento_normalizado", COLUMNA_TIPO)
+
+# Esquema del resto de las columnas: Fuente es el número de la referencia
+# bibliográfica (categórica); todas las demás son float32
+COLUMNA_FUENTE = "Fuente"
+TIPO_NUMERICO = "float32"
+
+# Cifras significativas que se conservan al pasar de float32 a float64
+_CIFRAS_FLOAT32 = 7
+_MAX_EXPONENTE = 45
+# Valores por trozo en a_float64
+_TROZO = 1 << 16
+
+# Marcas de trazas en las celdas del Excel (quedan sin dato, como NaN)
+MARCAS_TRAZA = ("s", "tr", "trazas", "trasas")
+
+
+# ----------------------------------------------------------
+# HASH DEL ZIP
+# ----------------------------------------------------------
+def hash_zip(zip_path=ZIP_PATH) -> str:
+    """SHA-256 del contenido del ZIP (identifica la versión del catálogo)."""
+    h = hashlib.sha256()
+    with open(zip_path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+# ----------------------------------------------------------
+# LECTURA DEL EXCEL
+# ----------------------------------------------------------
+def _preparar(df: pd.DataFrame):
+    """Deja el DataFrame leído del Excel listo para la app; devuelve (df, informe)."""
+    # Asegurar que la primera columna se llame "Alimento"
+    primera_col = df.columns[0]
+    if primera_col != "Alimento":
+        df = df.rename(columns={primera_col: "Alimento"})
+
+    # Limpiar espacios en el nombre del alimento
+    df["Alimento"] = df["Alimento"].astype(str).str.strip()
+
+    # El Excel repite la fila de encabezados en cada sección y marca trazas
+    # con texto ("s", "trasas"), por lo que las columnas llegan como object.
+    # Se les aplica el esquema (texto -> NaN) para poder guardarlas en Parquet.
+    df, informe = aplicar_esquema(df)
+
+    # Columna normalizada (sin tildes, minúsculas) para las búsquedas
+    df["Alimento_normalizado"] = normalizar_serie(df["Alimento"])
+
+    df[COLUMNA_TIPO] = clasificar_filas(df)
+
+    return df, informe
+
+
+def _categorica_entera(valores) -> pd.Categorical:
+    """Categórica con categorías int64 (también si está vacía); NaN queda sin categoría."""
+    import numpy as np
+    import pandas as pd
+
+    presentes = ~np.isnan(valores)
+    categorias = np.unique(valores[presentes]).astype(np.int64)
+    codigos = np.full(len(valores), -1, dtype=np.int32)
+    codigos[presentes] = np.searchsorted(categorias, valores[presentes])
+    return pd.Categorical.from_codes(codigos, categories=pd.Index(categorias, dtype="int64"))
+
+
+@lru_cache(maxsize=1)
+def _potencias_de_10():
+    import numpy as np
+
+    return 10.0 ** np.arange(_MAX_EXPONENTE + 1)
+
+
+def _a_float64_trozo(entrada, salida):
+    """a_float64 de un trozo plano: `entrada` float32, resultado en `salida`."""
+    import numpy as np
+
+    v = salida
+    v[:] = entrada
+
+    # Decimales a conservar según el exponente decimal de cada valor (0
+    # para ceros, NaN e infinitos)
+    aux = np.abs(v)
+    np.log10(aux, out=aux, where=aux > 0)
+    np.floor(aux, out=aux)
+    np.nan_to_num(aux, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    np.subtract(_CIFRAS_FLOAT32 - 1, aux, out=aux)
+    np.clip(aux, -_MAX_EXPONENTE, _MAX_EXPONENTE, out=aux)
+    decimales = aux.astype(np.int8)
+
+    # Valores de 10^7 o más: se redondean a decenas, centenas...
+    grandes = decimales < 0
+    originales = v[grandes]
+
+    potencia = np.take(_potencias_de_10(), np.abs(decimales), out=aux)
+    v *= potencia
+    np.round(v, out=v)
+    v /= potencia
+    if originales.size:
+        v[grandes] = np.round(originales / potencia[grandes]) * potencia[grandes]
+
+
+def a_float64(valores):
+    """
+    Pasa valores float32 del catálogo a float64 conservando el decimal
+    leído (2.3 y no 2.2999999523), para que los redondeos de la etiqueta
+    den lo mismo que con el Excel original. Redondea cada valor a las
+    cifras significativas de float32 con aritmética de NumPy, por trozos
+    (los temporales caben en caché aunque la matriz sea de todo el catálogo).
+    """
+    import numpy as np
+
+    entrada = np.asarray(valores, dtype=np.float32)
+    # Misma disposición que la entrada, para recorrer las dos en plano sin copiar
+    salida = np.empty_like(entrada, dtype=np.float64)
+    plano_entrada = entrada.ravel(order="K")
+    plano_salida = salida.ravel(order="K")
+    for desde in range(0, plano_entrada.size, _TROZO):
+        hasta = desde + _TROZO
+        _a_float64_trozo(plano_entrada[desde:hasta], plano_salida[desde:hasta])
+    return salida
+
+
+def aplicar_esquema(df: pd.DataFrame):
+    """
+    Convierte todas las columnas que no son texto en una sola pasada
+    vectorizada: float32, y Fuente categórica. Devuelve (df, informe), con
+    una fila en el informe por celda con texto que no era número (trazas o
+    valores inválidos); los blancos y los encabezados que el Excel repite
+    en cada sección no se informan.
+    """
+    import numpy as np
+    import pandas as pd
+
+    columnas = [c for c in df.columns if c not in _COLUMNAS_TEXTO]
+    crudo = df[columnas].to_numpy(dtype=object)
+    valores = pd.to_numeric(pd.Series(crudo.ravel()), errors="coerce").to_numpy(np.float64)
+    valores = valores.reshape(crudo.shape)
+
+    # Sólo se recorren las (pocas) celdas con texto
+    informe = []
+    for fila, j in zip(*np.nonzero(np.isnan(valores) & pd.notna(crudo))):
+        texto = str(crudo[fila, j]).strip()
+        if texto in ("", columnas[j]):
+            continue
+        informe.append({
+            "fila": int(fila),
+            "alimento": str(df["Alimento"].iat[fila]),
+            "columna": columnas[j],
+            "valor": texto,
+            "tipo": "traza" if texto.lower() in MARCAS_TRAZA else "invalido",
+        })
+
+    tipados = {}
+    for j, col in enumerate(columnas):
+        if col == COLUMNA_FUENTE:
+            tipados[col] = pd.Series(_categorica_entera(valores[:, j]), index=df.index)
+        else:
+            tipados[col] = pd.Series(valores[:, j], index=df.index, dtype=TIPO_NUMERICO)
+    resultado = pd.DataFrame(
+        {col: tipados[col] if col in tipados else df[col] for col in df.columns}, index=df.index
+    )
+    return resultado, pd.DataFrame(informe, columns=["fila", "alimento", "columna", "valor", "tipo"])
+
+
+# Títulos de sección ("2.2 Huevos"), referencias ("1. Schmidt...") y la
+# nota de valores calculados ("5. Valor obtenido por cálculo")
+_PATRON_TITULO = re.compile(r"^\s*\d+(\.\d+)*\s+[A-Za-zÁÉÍÓÚáéíóúñÑ]")
+_PATRON_BIBLIOGRAFIA = re.compile(r"^\s*\d+\.\s+[A-Za-z]")
+_PATRON_NOTA = re.compile(r"^\s*\d+\.\s+Valor")
+
+
+def _tipo_fila(nombre: str, sin_valores: bool) -> str:
+    if nombre in ("", "nan"):
+        return "vacia"
+    if _PATRON_NOTA.match(nombre):
+        return "nota"
+    if _PATRON_BIBLIOGRAFIA.match(nombre):
+        return "bibliografia"
+    # Los títulos sin numerar ("Carnes y Vísceras") no traen ningún valor
+    if _PATRON_TITULO.match(nombre) or sin_valores:
+        return "titulo"
+    return "alimento"
+
+
+def clasificar_filas(df: pd.DataFrame) -> pd.Categorical:
+    """Tipo de cada fila del Excel (ver TIPOS_FILA), calculado una vez al leerlo."""
+    import pandas as pd
+
+    no_nutrientes = _COLUMNAS_TEXTO + ("Columna1", "Fuente", "Cantidad(g/ml)")
+    nutrientes = [c for c in df.columns if c not in no_nutrientes]
+    sin_valores = df[nutrientes].isna().all(axis=1)
+    tipos = [_tipo_fila(n, v) for n, v in zip(df["Alimento"], sin_valores)]
+    return pd.Categorical(tipos, categories=TIPOS_FILA)
+
+
+def leer_excel(zip_path=ZIP_PATH, informe_path=INFORME_CELDAS_PATH) -> pd.DataFrame:
+    """
+    Extrae el .xlsm del ZIP y lo lee con openpyxl (camino lento). Deja en
+    `informe_path` las celdas con texto que no se pudieron leer como número.
+    """
+    import pandas as pd
+
+    with zipfile.ZipFile(zip_path) as z:
+        with z.open(XLSM_NAME) as f:
+            df = pd.read_excel(f, engine="openpyxl", header=2)
+
+    df, informe = _preparar(df)
+    # Fila del Excel: título en la 1, encabezados en la 3, datos desde la 4
+    informe.insert(1, "fila_excel", informe["fila"] + 4)
+    if informe_path is not None:
+        try:
+            informe.to_csv(informe_path, index=False)
+        except OSError:
+            pass
+    return df
+
+
+# ----------------------------------------------------------
+# SNAPSHOT PARQUET
+# ----------------------------------------------------------
+def guardar_snapshot(df: pd.DataFrame, zip_hash: str, snapshot_path=SNAPSHOT_PATH):
+    """Escribe el snapshot de forma atómica, con el hash del ZIP en los metadatos."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    metadatos = dict(tabla.schema.metadata or {})
+    metadatos[_CLAVE_HASH] = zip_hash.encode()
+    metadatos[_CLAVE_ESQUEMA] = str(VERSION_ESQUEMA).encode()
+    tabla = tabla.replace_schema_metadata(metadatos)
+
+    snapshot_path = Path(snapshot_path)
+    tmp = snapshot_path.with_name(snapshot_path.name + ".tmp")
+    pq.write_table(tabla, tmp)
+    os.replace(tmp, snapshot_path)
+
+
+def leer_snapshot(zip_hash: str, snapshot_path=SNAPSHOT_PATH):
+    """
+    Devuelve el catálogo del snapshot, o None si no existe, es de otro ZIP
+    o fue escrito con otra versión del esquema.
+    """
+    import pyarrow.parquet as pq
+
+    try:
+        esquema = pq.read_schema(snapshot_path)
+    except (OSError, ValueError):
+        return None
+
+    metadatos = esquema.metadata or {}
+    if metadatos.get(_CLAVE_HASH) != zip_hash.encode():
+        return None
+    if metadatos.get(_CLAVE_ESQUEMA) != str(VERSION_ESQUEMA).encode():
+        return None
+
+    df = pq.read_table(snapshot_path).to_pandas()
+    # Parquet sólo conserva el diccionario de columnas de texto: Fuente vuelve como número
+    df[COLUMNA_FUENTE] = _categorica_entera(df[COLUMNA_FUENTE].to_numpy("float64"))
+    return df
+
+
+def cargar_excel(zip_path=ZIP_PATH, snapshot_path=None) -> pd.DataFrame:
+    """
+    Carga el catálogo oficial.
+    Usa el snapshot Parquet si corresponde al ZIP actual; si no, lee el
+    Excel y deja el snapshot regenerado para el próximo arranque.
+    """
+    if snapshot_path is None:
+        snapshot_path = SNAPSHOT_PATH
+    zip_hash = hash_zip(zip_path)
+
+    df = leer_snapshot(zip_hash, snapshot_path)
+    if df is not None:
+        return df
+
+    df = leer_excel(zip_path, INFORME_CELDAS_PATH)
+    try:
+        guardar_snapshot(df, zip_hash, snapshot_path)
+    except OSError:
+        # Sistema de archivos de sólo lectura: seguimos sin snapshot
+        pass
+
+    return df
+
+
+# ----------------------------------------------------------
+# ALIMENTOS PERSONALIZADOS
+# ----------------------------------------------------------
+def almacen_personalizados(path=None, csv_antiguo=None):
+    """
+    Base de personalizados, con el CSV antiguo ya importado si existía.
+    Es una sola por proceso y archivo: el esquema y la importación (que
+    toma el candado de escritura) se hacen la primera vez, no en cada
+    lectura o escritura.
+
+    Sin `csv_antiguo`, sólo la base de la app (PERSONALIZADOS_DB) importa
+    el CSV del repo; cualquier otra base parte vacía.
+    """
+    base_app = Path(PERSONALIZADOS_DB).resolve()
+    path = base_app if path is None else Path(path).resolve()
+    if csv_antiguo is None and path == base_app:
+        csv_antiguo = PERSONALIZADOS_PATH
+    return _almacen(path, None if csv_antiguo is None else Path(csv_antiguo).resolve())
+
+
+@lru_cache(maxsize=None)
+def _almacen(path: Path, csv_antiguo: Path = None):
+    from .personalizados import AlmacenPersonalizados
+
+    almacen = AlmacenPersonalizados(path)
+    if csv_antiguo is not None:
+        almacen.importar_csv(csv_antiguo)
+    return almacen
+
+
+def cargar_personalizados(columnas, path=None, csv_antiguo=None) -> pd.DataFrame:
+    """Lee los alimentos agregados por el usuario desde la base SQLite."""
+    import pandas as pd
+
+    filas = almacen_personalizados(path, csv_antiguo).filas()
+    # Las columnas que no se guardaron quedan en 0, como en la tabla base
+    dfp = pd.DataFrame(
+        [{col: datos.get(col, 0) for col in columnas} for _, _, datos in filas],
+        columns=list(columnas),
+    )
+
+    dfp["Alimento"] = [alimento for alimento, _, _ in filas]
+    dfp, _ = aplicar_esquema(dfp)
+    dfp["Alimento_normalizado"] = [normalizado for _, normalizado, _ in filas]
+    # Lo que agrega el usuario siempre es un alimento
+    dfp[COLUMNA_TIPO] = pd.Categorical(["alimento"] * len(dfp), categories=TIPOS_FILA)
+
+    return dfp
+
+
+# ----------------------------------------------------------
+# CATÁLOGO COMBINADO (OFICIAL + PERSONALIZADOS)
+# ----------------------------------------------------------
+# Contador de generación del catálogo, compartido por todo el proceso.
+# Se incrementa cada vez que cambian los alimentos personalizados; los
+# catálogos ya construidos siguen siendo válidos para su generación.
+_generacion = 0
+_generacion_lock = threading.Lock()
+
+
+def generacion_actual() -> int:
+    return _generacion
+
+
+def nueva_generacion() -> int:
+    """Marca el catálogo como desactualizado (llamar tras guardar/editar/borrar)."""
+    global _generacion
+    with _generacion_lock:
+        _generacion += 1
+        return _generacion
+
+
+class Catalogo:
+    """
+    Catálogo combinado de una generación: tabla oficial + personalizados.
+    Se construye una vez por generación y se comparte entre sesiones,
+    así que no debe modificarse.
+    """
+
+    def __init__(self, df_base: pd.DataFrame, df_personal: pd.DataFrame, generacion: int,
+                 sinonimos=SINONIMOS):
+        import pandas as pd
+
+        self.generacion = generacion
+        self.sinonimos = sinonimos
+        self.columnas_base = list(df_base.columns)
+        self.personal = df_personal
+
+        # Unimos tabla oficial + personalizados (ambas ya normalizadas)
+        self.df = pd.concat([df_base, df_personal], ignore_index=True)
+        # concat no conserva una categórica si las categorías difieren
+        from pandas.api.types import union_categoricals
+
+        self.df[COLUMNA_FUENTE] = union_categoricals(
+            [df_base[COLUMNA_FUENTE], df_personal[COLUMNA_FUENTE]]
+        )
+
+    @cached_property
+    def indice(self) -> IndiceNgramas:
+        """Índice de trigramas sobre Alimento_normalizado (posiciones de self.df)."""
+        from .busqueda import IndiceNgramas
+
+        # Títulos y bibliografía quedan vacíos: conservan su posición pero no coinciden
+        nombres = self.df["Alimento_normalizado"].where(self.es_alimento, "")
+        return IndiceNgramas(nombres, self.sinonimos)
+
+    @cached_property
+    def indice_difuso(self) -> IndiceDifuso:
+        """Índice tolerante a errores de tipeo (distancia de edición <= 2)."""
+        from .busqueda import IndiceDifuso
+
+        return IndiceDifuso(self.indice)
+
+    @cached_property
+    def matriz(self) -> MatrizNutrientes:
+        """Matriz alimentos x nutrientes por gramo, para calcular preparaciones."""
+        from .recetas import MatrizNutrientes
+
+        return MatrizNutrientes(self.df)
+
+    @cached_property
+    def sellos(self) -> SellosCatalogo:
+        """Marcas de sellos (sólido y líquido) de todas las filas de self.df."""
+        from .sellos import SellosCatalogo
+
+        return SellosCatalogo(self.df, self.es_alimento)
+
+    @cached_property
+    def es_alimento(self):
+        """Máscara de las filas que son alimentos (no títulos, bibliografía, etc.)."""
+        return (self.df[COLUMNA_TIPO] == "alimento").to_numpy()
+
+    @cached_property
+    def filas_alimentos(self):
+        """Posiciones de los alimentos, ordenadas por nombre sin tildes."""
+        import numpy as np
+
+        filas = np.flatnonzero(self.es_alimento)
+        nombres = self.df["Alimento_normalizado"].to_numpy()[filas]
+        return filas[np.argsort(nombres, kind="stable")]
+
+    @cached_property
+    def opciones_preparacion(self):
+        """Nombres de alimentos (sin títulos ni bibliografía), ordenados sin tildes."""
+        return list(dict.fromkeys(self.df["Alimento"].to_numpy()[self.filas_alimentos]))
+
+    @cached_property
+    def indice_opciones(self) -> IndiceSubcadenas:
+        """Filtro por subcadena sobre opciones_preparacion (mismas posiciones)."""
+        from .busqueda import IndiceSubcadenas
+
+        return IndiceSubcadenas([normalizar(a) for a in self.opciones_preparacion])
+
+    @cached_property
+    def tabla(self) -> TablaPaginada:
+        """Alimentos del catálogo (ya ordenados) en Arrow, para mostrarlos por páginas."""
+        from .tabla import TablaPaginada
+
+        return TablaPaginada(self.df.iloc[self.filas_alimentos])
+
+
+def construir_catalogo(df_base: pd.DataFrame, generacion: int = None,
+                       path_personalizados=None,
+                       sinonimos=SINONIMOS) -> Catalogo:
+    """Lee los personalizados y arma el catálogo combinado."""
+    if generacion is None:
+        generacion = generacion_actual()
+    df_personal = cargar_personalizados(df_base.columns, path_personalizados)
+    return Catalogo(df_base, df_personal, generacion, sinonimos)
+
+
+# Catálogo del proceso para usos sin Streamlit (lote, API, scripts)
+_catalogo = None
+_catalogo_lock = threading.Lock()
+
+
+def obtener() -> Catalogo:
+    """
+    Catálogo de la generación actual, construido la primera vez que se pide
+    y reutilizado mientras no cambien los personalizados.
+    """
+    global _catalogo
+    with _catalogo_lock:
+        if _catalogo is None or _catalogo.generacion != generacion_actual():
+            _catalogo = construir_catalogo(cargar_excel())
+        return _catalogo
+
+
+if __name__ == "__main__":
+    zip_hash = hash_zip()
+    df = leer_excel()
+    guardar_snapshot(df, zip_hash)
+    print(f"Snapshot generado: {SNAPSHOT_PATH} ({len(df)} filas, zip {zip_hash[:12]})")
+    print(f"Celdas con texto no numérico: {INFORME_CELDAS_PATH}")
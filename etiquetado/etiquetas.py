@@ -0,0 +1,427 @@
+from functools import lru_cache
+from io import BytesIO
+
+
+# ----------------------------------------------------------
+# ESPECIFICACIÓN DE FILAS DE LA ETIQUETA HTML
+# ----------------------------------------------------------
+# Filas de la tabla principal, en orden:
+# (columna del catálogo, texto, decimales, sección opcional)
+# Las filas con sección sólo aparecen si esa sección se pide.
+FILAS_ETIQUETA = (
+    ("Energía(kcal)", "Energía (kcal)", 0, None),
+    ("Proteínas (g)", "Proteínas (g)", 1, None),
+    ("Lípidos totales (g)", "Grasa Total (g)", 1, None),
+    # Grasas bajo Grasa Total (al menos saturadas, norma chilena)
+    ("AG Sat (g)", "  Saturadas (g)", 1, None),
+    ("AG Mono (g)", "  Monoinsaturadas (g)", 1, "desglose_grasas"),
+    ("AG Poli (g)", "  Poliinsaturadas (g)", 1, "desglose_grasas"),
+    ("AG Trans (g)", "  Trans (g)", 2, "desglose_grasas"),
+    ("HdeC disp (g)", "H. de C. Disp. (g)", 1, None),
+    ("Azúcares totales (g)", "Azúcares Totales (g)", 1, None),
+    ("Sodio (mg)", "Sodio (mg)", 1, None),
+    ("Fibra Total (g)", "Fibra Alimentaria (g)", 1, "fibra"),
+)
+
+# Bloque de micronutrientes (sólo por porción):
+# (columna del catálogo, texto, decimales, unidad)
+FILAS_MICROS = (
+    ("Calcio (mg)", "Calcio", 0, "mg"),
+    ("Hierro (mg)", "Hierro", 1, "mg"),
+    ("Zinc (mg)", "Zinc", 2, "mg"),
+    ("Vit D (ug)", "Vitamina D", 2, "µg"),
+    ("Vit B12 (ug)", "Vitamina B12", 2, "µg"),
+    ("Folatos (ug)", "Folatos", 1, "µg"),
+)
+
+_FILA_HTML = """
+  <tr>
+    <td style="border-bottom:1px solid #ccc; padding:2px 4px;">{texto}</td>
+    <td style="border-bottom:1px solid #ccc; padding:2px 4px; text-align:right;">{{{i100}:.{dec}f}}</td>
+    <td style="border-bottom:1px solid #ccc; padding:2px 4px; text-align:right;">{{{ipor}:.{dec}f}}</td>
+  </tr>
+"""
+
+_MICROS_HTML = """
+  <div style="border-top:1px solid #000; margin-top:6px; padding-top:4px; font-size:11px; font-weight:bold;">
+    Micronutrientes (por porción)
+  </div>
+  <div style="font-size:11px; margin-top:3px;">
+    {lineas}
+  </div>
+"""
+
+_ETIQUETA_HTML = """
+<div style="border:2px solid #000; width:340px; font-family:Arial,sans-serif; background:#ffffff; color:#000;">
+  <div style="background:#000; color:#fff; text-align:center; font-weight:bold; padding:4px 0; font-size:14px;">
+    INFORMACIÓN NUTRICIONAL
+  </div>
+  <div style="padding:4px 6px; border-bottom:1px solid #000; font-size:12px;">
+    <b>Porción:</b> {{porcion_label}}<br>
+    <b>Porciones por envase:</b> {{porciones_envase:.0f}}
+  </div>
+  <table style="width:100%; border-collapse:collapse; font-size:12px;">
+    <tr>
+      <th style="border-bottom:1px solid #000; padding:2px 4px; text-align:left;"></th>
+      <th style="border-bottom:1px solid #000; padding:2px 4px; text-align:center;">100 g</th>
+      <th style="border-bottom:1px solid #000; padding:2px 4px; text-align:center;">1 porción</th>
+    </tr>
+    {filas}
+  </table>
+  {micros}
+</div>
+"""
+
+
+def _escapar_llaves(texto: str) -> str:
+    return texto.replace("{", "{{").replace("}", "}}")
+
+
+class PlantillaEtiqueta:
+    """
+    Etiqueta HTML compilada para una combinación de secciones opcionales.
+
+    Toda la etiqueta queda como un único string de formato con un campo
+    posicional por valor; render() arma el vector de valores (100 g y
+    porción) y la produce con una sola llamada a format().
+    """
+
+    def __init__(self, incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False):
+        secciones = {"desglose_grasas": incluir_desglose_grasas, "fibra": incluir_fibra}
+        self.filas = [f for f in FILAS_ETIQUETA if f[3] is None or secciones[f[3]]]
+        self.micros = FILAS_MICROS if incluir_micros else ()
+
+        # Columnas que alimentan la plantilla, en orden de campo
+        self.columnas = [f[0] for f in self.filas] + [m[0] for m in self.micros]
+
+        partes = []
+        for i, (_, texto, dec, _) in enumerate(self.filas):
+            partes.append(_FILA_HTML.format(
+                texto=_escapar_llaves(texto), i100=2 * i, ipor=2 * i + 1, dec=dec,
+            ))
+
+        micros = ""
+        if self.micros:
+            base = 2 * len(self.filas)
+            lineas = "<br>\n    ".join(
+                f"{_escapar_llaves(texto)}: {{{base + j}:.{dec}f}} {unidad}"
+                for j, (_, texto, dec, unidad) in enumerate(self.micros)
+            )
+            micros = _MICROS_HTML.format(lineas=lineas)
+
+        self._formato = _ETIQUETA_HTML.format(filas="".join(partes), micros=micros)
+
+    def render(self, valores_100, porcion, porciones_envase, texto_porcion=None) -> str:
+        """HTML de la etiqueta; valores_100 es cualquier objeto con .get por columna."""
+        # La columna "1 porción" SIEMPRE se calcula como valor_100 * (porcion / 100)
+        factor_porcion = porcion / 100.0
+
+        args = []
+        for columna, *_ in self.filas:
+            v100 = valores_100.get(columna, 0.0)
+            args.append(v100)
+            args.append(_por_porcion(v100, factor_porcion))
+        for columna, *_ in self.micros:
+            args.append(_por_porcion(valores_100.get(columna, 0.0), factor_porcion))
+
+        # Texto que se mostrará como descripción de la porción en la etiqueta
+        porcion_label = texto_porcion if texto_porcion else f"{porcion:.0f} g/ml"
+
+        return self._formato.format(
+            *args, porcion_label=porcion_label, porciones_envase=porciones_envase,
+        )
+
+
+def _por_porcion(v100, factor_porcion: float) -> float:
+    try:
+        return float(v100) * factor_porcion
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@lru_cache(maxsize=None)
+def plantilla(incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False):
+    """Plantilla compilada (una por combinación de secciones)."""
+    return PlantillaEtiqueta(bool(incluir_desglose_grasas), bool(incluir_fibra), bool(incluir_micros))
+
+
+# ----------------------------------------------------------
+# CONSTRUCTOR DE ETIQUETA HTML TIPO MANUAL CHILENO
+# ----------------------------------------------------------
+def construir_etiqueta_html_manual(
+    nombre_producto,
+    porcion,
+    porciones_envase,
+    # macros
+    energia_100, energia_porcion,   # energia_porcion ya no se usa, se recalcula adentro
+    prot_100, prot_porcion,
+    grasa_total_100, grasa_total_porcion,
+    grasa_sat_100, grasa_sat_porcion,
+    hdc_100, hdc_porcion,
+    azucar_100, azucar_porcion,
+    sodio_100, sodio_porcion,
+    # desglose grasas opcional
+    mono_100=0.0, mono_porcion=0.0,
+    poli_100=0.0, poli_porcion=0.0,
+    trans_100=0.0, trans_porcion=0.0,
+    incluir_desglose_grasas=False,
+    # fibra opcional
+    fibra_100=0.0, fibra_porcion=0.0,
+    incluir_fibra=False,
+    # micronutrientes opcionales
+    calcio_100=0.0, calcio_porcion=0.0,
+    hierro_100=0.0, hierro_porcion=0.0,
+    zinc_100=0.0, zinc_porcion=0.0,
+    vitd_100=0.0, vitd_porcion=0.0,
+    vitb12_100=0.0, vitb12_porcion=0.0,
+    folatos_100=0.0, folatos_porcion=0.0,
+    incluir_micros=False,
+    texto_porcion=None,   # 👈 ahora el parámetro con default va al final
+):
+
+    """
+    Devuelve un bloque HTML con el formato tipo manual chileno:
+    encabezado negro, tabla con columnas 100 g y 1 porción.
+    La columna "1 porción" SIEMPRE se calcula como:
+        valor_100 * (porcion / 100)
+
+    Se mantiene por compatibilidad; usa la misma plantilla compilada que
+    etiqueta_html() (los valores *_porcion y el nombre se ignoran).
+    """
+    valores_100 = {
+        "Energía(kcal)": energia_100,
+        "Proteínas (g)": prot_100,
+        "Lípidos totales (g)": grasa_total_100,
+        "AG Sat (g)": grasa_sat_100,
+        "HdeC disp (g)": hdc_100,
+        "Azúcares totales (g)": azucar_100,
+        "Sodio (mg)": sodio_100,
+        "AG Mono (g)": mono_100,
+        "AG Poli (g)": poli_100,
+        "AG Trans (g)": trans_100,
+        "Fibra Total (g)": fibra_100,
+        "Calcio (mg)": calcio_100,
+        "Hierro (mg)": hierro_100,
+        "Zinc (mg)": zinc_100,
+        "Vit D (ug)": vitd_100,
+        "Vit B12 (ug)": vitb12_100,
+        "Folatos (ug)": folatos_100,
+    }
+    return plantilla(incluir_desglose_grasas, incluir_fibra, incluir_micros).render(
+        valores_100, porcion, porciones_envase, texto_porcion,
+    )
+
+
+
+# ----------------------------------------------------------
+# FUNCIÓN PARA GENERAR IMAGEN DE ETIQUETA (PNG)
+# (formato simple, usa mismos macros; se puede refinar luego)
+# ----------------------------------------------------------
+def generar_imagen_etiqueta(
+    nombre_alimento,
+    porcion,
+    porciones_envase,
+    energia_porcion,
+    energia_100,
+    proteinas_porcion,
+    grasas_total_porcion,
+    grasas_sat_porcion,
+    hdc_porcion,
+    azucares_porcion,
+    sodio_porcion,
+    sodio_100,
+    fibra_porcion=0.0,
+    fibra_100=0.0,
+    trans_porcion=0.0,
+    trans_100=0.0,
+    incluir_fibra=False,
+    incluir_trans=False,
+    texto_porcion=None,
+):
+    # PIL se importa recién aquí: quien sólo arma HTML no la paga
+    from PIL import Image, ImageDraw, ImageFont
+
+    # Tamaño base de la imagen
+    img = Image.new("RGB", (800, 900), "white")
+    draw = ImageDraw.Draw(img)
+
+    font_title = ImageFont.load_default()
+    font_bold = ImageFont.load_default()
+    font_normal = ImageFont.load_default()
+
+    x_margin = 40
+    y = 30
+
+    draw.text((x_margin, y), "INFORMACIÓN NUTRICIONAL", font=font_title, fill="black")
+    y += 30
+
+    draw.text((x_margin, y), f"Producto: {nombre_alimento}", font=font_normal, fill="black")
+    y += 25
+
+    # Texto de porción en la imagen
+    if texto_porcion:
+        porcion_label_img = texto_porcion
+    else:
+        porcion_label_img = f"{porcion:.0f} g/ml"
+
+    draw.text((x_margin, y), f"Porción: {porcion_label_img}", font=font_normal, fill="black")
+    y += 20
+    draw.text((x_margin, y), f"Porciones por envase: {porciones_envase}", font=font_normal, fill="black")
+    y += 30
+
+    draw.line((x_margin, y, 760, y), fill="black", width=2)
+    y += 10
+
+    draw.text((x_margin, y), "Nutriente", font=font_bold, fill="black")
+    draw.text((x_margin + 300, y), f"Por {porcion:.0f} g/ml", font=font_bold, fill="black")
+    draw.text((x_margin + 550, y), "Por 100 g/ml", font=font_bold, fill="black")
+    y += 25
+
+    draw.line((x_margin, y, 760, y), fill="black", width=1)
+    y += 10
+
+    def fila(nutriente, valor_porcion_str, valor_100_str):
+        nonlocal y
+        draw.text((x_margin, y), nutriente, font=font_normal, fill="black")
+        draw.text((x_margin + 300, y), valor_porcion_str, font=font_normal, fill="black")
+        draw.text((x_margin + 550, y), valor_100_str, font=font_normal, fill="black")
+        y += 22
+
+    fila("Energía (kcal)", f"{energia_porcion:.0f}", f"{energia_100:.0f}")
+    fila("Proteínas (g)", f"{proteinas_porcion:.1f}", "-")
+    fila("Grasas totales (g)", f"{grasas_total_porcion:.1f}", "-")
+    fila("   de las cuales saturadas (g)", f"{grasas_sat_porcion:.1f}", "-")
+    fila("Hidratos de carbono disp. (g)", f"{hdc_porcion:.1f}", "-")
+    fila("   azúcares totales (g)", f"{azucares_porcion:.1f}", "-")
+    fila("Sodio (mg)", f"{sodio_porcion:.0f}", f"{sodio_100:.0f}")
+
+    if incluir_fibra:
+        fila("Fibra alimentaria (g)", f"{fibra_porcion:.1f}", f"{fibra_100:.1f}")
+
+    if incluir_trans:
+        fila("Grasas trans (g)", f"{trans_porcion:.2f}", f"{trans_100:.2f}")
+
+    y += 20
+    draw.line((x_margin, y, 760, y), fill="black", width=2)
+
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    buf.seek(0)
+    return buf
+
+
+# ----------------------------------------------------------
+# ETIQUETAS A PARTIR DE VALORES POR COLUMNA DEL CATÁLOGO
+# (mismo camino para la app, el modo por lotes y otros servicios)
+# ----------------------------------------------------------
+def texto_porcion(descripcion, porcion) -> str:
+    """Texto de porción para la etiqueta (ej: "1 mandarina (120 g/ml)")."""
+    desc_clean = (descripcion or "").strip()
+    if desc_clean:
+        return f"{desc_clean} ({porcion:.0f} g/ml)"
+    return f"{porcion:.0f} g/ml"
+
+
+def etiqueta_html(
+    valores_100,
+    porcion,
+    porciones_envase,
+    texto_porcion=None,
+    incluir_desglose_grasas=False,
+    incluir_fibra=False,
+    incluir_micros=False,
+):
+    """
+    Etiqueta HTML a partir de valores por columna del catálogo (cualquier
+    objeto con .get: dict, fila de pandas). La columna de porción se
+    calcula desde valores_100, igual que construir_etiqueta_html_manual().
+    """
+    return plantilla(incluir_desglose_grasas, incluir_fibra, incluir_micros).render(
+        valores_100, porcion, porciones_envase, texto_porcion,
+    )
+
+
+# Decimales con que generar_imagen_etiqueta muestra cada argumento
+_DECIMALES_PNG = {
+    "porcion": 0,
+    "energia_porcion": 0,
+    "energia_100": 0,
+    "proteinas_porcion": 1,
+    "grasas_total_porcion": 1,
+    "grasas_sat_porcion": 1,
+    "hdc_porcion": 1,
+    "azucares_porcion": 1,
+    "sodio_porcion": 0,
+    "sodio_100": 0,
+    "fibra_porcion": 1,
+    "fibra_100": 1,
+    "trans_porcion": 2,
+    "trans_100": 2,
+}
+
+# NaN único para que las claves con NaN se reconozcan en el memo
+_NAN = float("nan")
+
+
+def _como_se_muestra(valor, decimales: int) -> float:
+    """El valor tal como queda impreso en la imagen (mismo formato :.Nf)."""
+    valor = float(f"{valor:.{decimales}f}")
+    return _NAN if valor != valor else valor
+
+
+@lru_cache(maxsize=256)
+def _png_memo(nombre, porciones_envase, texto_porcion, incluir_fibra, incluir_trans, valores):
+    return generar_imagen_etiqueta(
+        nombre_alimento=nombre,
+        porciones_envase=porciones_envase,
+        incluir_fibra=incluir_fibra,
+        incluir_trans=incluir_trans,
+        texto_porcion=texto_porcion,
+        **dict(valores),
+    ).getvalue()
+
+
+def etiqueta_png_bytes(
+    nombre,
+    valores_100,
+    valores_porcion,
+    porcion,
+    porciones_envase,
+    texto_porcion=None,
+    incluir_fibra=False,
+    incluir_trans=False,
+) -> bytes:
+    """
+    PNG de la etiqueta a partir de valores por columna del catálogo.
+
+    Se memoiza sobre los valores redondeados como se imprimen: cambios que
+    no alteran la imagen (decimales ocultos, fibra/trans no incluidas)
+    reutilizan los mismos bytes sin volver a dibujar ni codificar.
+    """
+    valores = {
+        "porcion": porcion,
+        "energia_porcion": valores_porcion.get("Energía(kcal)", 0.0),
+        "energia_100": valores_100.get("Energía(kcal)", 0.0),
+        "proteinas_porcion": valores_porcion.get("Proteínas (g)", 0.0),
+        "grasas_total_porcion": valores_porcion.get("Lípidos totales (g)", 0.0),
+        "grasas_sat_porcion": valores_porcion.get("AG Sat (g)", 0.0),
+        "hdc_porcion": valores_porcion.get("HdeC disp (g)", 0.0),
+        "azucares_porcion": valores_porcion.get("Azúcares totales (g)", 0.0),
+        "sodio_porcion": valores_porcion.get("Sodio (mg)", 0.0),
+        "sodio_100": valores_100.get("Sodio (mg)", 0.0),
+        "fibra_porcion": valores_porcion.get("Fibra Total (g)", 0.0) if incluir_fibra else 0.0,
+        "fibra_100": valores_100.get("Fibra Total (g)", 0.0) if incluir_fibra else 0.0,
+        "trans_porcion": valores_porcion.get("AG Trans (g)", 0.0) if incluir_trans else 0.0,
+        "trans_100": valores_100.get("AG Trans (g)", 0.0) if incluir_trans else 0.0,
+    }
+    clave = tuple(
+        (campo, _como_se_muestra(valor, _DECIMALES_PNG[campo]))
+        for campo, valor in valores.items()
+    )
+    return _png_memo(str(nombre), porciones_envase, texto_porcion,
+                     bool(incluir_fibra), bool(incluir_trans), clave)
+
+
+def etiqueta_png(*args, **kwargs) -> BytesIO:
+    """etiqueta_png_bytes() en un BytesIO (como generar_imagen_etiqueta)."""
+    return BytesIO(etiqueta_png_bytes(*args, **kwargs))
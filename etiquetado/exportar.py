@@ -0,0 +1,159 @@
+"""
+Exportación de un portafolio completo en un ZIP que se genera en flujo.
+
+zip_en_flujo() es un generador: cada archivo se comprime y se entrega
+en trozos de bytes apenas se produce, sin armar el ZIP en memoria (el
+ZIP se escribe con descriptores de datos, como en una conexión HTTP).
+Por producto se incluyen la etiqueta HTML, el PNG, los octógonos de los
+sellos que le corresponden y sus datos:
+
+    00000_leche_con_platano/etiqueta.html
+    00000_leche_con_platano/etiqueta.png
+    00000_leche_con_platano/sellos/alto_en_azucares.png
+    00000_leche_con_platano/datos.json
+
+La memoria máxima es la de un producto, sean 10 o 10.000.
+
+Uso (mismo formato de recetas que etiquetado.lote; "-" escribe a stdout):
+
+    python -m etiquetado.exportar recetas.csv -o portafolio.zip
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import zipfile
+
+from . import recursos
+from .lote import DatosRecetaError, leer_recetas, nombre_archivo, procesar_lote
+
+
+class _Flujo(io.RawIOBase):
+    """Destino no posicionable para ZipFile: junta lo escrito hasta vaciar()."""
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+        self._escrito = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._escrito += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._escrito
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def zip_en_flujo(entradas):
+    """
+    Genera los bytes de un ZIP a partir de pares (ruta, bytes), a medida
+    que llegan. Los PNG y PDF van sin comprimir (ya lo están).
+    """
+    flujo = _Flujo()
+    with zipfile.ZipFile(flujo, "w", zipfile.ZIP_DEFLATED) as zf:
+        for ruta, datos in entradas:
+            comprimido = not ruta.endswith((".png", ".pdf"))
+            zf.writestr(ruta, datos, compress_type=zipfile.ZIP_DEFLATED if comprimido else zipfile.ZIP_STORED)
+            parte = flujo.vaciar()
+            if parte:
+                yield parte
+    # Directorio central
+    yield flujo.vaciar()
+
+
+def _archivo_sello(sello: str) -> str:
+    return nombre_archivo(0, sello).split("_", 1)[1] + ".png"
+
+
+def artefactos(i: int, resultado):
+    """(ruta, bytes) de un producto ya procesado por lote.procesar_receta."""
+    base = nombre_archivo(i, resultado["nombre"])
+    if "error" in resultado:
+        yield f"{base}/error.txt", resultado["error"].encode("utf-8")
+        return
+
+    yield f"{base}/etiqueta.html", resultado.pop("html").encode("utf-8")
+    if "png" in resultado:
+        yield f"{base}/etiqueta.png", resultado.pop("png")
+    if "svg" in resultado:
+        yield f"{base}/etiqueta.svg", resultado.pop("svg").encode("utf-8")
+        yield f"{base}/etiqueta.pdf", resultado.pop("pdf")
+
+    # Mismos bytes precargados para todos los productos
+    sellos = recursos.obtener().sellos
+    for sello in resultado["sellos"]:
+        yield f"{base}/sellos/{_archivo_sello(sello)}", sellos[sello]
+
+    yield f"{base}/datos.json", json.dumps(resultado, ensure_ascii=False, indent=1).encode("utf-8")
+
+
+def exportar(resultados):
+    """Bytes del ZIP del portafolio a partir de (posición, resultado) de procesar_lote."""
+    return zip_en_flujo(
+        entrada for i, resultado in resultados for entrada in artefactos(i, resultado)
+    )
+
+
+# ----------------------------------------------------------
+# LÍNEA DE COMANDOS
+# ----------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m etiquetado.exportar",
+        description="Exporta etiquetas HTML/PNG y sellos de un portafolio de recetas a un ZIP.",
+    )
+    parser.add_argument("recetas", help="archivo .csv o .json con las recetas")
+    parser.add_argument("-o", "--salida", required=True, help="archivo .zip de salida, o - para stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--vectorial", action="store_true", help="incluir también SVG y PDF")
+    parser.add_argument("--desglose-grasas", action="store_true")
+    parser.add_argument("--fibra", action="store_true")
+    parser.add_argument("--micros", action="store_true")
+    args = parser.parse_args(argv)
+
+    resultados = procesar_lote(
+        leer_recetas(args.recetas),
+        workers=args.workers,
+        incluir_desglose_grasas=args.desglose_grasas,
+        incluir_fibra=args.fibra,
+        incluir_micros=args.micros,
+        vectorial=args.vectorial,
+    )
+
+    cuenta = {"ok": 0, "errores": 0}
+
+    def contar(resultados):
+        for i, r in resultados:
+            cuenta["errores" if "error" in r else "ok"] += 1
+            yield i, r
+
+    destino = sys.stdout.buffer if args.salida == "-" else open(args.salida, "wb")
+    try:
+        for parte in exportar(contar(resultados)):
+            destino.write(parte)
+    except DatosRecetaError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if destino is not sys.stdout.buffer:
+            destino.close()
+
+    # stdout puede ser el ZIP mismo
+    print(f"{cuenta['ok']} productos exportados, {cuenta['errores']} con errores -> {args.salida}",
+          file=sys.stderr)
+    return 1 if cuenta["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Presupuesto de tiempo de importación del paquete.
+
+Cada módulo se importa en un intérprete nuevo (mejor de varias corridas)
+y se compara contra su presupuesto. Además se verifica que importar no
+arrastre dependencias pesadas que sólo se usan al calcular o dibujar:
+
+    python -m etiquetado.importacion
+
+Sale con código 1 si algún módulo se pasa del presupuesto.
+"""
+import json
+import subprocess
+import sys
+
+# Milisegundos permitidos por módulo (sin contar el arranque de Python)
+PRESUPUESTO_MS = {
+    "etiquetado": 5,
+    "etiquetado.texto": 10,
+    "etiquetado.sellos": 5,
+    "etiquetado.etiquetas": 10,
+    "etiquetado.busqueda": 15,
+    "etiquetado.recursos": 10,
+    "etiquetado.personalizados": 15,
+    "etiquetado.tabla": 10,
+    "etiquetado.metricas": 10,
+    "etiquetado.vectorial": 15,
+    "etiquetado.catalogo": 30,
+    "etiquetado.recetas": 150,
+    "etiquetado.lote": 200,
+    "etiquetado.pliegos": 200,
+    "etiquetado.exportar": 200,
+    "etiquetado.api": 200,
+}
+
+# Módulos que no deben quedar cargados sólo por importar
+PESADOS = ("pandas", "pyarrow", "PIL", "openpyxl", "streamlit")
+
+_CORRIDAS = 3
+
+_MEDIR = """
+import json, sys, time
+t = time.perf_counter()
+import {modulo}
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({{"ms": ms, "pesados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+
+def medir(modulo: str, corridas: int = _CORRIDAS):
+    """(ms, dependencias pesadas cargadas) del mejor de `corridas` intérpretes nuevos."""
+    mejor = None
+    for _ in range(corridas):
+        salida = subprocess.run(
+            [sys.executable, "-c", _MEDIR.format(modulo=modulo, pesados=PESADOS)],
+            capture_output=True, text=True, check=True,
+        )
+        medida = json.loads(salida.stdout)
+        if mejor is None or medida["ms"] < mejor["ms"]:
+            mejor = medida
+    return mejor["ms"], mejor["pesados"]
+
+
+def main():
+    fallas = 0
+    for modulo, presupuesto in PRESUPUESTO_MS.items():
+        ms, pesados = medir(modulo)
+        ok = ms <= presupuesto and not pesados
+        fallas += not ok
+        extra = f"  carga {', '.join(pesados)}" if pesados else ""
+        print(f"{'OK ' if ok else 'MAL'} {modulo:<24} {ms:7.1f} ms / {presupuesto} ms{extra}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
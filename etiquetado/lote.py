@@ -0,0 +1,444 @@
+"""
+Etiquetado por lotes, sin Streamlit.
+
+Lee un CSV o JSON de recetas, calcula nutrientes, sellos y etiquetas
+HTML/PNG de cada una en paralelo (un proceso por núcleo) y va escribiendo
+los resultados a medida que terminan, en una carpeta o en un ZIP.
+
+CSV (una fila por ingrediente; los datos de la receta se repiten):
+
+    receta,alimento,gramos,porcion,porciones_envase,tipo,descripcion_porcion
+    Leche con plátano,Leche fluida entera(1),200,250,1,Líquido,1 vaso
+    Leche con plátano,Plátano,100,250,1,Líquido,1 vaso
+
+JSON (lista de recetas):
+
+    [{"nombre": "Leche con plátano",
+      "ingredientes": {"Leche fluida entera(1)": 200, "Plátano": 100},
+      "porcion": 250, "porciones_envase": 1, "tipo": "Líquido",
+      "descripcion_porcion": "1 vaso"}]
+
+Uso:
+
+    python -m etiquetado.lote recetas.csv -o etiquetas/
+    python -m etiquetado.lote recetas.json -o etiquetas.zip --workers 8
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from . import catalogo, etiquetas
+from .busqueda import buscar_alimento
+from .recetas import RecetaError
+from .sellos import TipoProductoError, calcular_sellos, resolver_tipo
+from .texto import normalizar
+from .vectorial import EtiquetaVectorial, documento_pdf, documento_svg, pagina_pdf
+
+# Catálogo del proceso (en los workers se carga una sola vez)
+_CATALOGO = None
+
+# Recetas por tarea enviada a un worker, y tareas en vuelo por worker
+_RECETAS_POR_TAREA = 16
+_TAREAS_POR_WORKER = 4
+
+
+class DatosRecetaError(ValueError):
+    """Archivo o receta con datos mal formados (indica dónde y qué campo)."""
+
+
+def _numero(valor, campo: str) -> float:
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise DatosRecetaError(f"'{campo}' no es un número: {valor!r}") from None
+    if not math.isfinite(numero):
+        raise DatosRecetaError(f"'{campo}' no es un número finito: {valor!r}")
+    return numero
+
+
+def _positivo(valor, campo: str) -> float:
+    numero = _numero(valor, campo)
+    if numero <= 0:
+        raise DatosRecetaError(f"'{campo}' debe ser mayor que 0: {valor!r}")
+    return numero
+
+
+class Receta:
+    """Una receta a etiquetar: ingredientes en g/ml y datos de la porción."""
+
+    def __init__(self, nombre, ingredientes, porcion, porciones_envase=1,
+                 tipo="Sólido", descripcion_porcion=""):
+        self.nombre = str(nombre)
+        self.ingredientes = {
+            str(a): _numero(g, f"gramos de {a}") for a, g in ingredientes.items()
+        }
+        self.porcion = _positivo(porcion, "porcion")
+        self.porciones_envase = _positivo(porciones_envase, "porciones_envase")
+        try:
+            self.tipo = resolver_tipo(tipo)
+        except TipoProductoError as e:
+            raise DatosRecetaError(f"'tipo': {e}") from None
+        self.descripcion_porcion = descripcion_porcion or ""
+
+    @classmethod
+    def desde_dict(cls, d):
+        if not isinstance(d, dict):
+            raise DatosRecetaError("la receta debe ser un objeto JSON")
+        for campo in ("nombre", "ingredientes"):
+            if campo not in d:
+                raise DatosRecetaError(f"falta el campo '{campo}'")
+
+        ingredientes = d["ingredientes"]
+        if isinstance(ingredientes, list):
+            lista = ingredientes
+            ingredientes = {}
+            for item in lista:
+                if not isinstance(item, dict) or "alimento" not in item or "gramos" not in item:
+                    raise DatosRecetaError(
+                        "cada ingrediente debe tener los campos 'alimento' y 'gramos'"
+                    )
+                ingredientes[item["alimento"]] = item["gramos"]
+        elif not isinstance(ingredientes, dict):
+            raise DatosRecetaError("'ingredientes' debe ser un objeto o una lista")
+
+        return cls(
+            d["nombre"],
+            ingredientes,
+            d.get("porcion", 100),
+            d.get("porciones_envase", 1),
+            d.get("tipo", "Sólido"),
+            d.get("descripcion_porcion", ""),
+        )
+
+
+# ----------------------------------------------------------
+# LECTURA DE RECETAS
+# ----------------------------------------------------------
+# Columnas obligatorias del CSV
+COLUMNAS_CSV = ("receta", "alimento", "gramos")
+
+
+def leer_recetas(ruta):
+    """
+    Genera las recetas de un .csv (una fila por ingrediente) o .json.
+    Un archivo mal formado levanta DatosRecetaError con la fila (o
+    receta) y el campo con problemas.
+    """
+    ruta = Path(ruta)
+    if ruta.suffix.lower() == ".json":
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                datos = json.load(f)
+        except ValueError as e:
+            raise DatosRecetaError(f"{ruta.name}: no es un JSON válido ({e})") from None
+        if not isinstance(datos, list):
+            raise DatosRecetaError(f"{ruta.name}: se esperaba una lista de recetas")
+        for n, d in enumerate(datos, start=1):
+            try:
+                yield Receta.desde_dict(d)
+            except DatosRecetaError as e:
+                raise DatosRecetaError(f"{ruta.name}, receta {n}: {e}") from None
+        return
+
+    recetas = {}
+    try:
+        with open(ruta, newline="", encoding="utf-8-sig") as f:
+            lector = csv.DictReader(f)
+            faltan = [c for c in COLUMNAS_CSV if c not in (lector.fieldnames or ())]
+            if faltan:
+                raise DatosRecetaError(f"{ruta.name}: faltan las columnas {', '.join(faltan)}")
+            for fila in lector:
+                try:
+                    _agregar_fila(recetas, fila)
+                except DatosRecetaError as e:
+                    raise DatosRecetaError(f"{ruta.name}, fila {lector.line_num}: {e}") from None
+    except UnicodeDecodeError:
+        raise DatosRecetaError(f"{ruta.name}: el archivo no está en UTF-8") from None
+    yield from recetas.values()
+
+
+def _agregar_fila(recetas, fila):
+    """Suma una fila del CSV (un ingrediente) a su receta."""
+    nombre = (fila["receta"] or "").strip()
+    alimento = (fila["alimento"] or "").strip()
+    if not nombre:
+        raise DatosRecetaError("'receta' está vacío")
+    if not alimento:
+        raise DatosRecetaError("'alimento' está vacío")
+    gramos = _numero(fila["gramos"], "gramos")
+
+    if nombre not in recetas:
+        recetas[nombre] = Receta(
+            nombre,
+            {},
+            fila.get("porcion") or 100,
+            fila.get("porciones_envase") or 1,
+            fila.get("tipo") or "Sólido",
+            fila.get("descripcion_porcion") or "",
+        )
+    receta = recetas[nombre]
+    receta.ingredientes[alimento] = receta.ingredientes.get(alimento, 0.0) + gramos
+
+
+# ----------------------------------------------------------
+# CÁLCULO DE UNA RECETA
+# ----------------------------------------------------------
+def resolver_alimento(cat, nombre: str) -> str:
+    """Nombre del catálogo para `nombre` (exacto, o igual sin tildes/mayúsculas)."""
+    if nombre in cat.matriz.fila_por_nombre:
+        return nombre
+    # La mejor coincidencia de la búsqueda, si es la exacta
+    nombre_norm = normalizar(nombre)
+    for fila in buscar_alimento(cat, nombre):
+        if cat.df["Alimento_normalizado"].iat[fila] == nombre_norm:
+            return cat.df["Alimento"].iat[fila]
+    raise RecetaError(f"Alimento no encontrado en el catálogo: {nombre}")
+
+
+def calcular_receta(cat, receta: Receta):
+    """ResultadoReceta de una receta con nombres resueltos contra el catálogo."""
+    cantidades = {}
+    for alimento, gramos in receta.ingredientes.items():
+        nombre = resolver_alimento(cat, alimento)
+        cantidades[nombre] = cantidades.get(nombre, 0.0) + gramos
+
+    resultado = cat.matriz.calcular(cantidades, receta.porcion)
+    if resultado.peso_total <= 0:
+        raise RecetaError("La receta no tiene cantidades mayores a 0.")
+    return resultado
+
+
+def procesar_receta(cat, receta: Receta, incluir_desglose_grasas=False,
+                    incluir_fibra=False, incluir_micros=False, png=True, vectorial=False):
+    """Nutrientes, sellos y etiquetas de una receta (mismo camino que la app)."""
+    resultado = calcular_receta(cat, receta)
+
+    datos_porcion = resultado.como_dict(resultado.por_porcion, 2)
+    datos_100 = resultado.como_dict(resultado.por_100)
+    texto_porcion = etiquetas.texto_porcion(receta.descripcion_porcion, receta.porcion)
+
+    salida = {
+        "nombre": receta.nombre,
+        "peso_total": resultado.peso_total,
+        "por_100": datos_100,
+        "por_porcion": datos_porcion,
+        "sellos": calcular_sellos(datos_100, receta.tipo),
+        "html": etiquetas.etiqueta_html(
+            valores_100=datos_100,
+            porcion=receta.porcion,
+            porciones_envase=receta.porciones_envase,
+            texto_porcion=texto_porcion,
+            incluir_desglose_grasas=incluir_desglose_grasas,
+            incluir_fibra=incluir_fibra,
+            incluir_micros=incluir_micros,
+        ),
+    }
+    if png:
+        salida["png"] = etiquetas.etiqueta_png_bytes(
+            receta.nombre,
+            valores_100=datos_100,
+            valores_porcion=datos_porcion,
+            porcion=receta.porcion,
+            porciones_envase=receta.porciones_envase,
+            texto_porcion=texto_porcion,
+            incluir_fibra=incluir_fibra,
+            incluir_trans=incluir_desglose_grasas,
+        )
+    if vectorial:
+        etiqueta = EtiquetaVectorial(
+            datos_100, receta.porcion, receta.porciones_envase, texto_porcion,
+            incluir_desglose_grasas, incluir_fibra, incluir_micros,
+        )
+        salida["svg"] = documento_svg(etiqueta)
+        salida["pdf"] = documento_pdf([pagina_pdf(etiqueta)])
+    return salida
+
+
+def _iniciar_worker():
+    global _CATALOGO
+    # Con fork el worker ya trae el catálogo del proceso principal
+    if _CATALOGO is None:
+        _CATALOGO = catalogo.obtener()
+
+
+def _procesar_bloque(bloque, procesar, opciones, cat=None):
+    if cat is None:
+        cat = _CATALOGO
+    resultados = []
+    for i, receta in bloque:
+        try:
+            resultados.append((i, procesar(cat, receta, **opciones)))
+        except ValueError as e:
+            resultados.append((i, {"nombre": receta.nombre, "error": str(e)}))
+    return resultados
+
+
+def _bloques(recetas):
+    numeradas = enumerate(recetas)
+    while True:
+        bloque = list(islice(numeradas, _RECETAS_POR_TAREA))
+        if not bloque:
+            return
+        yield bloque
+
+
+def procesar_lote(recetas, workers=None, procesar=procesar_receta, cat=None, **opciones):
+    """
+    Genera (posición, resultado) por receta, en orden, a medida que se
+    calculan. Sólo hay unas pocas tareas en vuelo por worker, así que la
+    memoria no crece con el tamaño del lote. Con workers=1 todo corre en
+    el proceso actual.
+
+    procesar(cat, receta, **opciones) es lo que corre en cada worker (por
+    defecto procesar_receta); debe ser una función de nivel de módulo.
+    `cat` es el catálogo contra el que se resuelven los alimentos (la app
+    pasa el suyo); por defecto, catalogo.obtener().
+    """
+    # El proceso principal carga (y si hace falta regenera) el snapshot una
+    # vez; con fork los workers heredan el catálogo ya construido.
+    if cat is None:
+        cat = catalogo.obtener()
+
+    if workers == 1:
+        for bloque in _bloques(recetas):
+            yield from _procesar_bloque(bloque, procesar, opciones, cat)
+        return
+
+    global _CATALOGO
+    _CATALOGO = cat
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker) as pool:
+        pendientes = deque()
+        for bloque in _bloques(recetas):
+            pendientes.append(pool.submit(_procesar_bloque, bloque, procesar, opciones))
+            if len(pendientes) >= workers * _TAREAS_POR_WORKER:
+                yield from pendientes.popleft().result()
+        while pendientes:
+            yield from pendientes.popleft().result()
+
+
+# ----------------------------------------------------------
+# ESCRITURA DE RESULTADOS
+# ----------------------------------------------------------
+def nombre_archivo(i: int, nombre: str) -> str:
+    """Nombre de archivo seguro y único para la receta número i."""
+    limpio = re.sub(r"[^\w.-]+", "_", normalizar(nombre)).strip("_") or "receta"
+    return f"{i:05d}_{limpio[:60]}"
+
+
+class _SalidaCarpeta:
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.ruta.mkdir(parents=True, exist_ok=True)
+        self.resumen = open(self.ruta / "resultados.jsonl", "w", encoding="utf-8")
+
+    def escribir(self, nombre, datos: bytes):
+        (self.ruta / nombre).write_bytes(datos)
+
+    def cerrar(self):
+        self.resumen.close()
+
+
+class _SalidaZip:
+    def __init__(self, ruta):
+        self.zip = zipfile.ZipFile(ruta, "w", zipfile.ZIP_DEFLATED)
+        # El ZIP no admite dos entradas abiertas a la vez: el resumen se
+        # acumula en un temporal (en disco si crece) y se agrega al final
+        self.resumen = tempfile.SpooledTemporaryFile(max_size=1 << 20, mode="w+", encoding="utf-8")
+
+    def escribir(self, nombre, datos: bytes):
+        # Los PNG ya vienen comprimidos
+        tipo = zipfile.ZIP_STORED if nombre.endswith(".png") else zipfile.ZIP_DEFLATED
+        self.zip.writestr(nombre, datos, compress_type=tipo)
+
+    def cerrar(self):
+        self.resumen.seek(0)
+        with self.zip.open("resultados.jsonl", "w") as f:
+            for linea in self.resumen:
+                f.write(linea.encode("utf-8"))
+        self.resumen.close()
+        self.zip.close()
+
+
+def escribir_resultados(resultados, destino):
+    """
+    Escribe cada resultado apenas llega: <n>_<receta>.html / .png
+    (/ .svg / .pdf si se pidieron) y una
+    línea en resultados.jsonl (nutrientes, sellos o error).
+    Devuelve (recetas ok, recetas con error).
+    """
+    destino = str(destino)
+    salida = _SalidaZip(destino) if destino.lower().endswith(".zip") else _SalidaCarpeta(destino)
+
+    ok = errores = 0
+    try:
+        for i, r in resultados:
+            base = nombre_archivo(i, r["nombre"])
+            if "error" in r:
+                errores += 1
+            else:
+                ok += 1
+                salida.escribir(f"{base}.html", r.pop("html").encode("utf-8"))
+                if "png" in r:
+                    salida.escribir(f"{base}.png", r.pop("png"))
+                if "svg" in r:
+                    salida.escribir(f"{base}.svg", r.pop("svg").encode("utf-8"))
+                    salida.escribir(f"{base}.pdf", r.pop("pdf"))
+            r["archivo"] = base
+            salida.resumen.write(json.dumps(r, ensure_ascii=False) + "\n")
+    finally:
+        salida.cerrar()
+
+    return ok, errores
+
+
+# ----------------------------------------------------------
+# LÍNEA DE COMANDOS
+# ----------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m etiquetado.lote",
+        description="Genera etiquetas nutricionales y sellos para un lote de recetas.",
+    )
+    parser.add_argument("recetas", help="archivo .csv o .json con las recetas")
+    parser.add_argument("-o", "--salida", required=True, help="carpeta de salida o archivo .zip")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--sin-png", action="store_true", help="no generar las etiquetas PNG")
+    parser.add_argument("--vectorial", action="store_true",
+                        help="generar también etiquetas SVG y PDF (para imprenta)")
+    parser.add_argument("--desglose-grasas", action="store_true")
+    parser.add_argument("--fibra", action="store_true")
+    parser.add_argument("--micros", action="store_true")
+    args = parser.parse_args(argv)
+
+    resultados = procesar_lote(
+        leer_recetas(args.recetas),
+        workers=args.workers,
+        incluir_desglose_grasas=args.desglose_grasas,
+        incluir_fibra=args.fibra,
+        incluir_micros=args.micros,
+        png=not args.sin_png,
+        vectorial=args.vectorial,
+    )
+    try:
+        ok, errores = escribir_resultados(resultados, args.salida)
+    except DatosRecetaError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(f"{ok} recetas etiquetadas, {errores} con errores -> {args.salida}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Tiempos por etapa de cada rerun de la app y su resumen por proceso.
+
+Cada rerun (y cada corrida de un fragmento) arma un Tramos y envuelve sus
+etapas (carga del catálogo, búsqueda, receta, HTML, PNG, sellos...) en
+`with tramos("etapa"):`. Las duraciones quedan en el Tramos (para el
+panel de depuración) y se suman a las Metricas del proceso, que guardan
+las últimas muestras de cada etapa para calcular p50/p95/p99.
+
+Si la variable de entorno ETIQUETADO_METRICAS apunta a un archivo, el
+resumen se escribe ahí cada cierto tiempo: en JSON si termina en .json y
+si no en formato de texto de Prometheus (sirve para el textfile
+collector de node_exporter).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# Muestras recientes por etapa con que se calculan los percentiles
+_VENTANA = 2048
+
+# Cuantiles que se reportan
+CUANTILES = (0.5, 0.95, 0.99)
+
+# Segundos mínimos entre escrituras del archivo de métricas
+_INTERVALO_ESCRITURA_S = 15
+
+_METRICA = "etiquetado_etapa_segundos"
+
+
+def _cuantil(ordenadas, q: float) -> float:
+    """Cuantil por rango más cercano de una lista ya ordenada."""
+    return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))]
+
+
+class Metricas:
+    """Duraciones por etapa acumuladas en el proceso (compartidas entre sesiones)."""
+
+    def __init__(self, destino=None):
+        self.destino = Path(destino) if destino else None
+        self._lock = threading.Lock()
+        self._muestras = {}
+        self._cuentas = {}
+        self._sumas = {}
+        self._ultima_escritura = 0.0
+
+    def registrar(self, etapa: str, segundos: float):
+        with self._lock:
+            if etapa not in self._muestras:
+                self._muestras[etapa] = deque(maxlen=_VENTANA)
+                self._cuentas[etapa] = 0
+                self._sumas[etapa] = 0.0
+            self._muestras[etapa].append(segundos)
+            self._cuentas[etapa] += 1
+            self._sumas[etapa] += segundos
+
+    def resumen(self):
+        """{etapa: {"cuenta", "suma", "p50", "p95", "p99"}} en segundos."""
+        with self._lock:
+            copia = {e: sorted(m) for e, m in self._muestras.items()}
+            cuentas = dict(self._cuentas)
+            sumas = dict(self._sumas)
+
+        resumen = {}
+        for etapa, ordenadas in copia.items():
+            fila = {"cuenta": cuentas[etapa], "suma": sumas[etapa]}
+            for q in CUANTILES:
+                fila[f"p{round(q * 100)}"] = _cuantil(ordenadas, q)
+            resumen[etapa] = fila
+        return resumen
+
+    def prometheus(self) -> str:
+        """Resumen en formato de texto de Prometheus (tipo summary)."""
+        lineas = [
+            f"# HELP {_METRICA} Duración de las etapas de un rerun de la app.",
+            f"# TYPE {_METRICA} summary",
+        ]
+        for etapa, fila in sorted(self.resumen().items()):
+            for q in CUANTILES:
+                lineas.append(
+                    f'{_METRICA}{{etapa="{etapa}",quantile="{q}"}} {fila[f"p{round(q * 100)}"]:.6f}'
+                )
+            lineas.append(f'{_METRICA}_sum{{etapa="{etapa}"}} {fila["suma"]:.6f}')
+            lineas.append(f'{_METRICA}_count{{etapa="{etapa}"}} {fila["cuenta"]}')
+        return "\n".join(lineas) + "\n"
+
+    def json(self) -> str:
+        return json.dumps({"pid": os.getpid(), "etapas": self.resumen()}, indent=1)
+
+    def escribir(self, destino=None):
+        """Escribe el resumen de forma atómica (JSON si el archivo es .json)."""
+        destino = Path(destino or self.destino)
+        texto = self.json() if destino.suffix == ".json" else self.prometheus()
+        tmp = destino.with_name(destino.name + ".tmp")
+        tmp.write_text(texto, encoding="utf-8")
+        os.replace(tmp, destino)
+
+    def escribir_si_corresponde(self):
+        """Escribe en self.destino si pasó _INTERVALO_ESCRITURA_S desde la última vez."""
+        if self.destino is None:
+            return
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._ultima_escritura < _INTERVALO_ESCRITURA_S:
+                return
+            self._ultima_escritura = ahora
+        try:
+            self.escribir()
+        except OSError:
+            # Las métricas nunca deben botar la app
+            pass
+
+
+_metricas = None
+_metricas_lock = threading.Lock()
+
+
+def obtener() -> Metricas:
+    """Métricas del proceso (destino según ETIQUETADO_METRICAS)."""
+    global _metricas
+    with _metricas_lock:
+        if _metricas is None:
+            _metricas = Metricas(os.environ.get("ETIQUETADO_METRICAS"))
+        return _metricas
+
+
+class Tramos:
+    """
+    Duraciones de las etapas de un rerun (o de un fragmento, con su nombre);
+    también se suman a las Metricas.
+    """
+
+    def __init__(self, metricas: Metricas = None, nombre: str = "rerun"):
+        self.metricas = metricas or obtener()
+        self.nombre = nombre
+        self.inicio = time.perf_counter()
+        self.duraciones = []
+        self.total = None
+
+    @contextmanager
+    def __call__(self, etapa: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t
+            self.duraciones.append((etapa, dt))
+            self.metricas.registrar(etapa, dt)
+
+    @property
+    def abierto(self) -> bool:
+        return self.total is None
+
+    def cerrar(self) -> float:
+        """Registra el total con su nombre y, si toca, escribe el archivo de métricas."""
+        self.total = time.perf_counter() - self.inicio
+        self.duraciones.append((self.nombre, self.total))
+        self.metricas.registrar(self.nombre, self.total)
+        self.metricas.escribir_si_corresponde()
+        return self.total
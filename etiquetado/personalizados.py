@@ -0,0 +1,220 @@
+"""
+Alimentos personalizados en una base SQLite embebida.
+
+Antes cada alta, edición o borrado leía y reescribía el CSV completo; acá
+cada operación es una sola sentencia sobre una fila (upsert por nombre
+normalizado, que tiene índice único). La base va en modo WAL: las
+lecturas no bloquean a las escrituras y varias sesiones pueden escribir a
+la vez (SQLite serializa las transacciones; busy_timeout espera el turno).
+
+Los valores nutricionales se guardan como JSON {columna: valor}; las
+columnas que falten se completan con 0 al armar el catálogo, igual que
+con el CSV.
+
+Importación única del CSV antiguo (también se hace sola al primer uso
+desde etiquetado.catalogo):
+
+    python -m etiquetado.personalizados alimentos_personalizados.csv
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+from .texto import normalizar
+
+# Espera máxima (ms) por el candado de escritura de otra sesión
+_ESPERA_MS = 5000
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS alimentos (
+    id INTEGER PRIMARY KEY,
+    alimento TEXT NOT NULL,
+    alimento_normalizado TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS alimentos_normalizado
+    ON alimentos (alimento_normalizado);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+# Columnas que no van dentro de datos
+_COLUMNAS_PROPIAS = ("Alimento", "Alimento_normalizado")
+
+
+class PersonalizadoError(ValueError):
+    """Operación inválida sobre un alimento personalizado."""
+
+
+def _datos(valores) -> str:
+    return json.dumps(
+        {k: v for k, v in valores.items() if k not in _COLUMNAS_PROPIAS},
+        ensure_ascii=False,
+    )
+
+
+class AlmacenPersonalizados:
+    """Tabla de alimentos personalizados; una conexión corta por operación."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with self._conexion() as con:
+            # WAL queda registrado en el archivo; basta pedirlo una vez
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_ESQUEMA)
+
+    @contextmanager
+    def _conexion(self):
+        with closing(sqlite3.connect(self.path, timeout=_ESPERA_MS / 1000)) as con:
+            con.execute(f"PRAGMA busy_timeout={_ESPERA_MS}")
+            con.execute("PRAGMA synchronous=NORMAL")
+            with con:
+                yield con
+
+    # ----------------------------------------------------------
+    # LECTURA
+    # ----------------------------------------------------------
+    def filas(self):
+        """(alimento, alimento_normalizado, {columna: valor}) en orden de alta."""
+        with self._conexion() as con:
+            cursor = con.execute(
+                "SELECT alimento, alimento_normalizado, datos FROM alimentos ORDER BY id"
+            )
+            return [(a, n, json.loads(d)) for a, n, d in cursor]
+
+    def __len__(self):
+        with self._conexion() as con:
+            return con.execute("SELECT COUNT(*) FROM alimentos").fetchone()[0]
+
+    # ----------------------------------------------------------
+    # ESCRITURA
+    # ----------------------------------------------------------
+    def guardar(self, nombre: str, valores) -> None:
+        """Agrega el alimento o, si ya existe uno con ese nombre, lo reemplaza."""
+        nombre = nombre.strip()
+        if not nombre:
+            raise PersonalizadoError("El alimento necesita un nombre.")
+        with self._conexion() as con:
+            con.execute(
+                """
+                INSERT INTO alimentos (alimento, alimento_normalizado, datos, actualizado)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (alimento_normalizado) DO UPDATE SET
+                    alimento = excluded.alimento,
+                    datos = excluded.datos,
+                    actualizado = excluded.actualizado
+                """,
+                (nombre, normalizar(nombre), _datos(valores), time.time()),
+            )
+
+    def editar(self, nombre: str, nuevo_nombre: str, valores) -> None:
+        """
+        Renombra el alimento y actualiza solo las columnas de `valores`
+        (el resto de sus datos se conserva).
+        """
+        nuevo_nombre = nuevo_nombre.strip()
+        if not nuevo_nombre:
+            raise PersonalizadoError("El alimento necesita un nombre.")
+        with self._conexion() as con:
+            fila = con.execute(
+                "SELECT id, datos FROM alimentos WHERE alimento_normalizado = ?",
+                (normalizar(nombre),),
+            ).fetchone()
+            if fila is None:
+                raise PersonalizadoError(f"No existe el alimento personalizado: {nombre}")
+            datos = json.loads(fila[1])
+            datos.update(valores)
+            try:
+                con.execute(
+                    """
+                    UPDATE alimentos
+                    SET alimento = ?, alimento_normalizado = ?, datos = ?, actualizado = ?
+                    WHERE id = ?
+                    """,
+                    (nuevo_nombre, normalizar(nuevo_nombre), _datos(datos), time.time(), fila[0]),
+                )
+            except sqlite3.IntegrityError:
+                raise PersonalizadoError(
+                    f"Ya existe otro alimento personalizado llamado {nuevo_nombre}"
+                ) from None
+
+    def eliminar(self, nombre: str) -> bool:
+        """Borra el alimento; False si no existía."""
+        with self._conexion() as con:
+            cursor = con.execute(
+                "DELETE FROM alimentos WHERE alimento_normalizado = ?", (normalizar(nombre),)
+            )
+            return cursor.rowcount > 0
+
+    # ----------------------------------------------------------
+    # IMPORTACIÓN DEL CSV ANTIGUO
+    # ----------------------------------------------------------
+    def importar_csv(self, csv_path) -> int:
+        """
+        Copia las filas del CSV antiguo a la base, una sola vez (queda
+        marcado en la tabla meta). Devuelve cuántas filas se importaron.
+        """
+        csv_path = Path(csv_path)
+        with self._conexion() as con:
+            # Tomamos el candado de escritura antes de revisar la marca, para
+            # que dos procesos que arrancan juntos no importen dos veces
+            con.execute("BEGIN IMMEDIATE")
+            if con.execute("SELECT 1 FROM meta WHERE clave = 'csv_importado'").fetchone():
+                return 0
+            if not csv_path.exists():
+                return 0
+
+            import pandas as pd
+
+            dfp = pd.read_csv(csv_path)
+            dfp = dfp[dfp["Alimento"].notna()]
+            ahora = time.time()
+            filas = []
+            for valores in dfp.to_dict("records"):
+                nombre = str(valores["Alimento"]).strip()
+                if nombre:
+                    filas.append((nombre, normalizar(nombre), _datos(valores), ahora))
+
+            # Mismo criterio que antes: ante nombres repetidos manda el primero
+            cursor = con.executemany(
+                """
+                INSERT INTO alimentos (alimento, alimento_normalizado, datos, actualizado)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (alimento_normalizado) DO NOTHING
+                """,
+                filas,
+            )
+            con.execute(
+                "INSERT INTO meta (clave, valor) VALUES ('csv_importado', ?)",
+                (str(csv_path),),
+            )
+            # Sin contar los repetidos que se descartaron
+            return cursor.rowcount
+
+
+def main(argv=None):
+    from .catalogo import PERSONALIZADOS_DB
+
+    parser = argparse.ArgumentParser(
+        prog="python -m etiquetado.personalizados",
+        description="Importa (una vez) el CSV antiguo de alimentos personalizados a SQLite.",
+    )
+    parser.add_argument("csv", help="alimentos_personalizados.csv")
+    parser.add_argument("--base", default=str(PERSONALIZADOS_DB), help="archivo SQLite de destino")
+    args = parser.parse_args(argv)
+
+    almacen = AlmacenPersonalizados(args.base)
+    importadas = almacen.importar_csv(args.csv)
+    print(f"{importadas} alimentos importados; {len(almacen)} en {args.base}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Pliegos de impresión: las etiquetas de una línea de productos (con sus
+sellos) ordenadas en una grilla, en un solo PDF vectorial.
+
+Cada tesela (etiqueta + sellos de una receta) se calcula y diagrama en
+un pool de procesos (ver lote.procesar_lote) y vuelve como operadores
+PDF ya listos. El proceso principal las va ubicando fila por fila y
+escribe cada página apenas se llena: en memoria sólo hay una página.
+Los octógonos se incrustan una sola vez por documento.
+
+Uso (mismo formato de recetas que etiquetado.lote):
+
+    python -m etiquetado.pliegos recetas.csv -o pliego.pdf --columnas 3
+"""
+import argparse
+import os
+import sys
+
+from . import etiquetas, recursos
+from .lote import DatosRecetaError, calcular_receta, leer_recetas, procesar_lote
+from .sellos import calcular_sellos
+from .vectorial import ANCHO, EscritorPDF, EtiquetaVectorial, operadores_pdf
+
+# Tamaños de página (ancho, alto) en mm
+TAMANOS_PAGINA = {
+    "A4": (210.0, 297.0),
+    "A3": (297.0, 420.0),
+    "Carta": (215.9, 279.4),
+    "Oficio": (215.9, 330.2),
+}
+
+# Nombre sobre la etiqueta y sellos bajo ella, en unidades de diseño
+_ALTO_NOMBRE = 18.0
+_LADO_SELLO = 64.0
+_SEPARACION_SELLOS = 8.0
+
+
+def _mm_a_pt(mm: float) -> float:
+    return mm * 72 / 25.4
+
+
+def _nombre_imagen(sello: str) -> str:
+    return "Sello" + "".join(c for c in sello.title() if c.isalnum() and c.isascii())
+
+
+# ----------------------------------------------------------
+# TESELA (corre en los workers)
+# ----------------------------------------------------------
+def tesela(cat, receta, incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False):
+    """
+    Etiqueta vectorial y sellos de una receta como operadores PDF en
+    unidades de diseño (y hacia abajo), más su alto.
+    """
+    resultado = calcular_receta(cat, receta)
+    datos_100 = resultado.como_dict(resultado.por_100)
+    sellos = calcular_sellos(datos_100, receta.tipo)
+
+    etiqueta = EtiquetaVectorial(
+        datos_100, receta.porcion, receta.porciones_envase,
+        etiquetas.texto_porcion(receta.descripcion_porcion, receta.porcion),
+        incluir_desglose_grasas, incluir_fibra, incluir_micros,
+    )
+
+    # Nombre del producto sobre la etiqueta, para identificar cada SKU
+    partes = [
+        operadores_pdf([("texto", 0, 12, receta.nombre, 12, True, "start", "#000000")]),
+        f"q 1 0 0 1 0 {_ALTO_NOMBRE:g} cm".encode(),
+        etiqueta.pdf_cuerpo(),
+        b"Q",
+    ]
+    alto = _ALTO_NOMBRE + etiqueta.alto
+
+    if sellos:
+        y = alto + _SEPARACION_SELLOS
+        for i, sello in enumerate(sellos):
+            x = i * (_LADO_SELLO + _SEPARACION_SELLOS)
+            # Las imágenes ocupan el cuadrado unitario con y hacia arriba
+            partes.append(
+                f"q {_LADO_SELLO:g} 0 0 {-_LADO_SELLO:g} {x:g} {y + _LADO_SELLO:g} cm "
+                f"/{_nombre_imagen(sello)} Do Q".encode()
+            )
+        alto = y + _LADO_SELLO
+
+    return {
+        "nombre": receta.nombre,
+        "sellos": sellos,
+        "alto": alto,
+        "contenido": b"\n".join(partes),
+    }
+
+
+# ----------------------------------------------------------
+# COMPOSICIÓN DE PÁGINAS
+# ----------------------------------------------------------
+class _Pagina:
+    """Página en construcción (coordenadas en puntos, y desde arriba)."""
+
+    def __init__(self, alto: float, margen: float):
+        self.partes = []
+        self.y = margen
+        self.alto = alto
+        self.margen = margen
+
+    def cabe(self, alto_fila: float) -> bool:
+        return not self.partes or self.y + alto_fila <= self.alto - self.margen
+
+
+def componer_pliegos(teselas, archivo, columnas=3, pagina="A4", margen_mm=10.0,
+                     separacion_mm=5.0):
+    """
+    Escribe en `archivo` (binario) el PDF con las teselas en una grilla
+    de `columnas` columnas. `teselas` son pares (posición, resultado) de
+    procesar_lote. Devuelve (teselas ubicadas, errores, páginas).
+    """
+    ancho_mm, alto_mm = TAMANOS_PAGINA[pagina]
+    ancho_pt, alto_pt = _mm_a_pt(ancho_mm), _mm_a_pt(alto_mm)
+    margen, separacion = _mm_a_pt(margen_mm), _mm_a_pt(separacion_mm)
+    escala = (ancho_pt - 2 * margen - (columnas - 1) * separacion) / columnas / ANCHO
+
+    escritor = EscritorPDF(archivo)
+    for sello, png in recursos.obtener().sellos.items():
+        escritor.agregar_imagen(_nombre_imagen(sello), png)
+
+    # Diseño con y hacia abajo en toda la página
+    inicio = f"1 0 0 -1 0 {alto_pt:.2f} cm".encode()
+
+    pagina_actual = _Pagina(alto_pt, margen)
+    fila = []
+    ubicadas = 0
+    errores = []
+
+    def cerrar_pagina():
+        escritor.agregar_pagina(b"\n".join([inicio] + pagina_actual.partes), ancho_pt, alto_pt)
+
+    def ubicar_fila():
+        nonlocal pagina_actual
+        alto_fila = max(t["alto"] for t in fila) * escala
+        if not pagina_actual.cabe(alto_fila):
+            cerrar_pagina()
+            pagina_actual = _Pagina(alto_pt, margen)
+        for col, t in enumerate(fila):
+            x = margen + col * (ANCHO * escala + separacion)
+            pagina_actual.partes.append(
+                f"q {escala:.6f} 0 0 {escala:.6f} {x:.2f} {pagina_actual.y:.2f} cm\n".encode()
+                + t["contenido"] + b"\nQ"
+            )
+        pagina_actual.y += alto_fila + separacion
+        fila.clear()
+
+    for _, t in teselas:
+        if "error" in t:
+            errores.append(t)
+            continue
+        fila.append(t)
+        ubicadas += 1
+        if len(fila) == columnas:
+            ubicar_fila()
+    if fila:
+        ubicar_fila()
+    if pagina_actual.partes:
+        cerrar_pagina()
+
+    escritor.cerrar()
+    return ubicadas, errores, escritor.paginas
+
+
+def pliego_pdf(recetas, archivo, columnas=3, pagina="A4", workers=None, cat=None, **opciones):
+    """
+    Calcula las teselas en paralelo y las compone en `archivo` (`cat` como
+    en lote.procesar_lote).
+    """
+    teselas = procesar_lote(recetas, workers=workers, procesar=tesela, cat=cat, **opciones)
+    return componer_pliegos(teselas, archivo, columnas=columnas, pagina=pagina)
+
+
+# ----------------------------------------------------------
+# LÍNEA DE COMANDOS
+# ----------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m etiquetado.pliegos",
+        description="Arma un pliego PDF con las etiquetas y sellos de un lote de recetas.",
+    )
+    parser.add_argument("recetas", help="archivo .csv o .json con las recetas")
+    parser.add_argument("-o", "--salida", required=True, help="archivo .pdf de salida")
+    parser.add_argument("--columnas", type=int, default=3)
+    parser.add_argument("--pagina", choices=sorted(TAMANOS_PAGINA), default="A4")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--desglose-grasas", action="store_true")
+    parser.add_argument("--fibra", action="store_true")
+    parser.add_argument("--micros", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.salida, "wb") as f:
+            ubicadas, errores, paginas = pliego_pdf(
+                leer_recetas(args.recetas),
+                f,
+                columnas=args.columnas,
+                pagina=args.pagina,
+                workers=args.workers,
+                incluir_desglose_grasas=args.desglose_grasas,
+                incluir_fibra=args.fibra,
+                incluir_micros=args.micros,
+            )
+    except DatosRecetaError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    for e in errores:
+        print(f"{e['nombre']}: {e['error']}", file=sys.stderr)
+    print(f"{ubicadas} etiquetas en {paginas} páginas, {len(errores)} con errores -> {args.salida}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
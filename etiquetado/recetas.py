@@ -0,0 +1,192 @@
+"""
+Motor de cálculo de preparaciones (recetas).
+
+El catálogo se precompila en una matriz densa alimentos x nutrientes con
+valores por gramo (cada fila dividida por su Cantidad(g/ml)), más un
+índice nombre -> fila. Una receta es entonces un vector disperso de
+cantidades y sus totales salen de un solo producto matriz-vector.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columna con la cantidad base a la que se refieren los valores de cada fila
+COLUMNA_CANTIDAD = "Cantidad(g/ml)"
+
+# Ajustes incrementales tras los cuales los totales se recalculan desde
+# cero (para que no se acumule error de redondeo)
+_AJUSTES_POR_RECALCULO = 256
+
+# Resultados completos memoizados por receta en edición
+_MEMO_RESULTADOS = 64
+
+
+class RecetaError(ValueError):
+    """Receta inválida (alimento inexistente o sin cantidades)."""
+
+
+class MatrizNutrientes:
+    """Valores por gramo de todas las columnas numéricas del catálogo."""
+
+    def __init__(self, df: pd.DataFrame):
+        # Columnas numéricas (macro + micro)
+        self.columnas = list(df.select_dtypes(include="number").columns)
+
+        from .catalogo import a_float64
+
+        valores = a_float64(df[self.columnas].to_numpy(dtype=np.float32, na_value=np.nan))
+        valores = np.nan_to_num(valores, nan=0.0)
+
+        # Cantidad base de cada fila; si falta o es 0 se asume 100 g/ml
+        if COLUMNA_CANTIDAD in df.columns:
+            import pandas as pd
+
+            base = pd.to_numeric(df[COLUMNA_CANTIDAD], errors="coerce").to_numpy(dtype=np.float64)
+            base = np.where(np.isnan(base) | (base == 0), 100.0, base)
+        else:
+            base = np.full(len(df), 100.0)
+
+        self.por_gramo = valores / base[:, None]
+        self.por_gramo.setflags(write=False)
+
+        # Nombre -> primera fila con ese nombre (igual que df[...].iloc[0])
+        self.fila_por_nombre = {}
+        for fila, nombre in enumerate(df["Alimento"].astype(str)):
+            self.fila_por_nombre.setdefault(nombre, fila)
+
+    def _vector(self, cantidades):
+        """(filas, gramos) de una receta {alimento: g/ml}, sin cantidades <= 0."""
+        filas = []
+        gramos = []
+        for alimento, cantidad in cantidades.items():
+            if cantidad is None or cantidad <= 0:
+                continue
+            fila = self.fila_por_nombre.get(alimento)
+            if fila is None:
+                raise RecetaError(f"Alimento no encontrado en el catálogo: {alimento}")
+            filas.append(fila)
+            gramos.append(float(cantidad))
+        return np.asarray(filas, dtype=np.intp), np.asarray(gramos, dtype=np.float64)
+
+    def totales(self, cantidades) -> np.ndarray:
+        """Totales de la receta para cada columna (un producto matriz-vector)."""
+        filas, gramos = self._vector(cantidades)
+        return gramos @ self.por_gramo[filas]
+
+    def totales_lote(self, recetas) -> np.ndarray:
+        """Totales de muchas recetas a la vez: matriz recetas x columnas."""
+        todas_filas = []
+        todos_gramos = []
+        receta_de = []
+        for i, cantidades in enumerate(recetas):
+            filas, gramos = self._vector(cantidades)
+            todas_filas.append(filas)
+            todos_gramos.append(gramos)
+            receta_de.append(np.full(len(filas), i, dtype=np.intp))
+
+        resultado = np.zeros((len(todas_filas), len(self.columnas)))
+        if todas_filas:
+            filas = np.concatenate(todas_filas)
+            gramos = np.concatenate(todos_gramos)
+            np.add.at(resultado, np.concatenate(receta_de), gramos[:, None] * self.por_gramo[filas])
+        return resultado
+
+    def calcular(self, cantidades, porcion: float) -> "ResultadoReceta":
+        peso_total = float(sum(c for c in cantidades.values() if c and c > 0))
+        return ResultadoReceta(self.columnas, self.totales(cantidades), peso_total, porcion)
+
+
+class ResultadoReceta:
+    """Totales de una receta y sus valores por 100 g/ml y por porción."""
+
+    def __init__(self, columnas, totales: np.ndarray, peso_total: float, porcion: float):
+        self.columnas = columnas
+        self.peso_total = peso_total
+        self.porcion = porcion
+
+        self.totales = totales
+        if peso_total > 0:
+            self.por_100 = totales * (100.0 / peso_total)
+            self.por_porcion = totales * (porcion / peso_total)
+        else:
+            self.por_100 = np.zeros_like(totales)
+            self.por_porcion = np.zeros_like(totales)
+
+    def como_dict(self, valores: np.ndarray, decimales: int = None):
+        """{columna: valor} para uno de los vectores del resultado."""
+        if decimales is not None:
+            valores = np.round(valores, decimales)
+        return dict(zip(self.columnas, valores.tolist()))
+
+
+class TotalesIncrementales:
+    """
+    Totales de una receta que se va editando (uno por sesión).
+
+    Guarda los gramos vigentes de cada ingrediente y los totales; al
+    recalcular, sólo se suma la diferencia de los ingredientes que
+    cambiaron, se agregaron o se quitaron. Los resultados completos quedan
+    memoizados por (ingredientes, gramos, porción).
+    """
+
+    def __init__(self, matriz: MatrizNutrientes):
+        self.matriz = matriz
+        self.gramos = {}
+        self.totales = np.zeros(len(matriz.columnas))
+        self._ajustes = 0
+        self._memo = OrderedDict()
+
+    def actualizar(self, cantidades) -> np.ndarray:
+        """Lleva los totales a `cantidades` ajustando sólo lo que cambió."""
+        fila_por_nombre = self.matriz.fila_por_nombre
+        anteriores = self.gramos
+        nuevas = {}
+        cambios = {}
+        for alimento, cantidad in cantidades.items():
+            if cantidad is None or cantidad <= 0:
+                continue
+            if alimento not in fila_por_nombre:
+                raise RecetaError(f"Alimento no encontrado en el catálogo: {alimento}")
+            gramos = nuevas[alimento] = float(cantidad)
+            delta = gramos - anteriores.get(alimento, 0.0)
+            if delta:
+                cambios[alimento] = delta
+        for alimento, gramos in anteriores.items():
+            if alimento not in nuevas:
+                cambios[alimento] = -gramos
+
+        self.gramos = nuevas
+        self._ajustes += len(cambios)
+        if not nuevas or self._ajustes >= _AJUSTES_POR_RECALCULO:
+            self.totales = self.matriz.totales(nuevas)
+            self._ajustes = 0
+        elif cambios:
+            filas = [fila_por_nombre[a] for a in cambios]
+            deltas = np.fromiter(cambios.values(), dtype=np.float64, count=len(cambios))
+            self.totales = self.totales + deltas @ self.matriz.por_gramo[filas]
+        return self.totales
+
+    def calcular(self, cantidades, porcion: float) -> ResultadoReceta:
+        """Igual que MatrizNutrientes.calcular, pero incremental y memoizado."""
+        # Una cantidad en 0 y un ingrediente ausente dan claves distintas:
+        # sólo es un fallo del memo, el resultado es el mismo
+        clave = (frozenset(cantidades.items()), porcion)
+        resultado = self._memo.get(clave)
+        if resultado is not None:
+            self._memo.move_to_end(clave)
+            return resultado
+
+        totales = self.actualizar(cantidades)
+        resultado = ResultadoReceta(
+            self.matriz.columnas, totales, float(sum(self.gramos.values())), porcion
+        )
+        self._memo[clave] = resultado
+        if len(self._memo) > _MEMO_RESULTADOS:
+            self._memo.popitem(last=False)
+        return resultado
@@ -0,0 +1,91 @@
+"""
+Recursos estáticos de la app (logo y octógonos de sellos).
+
+Se leen una sola vez por proceso y se guardan ya codificados (bytes PNG,
+base64 del logo) para que todas las sesiones compartan los mismos
+buffers inmutables en vez de abrir los archivos en cada rerun.
+"""
+import base64
+import threading
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+# Carpeta raíz del proyecto (donde viven app.py, el logo y sellos/)
+RAIZ = Path(__file__).resolve().parent.parent
+
+LOGO_PATH = RAIZ / "logonr-300x60.png"
+CARPETA_SELLOS = RAIZ / "sellos"
+
+# Sello (texto de calcular_sellos) -> archivo en sellos/
+ARCHIVOS_SELLOS = {
+    "ALTO EN AZÚCARES": "alto_azucares.png",
+    "ALTO EN CALORÍAS": "alto_calorias.png",
+    "ALTO EN GRASAS SATURADAS": "alto_grasas.png",
+    "ALTO EN SODIO": "alto_sodio.png",
+}
+
+# Separación entre octógonos en la tira de sellos (px)
+_SEPARACION_TIRA = 24
+
+
+class Recursos:
+    """Logo y sellos precargados; no debe modificarse."""
+
+    def __init__(self, logo_path=LOGO_PATH, carpeta_sellos=CARPETA_SELLOS):
+        self.logo_png = Path(logo_path).read_bytes()
+        self.logo_b64 = base64.b64encode(self.logo_png).decode()
+
+        # Sello -> bytes PNG del octógono
+        self.sellos = {
+            sello: (Path(carpeta_sellos) / archivo).read_bytes()
+            for sello, archivo in ARCHIVOS_SELLOS.items()
+        }
+
+    def logo_html(self, ancho: int = 250) -> str:
+        """Logo centrado en HTML con la imagen embebida en base64."""
+        return f"""
+    <div style="text-align:center; margin-top:20px; margin-bottom:10px;">
+        <img src="data:image/png;base64,{self.logo_b64}" width="{ancho}">
+    </div>
+    """
+
+    def tira_sellos(self, sellos) -> bytes:
+        """PNG con los octógonos de `sellos` uno al lado del otro (memoizado)."""
+        return _tira(self, tuple(s for s in sellos if s in self.sellos))
+
+
+@lru_cache(maxsize=16)
+def _tira(recursos: Recursos, sellos: tuple) -> bytes:
+    # Hay sólo 15 combinaciones posibles de sellos: cada tira se arma una vez
+    from PIL import Image
+
+    imagenes = [Image.open(BytesIO(recursos.sellos[s])).convert("RGBA") for s in sellos]
+    if not imagenes:
+        return b""
+
+    alto = max(im.height for im in imagenes)
+    ancho = sum(im.width for im in imagenes) + _SEPARACION_TIRA * (len(imagenes) - 1)
+    tira = Image.new("RGBA", (ancho, alto), (255, 255, 255, 0))
+
+    x = 0
+    for im in imagenes:
+        tira.paste(im, (x, (alto - im.height) // 2), im)
+        x += im.width + _SEPARACION_TIRA
+
+    buf = BytesIO()
+    tira.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+_recursos = None
+_recursos_lock = threading.Lock()
+
+
+def obtener() -> Recursos:
+    """Recursos del proceso, cargados la primera vez que se piden."""
+    global _recursos
+    with _recursos_lock:
+        if _recursos is None:
+            _recursos = Recursos()
+        return _recursos
@@ -0,0 +1,332 @@
+"""
+Benchmarks de carga, búsqueda, recetas y dibujo de etiquetas.
+
+Corre contra el catálogo real y contra catálogos sintéticos de 10 mil,
+100 mil y 1 millón de filas (alimentos reales con descriptores
+agregados al nombre y valores con ruido), y guarda los resultados en
+JSON para poder comparar corridas:
+
+    python -m etiquetado.rendimiento -o base.json
+    python -m etiquetado.rendimiento --filas 10000 -o nuevo.json --comparar base.json
+
+Con --comparar sale con código 1 si algún caso quedó más de --tolerancia
+más lento (mediana) que en la corrida de referencia.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import catalogo
+from .busqueda import buscar_alimento
+from .catalogo import COLUMNA_TIPO, TIPO_NUMERICO
+from .texto import normalizar
+
+FILAS_SINTETICAS = (10_000, 100_000, 1_000_000)
+
+# Cada caso se repite hasta juntar este tiempo (o _MAX_REPETICIONES)
+_TIEMPO_MINIMO_S = 0.5
+_MAX_REPETICIONES = 50
+
+# Tamaño de las muestras de consultas, recetas y filas por catálogo
+_CONSULTAS = 60
+_RECETAS = 200
+_INGREDIENTES = 5
+_FILAS_SELLOS = 1000
+_PERSONALIZADOS = 100
+
+# Descriptores que se agregan a los nombres sintéticos (vocabulario acotado,
+# como el real: los nombres se repiten con variantes, no con códigos)
+_DESCRIPTORES = (
+    "casero", "light", "integral", "natural", "familiar", "organico", "tostado",
+    "cocido", "crudo", "conserva", "congelado", "deshidratado", "reducido",
+    "premium", "artesanal", "picante", "dulce", "salado", "ahumado", "rallado",
+    "entero", "descremado", "fortificado", "granel", "sachet", "vainilla",
+    "chocolate", "frutilla", "limon", "naranja",
+)
+
+
+# ----------------------------------------------------------
+# CATÁLOGOS SINTÉTICOS
+# ----------------------------------------------------------
+def catalogo_sintetico(df_real, filas: int, semilla: int = 0):
+    """`filas` alimentos armados a partir de los reales del catálogo."""
+    import numpy as np
+
+    rng = np.random.default_rng(semilla)
+    alimentos = df_real[df_real[COLUMNA_TIPO] == "alimento"]
+    df = alimentos.iloc[rng.integers(0, len(alimentos), filas)].reset_index(drop=True)
+
+    # Nombre real + dos descriptores
+    d1 = rng.integers(0, len(_DESCRIPTORES), filas)
+    d2 = rng.integers(0, len(_DESCRIPTORES), filas)
+    df["Alimento"] = [
+        f"{nombre} {_DESCRIPTORES[a]} {_DESCRIPTORES[b]}"
+        for nombre, a, b in zip(df["Alimento"], d1, d2)
+    ]
+    df["Alimento_normalizado"] = [normalizar(n) for n in df["Alimento"]]
+
+    # Ruido de ±20% en los nutrientes (la cantidad base queda igual)
+    numericas = [
+        c for c in df.select_dtypes(include="number").columns
+        if c not in ("Columna1", "Fuente", "Cantidad(g/ml)")
+    ]
+    # (mismo float32 que el catálogo real)
+    df[numericas] = (df[numericas] * rng.uniform(0.8, 1.2, (filas, 1))).astype(TIPO_NUMERICO)
+    return df
+
+
+# ----------------------------------------------------------
+# MEDICIÓN
+# ----------------------------------------------------------
+def medir(funcion, por_llamada: int = 1, preparar=None):
+    """
+    Repite funcion() hasta juntar _TIEMPO_MINIMO_S y devuelve las
+    estadísticas en ms, divididas por `por_llamada` (operaciones por
+    llamada, para reportar el costo unitario). Con `preparar`, cada
+    repetición llama funcion(preparar()) y sólo se mide funcion.
+    """
+    tiempos = []
+    total = 0.0
+    while total < _TIEMPO_MINIMO_S and len(tiempos) < _MAX_REPETICIONES:
+        argumentos = () if preparar is None else (preparar(),)
+        t = time.perf_counter()
+        funcion(*argumentos)
+        dt = time.perf_counter() - t
+        tiempos.append(dt * 1000 / por_llamada)
+        total += dt
+
+    tiempos.sort()
+    return {
+        "n": len(tiempos),
+        "min_ms": tiempos[0],
+        "mediana_ms": tiempos[len(tiempos) // 2],
+        "p95_ms": tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+    }
+
+
+def _consultas(df, rng):
+    """Mezcla de consultas: nombre exacto, prefijo, palabra suelta y con error de tipeo."""
+    nombres = df["Alimento_normalizado"].to_numpy()[rng.integers(0, len(df), _CONSULTAS)]
+    consultas = []
+    for i, nombre in enumerate(nombres):
+        palabras = nombre.split() or [nombre]
+        palabra = palabras[i % len(palabras)]
+        tipo = i % 4
+        if tipo == 0:
+            consultas.append(nombre)
+        elif tipo == 1:
+            consultas.append(nombre[:max(3, len(nombre) // 2)])
+        elif tipo == 2:
+            consultas.append(palabra)
+        else:
+            # Una letra cambiada en una palabra de 5 o más letras
+            larga = max(palabras, key=len)
+            j = len(larga) // 2
+            consultas.append(larga[:j] + ("x" if larga[j] != "x" else "z") + larga[j + 1:])
+    return consultas
+
+
+def casos_catalogo(nombre: str, df_base, carpeta: Path, zip_path=None, snapshot_path=None):
+    """Mide los casos que dependen del tamaño del catálogo."""
+    import numpy as np
+
+    from .personalizados import AlmacenPersonalizados
+    from .sellos import TIPOS_PRODUCTO, calcular_sellos
+
+    rng = np.random.default_rng(1)
+    resultados = {}
+
+    # Carga: snapshot Parquet (el sintético se escribe con un ZIP de mentira)
+    if zip_path is None:
+        zip_path = carpeta / f"{nombre}.zip"
+        zip_path.write_bytes(nombre.encode())
+        snapshot_path = carpeta / f"{nombre}.parquet"
+        catalogo.guardar_snapshot(df_base, catalogo.hash_zip(zip_path), snapshot_path)
+    resultados["cargar_excel"] = medir(lambda: catalogo.cargar_excel(zip_path, snapshot_path))
+
+    # Personalizados (base SQLite aparte) + unión con la tabla base
+    base_personal = carpeta / f"{nombre}.db"
+    almacen = AlmacenPersonalizados(base_personal)
+    for i in range(_PERSONALIZADOS):
+        almacen.guardar(f"Personalizado {i}", {"Energía(kcal)": float(i), "Cantidad(g/ml)": 100.0})
+    resultados["construir_catalogo"] = medir(
+        lambda: catalogo.construir_catalogo(df_base, 0, path_personalizados=base_personal)
+    )
+    cat = catalogo.construir_catalogo(df_base, 0, path_personalizados=base_personal)
+
+    # Lo que se arma una vez por generación se mide sobre catálogos nuevos
+    def nuevo():
+        return catalogo.Catalogo(cat.df, cat.df.iloc[:0], 0)
+
+    resultados["indices_busqueda"] = medir(lambda c: c.indice_difuso, preparar=nuevo)
+
+    consultas = _consultas(cat.df, rng)
+    cat.indice_difuso  # índices ya armados, como en la app
+    resultados["buscar_alimento"] = medir(
+        lambda: [buscar_alimento(cat, c) for c in consultas], por_llamada=len(consultas)
+    )
+
+    # Filtro por subcadena de la lista de la preparación y de la tabla completa
+    resultados["indice_subcadenas"] = medir(lambda c: c.indice_opciones, preparar=nuevo)
+    # Índices ya armados, como en la app
+    cat.indice_opciones
+    cat.tabla.filtrar(consultas[0])
+    resultados["filtrar_subcadenas"] = medir(
+        lambda: [cat.indice_opciones.filtrar(c) for c in consultas], por_llamada=len(consultas)
+    )
+    resultados["tabla_filtrar"] = medir(
+        lambda: [cat.tabla.filtrar(c) for c in consultas], por_llamada=len(consultas)
+    )
+
+    # float32 del catálogo -> float64 de los cálculos (base de matriz y sellos)
+    bloque = cat.df.select_dtypes(include="float32").to_numpy()
+    resultados["a_float64"] = medir(lambda: catalogo.a_float64(bloque))
+    # Referencia: pasar por el texto más corto (antes ~8 s para 100k x 37)
+    resultados["a_float64_por_texto"] = medir(lambda: bloque.astype(str).astype(np.float64))
+
+    # Totales de recetas con la matriz de nutrientes
+    resultados["matriz_nutrientes"] = medir(lambda c: c.matriz, preparar=nuevo)
+    nombres = cat.df["Alimento"].to_numpy()[np.flatnonzero(cat.es_alimento)]
+    recetas = [
+        dict(zip(rng.choice(nombres, _INGREDIENTES).tolist(), rng.uniform(5, 300, _INGREDIENTES).tolist()))
+        for _ in range(_RECETAS)
+    ]
+    matriz = cat.matriz
+    resultados["receta_totales"] = medir(
+        lambda: [matriz.calcular(r, 100.0) for r in recetas], por_llamada=len(recetas)
+    )
+
+    # Sellos fila por fila (como en la app) y precalculados para todo el catálogo
+    filas = [cat.df.iloc[int(i)] for i in rng.integers(0, len(cat.df), _FILAS_SELLOS)]
+    resultados["calcular_sellos"] = medir(
+        lambda: [calcular_sellos(f, t) for f in filas for t in TIPOS_PRODUCTO],
+        por_llamada=len(filas) * len(TIPOS_PRODUCTO),
+    )
+    resultados["sellos_catalogo"] = medir(lambda c: c.sellos, preparar=nuevo)
+
+    return resultados
+
+
+def casos_etiquetas():
+    """Dibujo de etiquetas (no depende del tamaño del catálogo)."""
+    from .etiquetas import construir_etiqueta_html_manual, generar_imagen_etiqueta
+
+    valores = dict(
+        energia_100=250.0, energia_porcion=75.0, prot_100=8.2, prot_porcion=2.46,
+        grasa_total_100=12.5, grasa_total_porcion=3.75, grasa_sat_100=4.1, grasa_sat_porcion=1.23,
+        hdc_100=30.0, hdc_porcion=9.0, azucar_100=12.0, azucar_porcion=3.6,
+        sodio_100=420.0, sodio_porcion=126.0,
+    )
+    return {
+        "construir_etiqueta_html_manual": medir(lambda: construir_etiqueta_html_manual(
+            "Producto de prueba", 30.0, 10, **valores,
+            incluir_desglose_grasas=True, incluir_fibra=True, incluir_micros=True,
+        )),
+        "generar_imagen_etiqueta": medir(lambda: generar_imagen_etiqueta(
+            "Producto de prueba", 30.0, 10, 75.0, 250.0, 2.46, 3.75, 1.23, 9.0, 3.6, 126.0, 420.0,
+            incluir_fibra=True, incluir_trans=True,
+        )),
+    }
+
+
+# ----------------------------------------------------------
+# RESULTADOS
+# ----------------------------------------------------------
+def _entorno():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=catalogo.RAIZ,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+    }
+
+
+def _fila(catalogo_nombre, filas, caso, medida):
+    return {"catalogo": catalogo_nombre, "filas": filas, "caso": caso,
+            **{k: round(v, 4) if isinstance(v, float) else v for k, v in medida.items()}}
+
+
+def comparar(actual, referencia, tolerancia: float):
+    """Casos cuya mediana empeoró más de `tolerancia` (0.2 = 20%)."""
+    previos = {(r["catalogo"], r["caso"]): r for r in referencia["resultados"]}
+    regresiones = []
+    for r in actual["resultados"]:
+        previo = previos.get((r["catalogo"], r["caso"]))
+        if previo and previo["mediana_ms"] > 0:
+            razon = r["mediana_ms"] / previo["mediana_ms"]
+            if razon > 1 + tolerancia:
+                regresiones.append((r, previo, razon))
+    return regresiones
+
+
+# ----------------------------------------------------------
+# LÍNEA DE COMANDOS
+# ----------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m etiquetado.rendimiento",
+        description="Benchmarks de carga, búsqueda, recetas y etiquetas.",
+    )
+    parser.add_argument("--filas", type=int, nargs="*", default=list(FILAS_SINTETICAS),
+                        help="tamaños de los catálogos sintéticos (por defecto 10k, 100k y 1M)")
+    parser.add_argument("-o", "--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="empeoramiento permitido de la mediana (por defecto 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    resultados = []
+
+    def reportar(nombre, filas, medidas):
+        for caso, medida in medidas.items():
+            resultados.append(_fila(nombre, filas, caso, medida))
+            print(f"{nombre:<18} {caso:<32} {medida['mediana_ms']:12.4f} ms  (n={medida['n']})",
+                  file=sys.stderr)
+
+    reportar("etiquetas", None, casos_etiquetas())
+
+    df_real = catalogo.cargar_excel()
+    with tempfile.TemporaryDirectory() as tmp:
+        carpeta = Path(tmp)
+        reportar("real", len(df_real), casos_catalogo(
+            "real", df_real, carpeta, catalogo.ZIP_PATH, catalogo.SNAPSHOT_PATH,
+        ))
+        for filas in args.filas:
+            df = catalogo_sintetico(df_real, filas)
+            reportar(f"sintetico_{filas}", filas, casos_catalogo(f"sintetico_{filas}", df, carpeta))
+            del df
+            gc.collect()
+
+    corrida = {"entorno": _entorno(), "resultados": resultados}
+    texto = json.dumps(corrida, ensure_ascii=False, indent=1)
+    if args.salida:
+        Path(args.salida).write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+
+    if args.comparar:
+        referencia = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        regresiones = comparar(corrida, referencia, args.tolerancia)
+        for r, previo, razon in regresiones:
+            print(f"REGRESIÓN {r['catalogo']} {r['caso']}: {previo['mediana_ms']:.4f} -> "
+                  f"{r['mediana_ms']:.4f} ms (x{razon:.2f})", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+from .texto import normalizar
+
+# ----------------------------------------------------------
+# UMBRALES OFICIALES FASE 3 (actual), por 100 g/ml
+# ----------------------------------------------------------
+TIPOS_PRODUCTO = ("Sólido", "Líquido")
+
+UMBRALES = {
+    "Sólido": {
+        "calorias": 275,   # kcal / 100 g
+        "azucares": 10,    # g / 100 g
+        "grasas_sat": 4,   # g / 100 g
+        "sodio": 400       # mg / 100 g
+    },
+    "Líquido": {
+        "calorias": 70,    # kcal / 100 ml
+        "azucares": 5,     # g / 100 ml
+        "grasas_sat": 3,   # g / 100 ml
+        "sodio": 100       # mg / 100 ml
+    },
+}
+
+# (sello, columna del catálogo, umbral) en el orden en que se informan
+SELLOS = (
+    ("ALTO EN CALORÍAS", "Energía(kcal)", "calorias"),
+    ("ALTO EN AZÚCARES", "Azúcares totales (g)", "azucares"),
+    ("ALTO EN GRASAS SATURADAS", "AG Sat (g)", "grasas_sat"),
+    ("ALTO EN SODIO", "Sodio (mg)", "sodio"),
+)
+
+
+class TipoProductoError(ValueError):
+    """Tipo de producto que no es "Sólido" ni "Líquido"."""
+
+
+# "solido" -> "Sólido", "liquido" -> "Líquido"
+_TIPOS_NORMALIZADOS = {normalizar(tipo): tipo for tipo in TIPOS_PRODUCTO}
+
+
+def resolver_tipo(tipo_producto) -> str:
+    """
+    "Sólido" o "Líquido" para `tipo_producto`, sin importar tildes ni
+    mayúsculas. Cualquier otro valor es un error: evaluar con los umbrales
+    equivocados daría sellos legalmente incorrectos.
+    """
+    if tipo_producto in UMBRALES:
+        return tipo_producto
+    tipo = _TIPOS_NORMALIZADOS.get(normalizar(str(tipo_producto)))
+    if tipo is None:
+        raise TipoProductoError(
+            f"Tipo de producto desconocido: {tipo_producto!r} (debe ser Sólido o Líquido)"
+        )
+    return tipo
+
+
+def umbrales_de(tipo_producto: str):
+    return UMBRALES[resolver_tipo(tipo_producto)]
+
+
+# ----------------------------------------------------------
+# FUNCIÓN PARA CALCULAR SELLOS (según valores por 100 g/ml y tipo)
+# ----------------------------------------------------------
+def calcular_sellos(fila, tipo_producto: str):
+    """
+    tipo_producto: "Sólido" o "Líquido"
+    Usa los umbrales oficiales de la fase final del etiquetado chileno.
+    """
+    umbrales = umbrales_de(tipo_producto)
+    return [
+        sello for sello, columna, clave in SELLOS
+        if fila.get(columna, 0) >= umbrales[clave]
+    ]
+
+
+# ----------------------------------------------------------
+# SELLOS DE TODO EL CATÁLOGO (una vez por generación)
+# ----------------------------------------------------------
+class SellosCatalogo:
+    """
+    Marcas booleanas de cada sello para cada fila del catálogo, con los
+    umbrales sólidos y líquidos, calculadas en bloque con NumPy. Las
+    consultas ("qué alimentos son altos en sodio como líquido", "cuáles
+    no tienen sellos") son sólo operaciones sobre estas columnas.
+    """
+
+    def __init__(self, df, es_alimento):
+        import numpy as np
+
+        # Se compara en float32, como se guarda el catálogo, con el umbral
+        # también en float32: el redondeo es monótono y ningún valor del
+        # Excel (pocos decimales) cae a menos de un paso de float32 de un
+        # umbral, así que da lo mismo que comparar los decimales.
+        valores = {}
+        for _, columna, _ in SELLOS:
+            if columna in df.columns:
+                valores[columna] = df[columna].to_numpy(dtype=np.float32, na_value=np.nan)
+            else:
+                valores[columna] = np.zeros(len(df), dtype=np.float32)
+
+        # Sólo cuentan los alimentos (Tipo_fila), no los títulos, la
+        # bibliografía ni las notas del Excel, tengan o no números
+        self.es_alimento = np.asarray(es_alimento, dtype=bool)
+
+        # tipo -> matriz filas x sellos (NaN nunca supera un umbral)
+        self.marcas = {}
+        for tipo in TIPOS_PRODUCTO:
+            umbrales = umbrales_de(tipo)
+            marcas = np.column_stack([
+                valores[columna] >= np.float32(umbrales[clave]) for _, columna, clave in SELLOS
+            ])
+            marcas.setflags(write=False)
+            self.marcas[tipo] = marcas
+
+    def __len__(self):
+        return len(self.es_alimento)
+
+    def sellos_de(self, fila: int, tipo_producto: str):
+        """Sellos de una fila, igual que calcular_sellos sobre esa fila."""
+        marcas = self.marcas[resolver_tipo(tipo_producto)][fila]
+        return [sello for (sello, _, _), activo in zip(SELLOS, marcas) if activo]
+
+    def filtrar(self, tipo_producto: str, con=(), sin_sellos=False):
+        """
+        Posiciones de los alimentos que tienen todos los sellos `con`
+        (o ninguno, si sin_sellos=True) para el tipo de producto dado.
+        """
+        import numpy as np
+
+        marcas = self.marcas[resolver_tipo(tipo_producto)]
+        mascara = self.es_alimento.copy()
+        for sello in con:
+            mascara &= marcas[:, _posicion(sello)]
+        if sin_sellos:
+            mascara &= ~marcas.any(axis=1)
+        return np.flatnonzero(mascara)
+
+    def conteos(self, tipo_producto: str):
+        """{sello: cantidad de alimentos con ese sello} más los sin sellos."""
+        marcas = self.marcas[resolver_tipo(tipo_producto)][self.es_alimento]
+        conteos = {sello: int(n) for (sello, _, _), n in zip(SELLOS, marcas.sum(axis=0))}
+        conteos["SIN SELLOS"] = int((~marcas.any(axis=1)).sum())
+        return conteos
+
+
+def _posicion(sello: str) -> int:
+    for i, (nombre, _, _) in enumerate(SELLOS):
+        if nombre == sello:
+            return i
+    raise KeyError(f"Sello desconocido: {sello}")
@@ -0,0 +1,69 @@
+"""
+Vista paginada de la tabla completa del catálogo.
+
+El catálogo se convierte a Arrow una sola vez por generación (ver
+Catalogo.tabla) y cada rerun sólo recorta la página visible: se filtra
+por nombre en el servidor, se eligen las columnas y lo que se envía al
+navegador son esas filas, no las ~1000 filas x 40 columnas completas.
+"""
+from __future__ import annotations
+
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from .texto import normalizar
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+    from .busqueda import IndiceSubcadenas
+
+# Filas por página que se ofrecen en la app
+TAMANOS_PAGINA = (25, 50, 100, 200)
+
+
+class TablaPaginada:
+    """Tabla Arrow del catálogo, servida por páginas de filas y columnas."""
+
+    def __init__(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        self.tabla = pa.Table.from_pandas(df, preserve_index=False)
+        self._nombres = df["Alimento_normalizado"].astype(str).tolist()
+        # Columnas que se pueden mostrar (la normalizada y el tipo son internas)
+        self.columnas = [c for c in df.columns if c not in ("Alimento_normalizado", "Tipo_fila")]
+
+    def __len__(self):
+        return self.tabla.num_rows
+
+    @cached_property
+    def _indice(self) -> IndiceSubcadenas:
+        from .busqueda import IndiceSubcadenas
+
+        return IndiceSubcadenas(self._nombres)
+
+    def filtrar(self, consulta: str = ""):
+        """Posiciones de las filas cuyo nombre contiene `consulta` (None = todas)."""
+        consulta = normalizar(consulta or "")
+        if not consulta:
+            return None
+        return self._indice.filtrar(consulta)
+
+    def paginas(self, filas, tamano: int) -> int:
+        total = len(self) if filas is None else len(filas)
+        return max(1, -(-total // tamano))
+
+    def pagina(self, filas, numero: int, tamano: int, columnas=None) -> pa.Table:
+        """
+        Página `numero` (desde 1) de `filas` (None = todas), sólo con
+        `columnas`. Sin filtro es un corte sin copia de la tabla.
+        """
+        import pyarrow as pa
+
+        desde = (numero - 1) * tamano
+        if filas is None:
+            trozo = self.tabla.slice(desde, tamano)
+        else:
+            trozo = self.tabla.take(pa.array(filas[desde:desde + tamano], type=pa.int64()))
+        return trozo.select(list(columnas or self.columnas))
@@ -0,0 +1,170 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+
+# ----------------------------------------------------------
+# FUNCIONES DE TEXTO
+# ----------------------------------------------------------
+def _normalizar_lento(texto: str) -> str:
+    """Versión de referencia: NFD + filtro de marcas, letra por letra."""
+    # Remover acentos
+    texto = ''.join(
+        c for c in unicodedata.normalize('NFD', texto)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+    # Minúsculas + limpiar espacios
+    texto = texto.lower().strip()
+    texto = re.sub(r"\s+", " ", texto)
+
+    return texto
+
+
+def _tabla_sin_tildes():
+    """
+    Tabla para str.translate que quita las tildes de todo el rango latino
+    (Latin-1 + Latin Extended-A/B) y descarta marcas combinantes sueltas.
+    Se arma una sola vez con la misma regla que _normalizar_lento.
+    """
+    tabla = {}
+    for cp in range(0x80, 0x250):
+        c = chr(cp)
+        sin_marcas = ''.join(
+            d for d in unicodedata.normalize('NFD', c)
+            if unicodedata.category(d) != 'Mn'
+        )
+        if sin_marcas != c:
+            tabla[cp] = sin_marcas
+    for cp in range(0x300, 0x370):
+        tabla[cp] = None
+    return tabla
+
+
+_TABLA_SIN_TILDES = _tabla_sin_tildes()
+
+# Equivalente RE2 (pyarrow) de \s+ en Python: espacios Unicode y separadores
+_ESPACIOS_RE2 = r"[\p{Z}\t\n\x0b\f\r\x1c-\x1f\x85]+"
+
+
+@lru_cache(maxsize=65536)
+def _normalizar_str(texto: str) -> str:
+    resultado = " ".join(texto.translate(_TABLA_SIN_TILDES).lower().split())
+    if not resultado.isascii():
+        # Caracteres fuera de la tabla (griego, cirílico, etc.)
+        return _normalizar_lento(texto)
+    return resultado
+
+
+def normalizar(texto: str) -> str:
+    """Pasa a minúsculas, elimina tildes y espacios dobles (con memo LRU)."""
+    if not isinstance(texto, str):
+        texto = str(texto)
+    return _normalizar_str(texto)
+
+
+def normalizar_serie(serie):
+    """
+    normalizar() sobre una Serie completa, con kernels de pyarrow.compute:
+    sólo los textos con caracteres no ASCII pasan por NFD + quitar marcas.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    arr = pa.array(serie.astype(str), type=pa.string())
+
+    no_ascii = pc.invert(pc.string_is_ascii(arr))
+    if pc.any(no_ascii).as_py():
+        sub = pc.filter(arr, no_ascii)
+        sub = pc.utf8_normalize(sub, form="NFD")
+        sub = pc.replace_substring_regex(sub, pattern=r"\p{Mn}+", replacement="")
+        arr = pc.replace_with_mask(arr, no_ascii, sub)
+
+    arr = pc.utf8_lower(arr)
+    arr = pc.replace_substring_regex(arr, pattern=_ESPACIOS_RE2, replacement=" ")
+    arr = pc.utf8_trim(arr, characters=" ")
+
+    s = pd.Series(arr.to_numpy(zero_copy_only=False), index=serie.index, dtype=object)
+
+    # Lo que quedó fuera de ASCII se resuelve con la versión de referencia
+    raros = pc.invert(pc.string_is_ascii(arr)).to_numpy(zero_copy_only=False)
+    if raros.any():
+        s[raros] = serie[raros].astype(str).map(_normalizar_lento)
+    return s
+
+
+# ----------------------------------------------------------
+# SINÓNIMOS (se expanden al construir los índices de búsqueda)
+# ----------------------------------------------------------
+# Cada grupo reúne palabras equivalentes (ya normalizadas). Un nombre que
+# contiene una de ellas se indexa también con cada una de las otras, así
+# "aguacate" encuentra "Palta" sin costo extra por consulta. También se
+# reconocen sus plurales ("frijoles" -> "porotos").
+SINONIMOS = [
+    ("palta", "aguacate"),
+    ("poroto", "frijol", "judia"),
+    ("zapallo", "calabaza"),
+    ("frutilla", "fresa"),
+    ("durazno", "melocoton"),
+    ("betarraga", "remolacha"),
+    ("arveja", "guisante"),
+    ("damasco", "albaricoque"),
+    ("papa", "patata"),
+    ("mani", "cacahuate", "cacahuete"),
+    ("camote", "batata"),
+    ("pimenton", "pimiento"),
+    ("vienesa", "salchicha"),
+    ("pomelo", "toronja"),
+]
+
+
+def plurales(palabra: str):
+    """
+    Plurales de una palabra normalizada: vocal + "s", consonante + "es" y
+    "z" -> "ces". Sin tildes no se sabe si una "i" o "u" final es tónica
+    (maní -> maníes/manís), así que se aceptan las dos formas.
+    """
+    if not palabra or palabra.endswith("s"):
+        return ()
+    if palabra.endswith("z"):
+        return (palabra[:-1] + "ces",)
+    if palabra[-1] in "aeo":
+        return (palabra + "s",)
+    if palabra[-1] in "iu":
+        return (palabra + "s", palabra + "es")
+    return (palabra + "es",)
+
+
+@lru_cache(maxsize=8)
+def _reglas_sinonimos(grupos):
+    """[(regex de la palabra, [(alternativa, su plural)])] para un mapa de sinónimos."""
+    reglas = []
+    for grupo in grupos:
+        for palabra in grupo:
+            alternativas = [
+                (otra, (plurales(otra) or (otra,))[0]) for otra in grupo if otra != palabra
+            ]
+            # Singular o plural; en plural la variante también va en plural
+            formas_plural = "|".join(map(re.escape, plurales(palabra))) or "(?!)"
+            patron = re.compile(rf"\b(?:{re.escape(palabra)}|(?P<plural>{formas_plural}))\b")
+            reglas.append((patron, alternativas))
+    return reglas
+
+
+def expandir_sinonimos(texto: str, sinonimos=SINONIMOS):
+    """
+    Variantes de un nombre normalizado con cada sinónimo reemplazado.
+    Devuelve primero el texto original.
+    """
+    variantes = [texto]
+    if not sinonimos:
+        return variantes
+    for patron, alternativas in _reglas_sinonimos(tuple(map(tuple, sinonimos))):
+        if patron.search(texto):
+            for singular, plural in alternativas:
+                variantes.append(patron.sub(
+                    lambda m, singular=singular, plural=plural: plural if m["plural"] else singular,
+                    texto,
+                ))
+    return variantes
@@ -0,0 +1,508 @@
+"""
+Etiqueta nutricional vectorial (SVG y PDF), para imprenta.
+
+Usa las mismas filas que la etiqueta HTML (FILAS_ETIQUETA / FILAS_MICROS)
+y se dibuja en unidades de diseño (340 de ancho, como la tabla HTML);
+el tamaño físico se elige al exportar con ancho_mm, sin perder calidad.
+
+El PDF usa las fuentes estándar Helvetica / Helvetica-Bold (no se
+incrustan) y el texto se mide con sus métricas AFM, cacheadas por
+fuente, tamaño y texto. La parte fija de cada combinación de secciones
+(encabezados, nombres de filas, líneas) se compila una sola vez; por
+etiqueta sólo se agregan la porción y los valores.
+"""
+from functools import lru_cache
+from io import BytesIO
+
+from .etiquetas import _NAN, FILAS_ETIQUETA, FILAS_MICROS
+
+# Ancho de diseño (unidades = puntos con ancho_mm por defecto)
+ANCHO = 340.0
+
+# Ancho físico por defecto de la etiqueta (340 pt)
+ANCHO_MM = ANCHO * 25.4 / 72
+
+_MARGEN = 6.0
+_SANGRIA = 10.0
+_ALTO_FILA = 16.0
+_ALTO_MICRO = 13.0
+
+# Borde derecho de las columnas "100 g" y "1 porción"
+_X_100 = 262.0
+_X_PORCION = ANCHO - _MARGEN
+
+_GRIS = "#cccccc"
+
+
+# ----------------------------------------------------------
+# MÉTRICAS DE FUENTE (Helvetica AFM, milésimas de em)
+# ----------------------------------------------------------
+_ANCHOS_ASCII = {
+    "Helvetica": (
+        # espacio ! " # $ % & ' ( ) * + , - . /
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        # 0-9 : ; < = > ?
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        # @ A-O
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        # P-Z [ \ ] ^ _
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        # ` a-o
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        # p-z { | } ~
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+    ),
+    "Helvetica-Bold": (
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+    ),
+}
+
+# Otros caracteres de WinAnsi usados en etiquetas
+_ANCHOS_EXTRA = {
+    "Helvetica": {"µ": 556, "°": 400, "·": 278, "–": 556, "—": 1000, "¿": 611, "¡": 333},
+    "Helvetica-Bold": {"µ": 611, "°": 400, "·": 278, "–": 556, "—": 1000, "¿": 611, "¡": 333},
+}
+
+
+@lru_cache(maxsize=None)
+def _ancho_caracter(fuente: str, c: str) -> int:
+    extra = _ANCHOS_EXTRA[fuente].get(c)
+    if extra is not None:
+        return extra
+    # Letras con tilde: mismo ancho que la letra base (así es en la AFM)
+    base = c
+    if not (" " <= c <= "~"):
+        import unicodedata
+        base = unicodedata.normalize("NFD", c)[0]
+    if " " <= base <= "~":
+        return _ANCHOS_ASCII[fuente][ord(base) - 32]
+    return 556
+
+
+@lru_cache(maxsize=4096)
+def ancho_texto(texto: str, fuente: str = "Helvetica", tamano: float = 12.0) -> float:
+    """Ancho del texto en unidades de diseño (cacheado por fuente y tamaño)."""
+    return sum(_ancho_caracter(fuente, c) for c in texto) * tamano / 1000.0
+
+
+def _partir(texto: str, ancho: float, fuente: str, tamano: float):
+    """Corta el texto en líneas que caben en `ancho`."""
+    lineas = []
+    actual = ""
+    for palabra in texto.split():
+        prueba = f"{actual} {palabra}" if actual else palabra
+        if actual and ancho_texto(prueba, fuente, tamano) > ancho:
+            lineas.append(actual)
+            actual = palabra
+        else:
+            actual = prueba
+    lineas.append(actual)
+    return lineas
+
+
+# ----------------------------------------------------------
+# PRIMITIVAS -> SVG / PDF
+# ----------------------------------------------------------
+# ("texto", x, y, texto, tamaño, negrita, ancla, color)
+# ("linea", x1, y1, x2, y2, grosor, color)
+# ("rect", x, y, ancho, alto, relleno, borde, grosor)
+# Coordenadas con y hacia abajo (como SVG); el PDF las invierte.
+
+def _x_ancla(x, texto, tamano, negrita, ancla):
+    if ancla == "start":
+        return x
+    fuente = "Helvetica-Bold" if negrita else "Helvetica"
+    ancho = ancho_texto(texto, fuente, tamano)
+    return x - ancho if ancla == "end" else x - ancho / 2
+
+
+def _escapar_xml(texto: str) -> str:
+    return texto.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def elementos_svg(primitivas):
+    partes = []
+    for p in primitivas:
+        if p[0] == "texto":
+            _, x, y, texto, tamano, negrita, ancla, color = p
+            peso = ' font-weight="bold"' if negrita else ""
+            ancla_svg = f' text-anchor="{ancla}"' if ancla != "start" else ""
+            partes.append(
+                f'<text x="{x:g}" y="{y:g}" font-size="{tamano:g}"{peso}{ancla_svg} '
+                f'fill="{color}" xml:space="preserve">{_escapar_xml(texto)}</text>'
+            )
+        elif p[0] == "linea":
+            _, x1, y1, x2, y2, grosor, color = p
+            partes.append(
+                f'<line x1="{x1:g}" y1="{y1:g}" x2="{x2:g}" y2="{y2:g}" '
+                f'stroke="{color}" stroke-width="{grosor:g}"/>'
+            )
+        else:
+            _, x, y, ancho, alto, relleno, borde, grosor = p
+            trazo = f' stroke="{borde}" stroke-width="{grosor:g}"' if borde else ""
+            partes.append(
+                f'<rect x="{x:g}" y="{y:g}" width="{ancho:g}" height="{alto:g}" '
+                f'fill="{relleno or "none"}"{trazo}/>'
+            )
+    return "\n".join(partes)
+
+
+def _color_pdf(color: str):
+    r, g, b = (int(color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+    return f"{r:.3g} {g:.3g} {b:.3g}"
+
+
+def _cadena_pdf(texto: str) -> bytes:
+    datos = texto.encode("cp1252", errors="replace")
+    return b"(" + datos.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def operadores_pdf(primitivas) -> bytes:
+    """Contenido PDF (y hacia abajo: se invierte con la matriz de la página)."""
+    partes = []
+    for p in primitivas:
+        if p[0] == "texto":
+            _, x, y, texto, tamano, negrita, ancla, color = p
+            fuente = "/F2" if negrita else "/F1"
+            x = _x_ancla(x, texto, tamano, negrita, ancla)
+            partes.append(
+                f"BT {_color_pdf(color)} rg {fuente} {tamano:g} Tf "
+                f"1 0 0 -1 {x:.2f} {y:.2f} Tm ".encode() + _cadena_pdf(texto) + b" Tj ET"
+            )
+        elif p[0] == "linea":
+            _, x1, y1, x2, y2, grosor, color = p
+            partes.append(
+                f"{_color_pdf(color)} RG {grosor:g} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S".encode()
+            )
+        else:
+            _, x, y, ancho, alto, relleno, borde, grosor = p
+            if relleno:
+                partes.append(f"{_color_pdf(relleno)} rg {x:g} {y:g} {ancho:g} {alto:g} re f".encode())
+            if borde:
+                partes.append(
+                    f"{_color_pdf(borde)} RG {grosor:g} w {x:g} {y:g} {ancho:g} {alto:g} re S".encode()
+                )
+    return b"\n".join(partes)
+
+
+# ----------------------------------------------------------
+# DISEÑO COMPILADO POR COMBINACIÓN DE SECCIONES
+# ----------------------------------------------------------
+class DisenoVectorial:
+    """
+    Parte fija de la etiqueta (desde el encabezado de la tabla hacia
+    abajo) ya medida y serializada a SVG y PDF, más la posición de cada
+    valor. Se construye una vez por combinación de secciones opcionales.
+    """
+
+    def __init__(self, incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False):
+        secciones = {"desglose_grasas": incluir_desglose_grasas, "fibra": incluir_fibra}
+        filas = [f for f in FILAS_ETIQUETA if f[3] is None or secciones[f[3]]]
+        micros = FILAS_MICROS if incluir_micros else ()
+
+        fijas = []
+        # (columna, y, decimales, unidad o None si es fila de la tabla)
+        self.valores = []
+
+        y = 0.0
+        fijas.append(("texto", (_X_100 + 200) / 2, y + 13, "100 g", 12, True, "middle", "#000000"))
+        fijas.append(("texto", (_X_100 + _X_PORCION) / 2, y + 13, "1 porción", 12, True, "middle", "#000000"))
+        y += 18
+        fijas.append(("linea", 0, y, ANCHO, y, 1, "#000000"))
+
+        for columna, texto, dec, _ in filas:
+            sangria = _SANGRIA if texto.startswith(" ") else 0.0
+            fijas.append(("texto", _MARGEN + sangria, y + 12, texto.strip(), 12, False, "start", "#000000"))
+            self.valores.append((columna, y + 12, dec, None))
+            y += _ALTO_FILA
+            fijas.append(("linea", 0, y, ANCHO, y, 1, _GRIS))
+
+        if micros:
+            y += 6
+            fijas.append(("linea", 0, y, ANCHO, y, 1, "#000000"))
+            y += 15
+            fijas.append(("texto", _MARGEN, y, "Micronutrientes (por porción)", 11, True, "start", "#000000"))
+            for columna, texto, dec, unidad in micros:
+                y += _ALTO_MICRO
+                self.valores.append((columna, y, dec, f"{texto}: {{}} {unidad}"))
+
+        self.alto = y + _MARGEN
+        self.svg_fijo = elementos_svg(fijas)
+        self.pdf_fijo = operadores_pdf(fijas)
+
+
+@lru_cache(maxsize=None)
+def diseno(incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False):
+    return DisenoVectorial(bool(incluir_desglose_grasas), bool(incluir_fibra), bool(incluir_micros))
+
+
+def _por_porcion(v100, factor: float) -> float:
+    try:
+        return float(v100) * factor
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class EtiquetaVectorial:
+    """Una etiqueta ya diagramada: encabezado + parte fija desplazada + valores."""
+
+    def __init__(self, valores_100, porcion, porciones_envase, texto_porcion=None,
+                 incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False):
+        d = diseno(incluir_desglose_grasas, incluir_fibra, incluir_micros)
+        self.diseno = d
+
+        cabecera = [
+            ("rect", 0, 0, ANCHO, 24, "#000000", None, 0),
+            ("texto", ANCHO / 2, 17, "INFORMACIÓN NUTRICIONAL", 14, True, "middle", "#ffffff"),
+        ]
+
+        # Porción (puede ocupar varias líneas) y porciones por envase
+        porcion_label = texto_porcion if texto_porcion else f"{porcion:.0f} g/ml"
+        prefijo = "Porción: "
+        x_valor = _MARGEN + ancho_texto(prefijo, "Helvetica-Bold", 12)
+        y = 24 + 4
+        for i, linea in enumerate(_partir(porcion_label, ANCHO - _MARGEN - x_valor, "Helvetica", 12)):
+            y += 14
+            if i == 0:
+                cabecera.append(("texto", _MARGEN, y, prefijo.strip(), 12, True, "start", "#000000"))
+            cabecera.append(("texto", x_valor, y, linea, 12, False, "start", "#000000"))
+        y += 14
+        prefijo = "Porciones por envase: "
+        cabecera.append(("texto", _MARGEN, y, prefijo.strip(), 12, True, "start", "#000000"))
+        cabecera.append((
+            "texto", _MARGEN + ancho_texto(prefijo, "Helvetica-Bold", 12), y,
+            f"{porciones_envase:.0f}", 12, False, "start", "#000000",
+        ))
+        y += 6
+        cabecera.append(("linea", 0, y, ANCHO, y, 1, "#000000"))
+
+        self.desplazamiento = y
+        self.alto = y + d.alto
+
+        # Valores: van en la misma referencia que la parte fija
+        factor = porcion / 100.0
+        valores = []
+        for columna, yv, dec, formato in d.valores:
+            v100 = valores_100.get(columna, 0.0)
+            if formato is None:
+                valores.append(("texto", _X_100 - 4, yv, f"{v100:.{dec}f}", 12, False, "end", "#000000"))
+                valores.append(("texto", _X_PORCION - 4, yv, f"{_por_porcion(v100, factor):.{dec}f}",
+                                12, False, "end", "#000000"))
+            else:
+                texto = formato.format(f"{_por_porcion(v100, factor):.{dec}f}")
+                valores.append(("texto", _MARGEN, yv, texto, 11, False, "start", "#000000"))
+
+        self.cabecera = cabecera
+        self.valores = valores
+        self.borde = [("rect", 1, 1, ANCHO - 2, self.alto - 2, None, "#000000", 2)]
+
+    def svg_cuerpo(self) -> str:
+        """Elementos SVG en unidades de diseño (sin la etiqueta <svg>)."""
+        return (
+            '<g font-family="Helvetica, Arial, sans-serif">\n'
+            f"{elementos_svg(self.cabecera)}\n"
+            f'<g transform="translate(0 {self.desplazamiento:g})">\n'
+            f"{self.diseno.svg_fijo}\n{elementos_svg(self.valores)}\n</g>\n"
+            f"{elementos_svg(self.borde)}\n</g>"
+        )
+
+    def pdf_cuerpo(self) -> bytes:
+        """Operadores PDF en unidades de diseño con y hacia abajo."""
+        return b"\n".join([
+            operadores_pdf(self.cabecera),
+            f"q 1 0 0 1 0 {self.desplazamiento:.2f} cm".encode(),
+            self.diseno.pdf_fijo,
+            operadores_pdf(self.valores),
+            b"Q",
+            operadores_pdf(self.borde),
+        ])
+
+
+# ----------------------------------------------------------
+# DOCUMENTOS
+# ----------------------------------------------------------
+def _mm_a_pt(mm: float) -> float:
+    return mm * 72 / 25.4
+
+
+def documento_svg(etiqueta: EtiquetaVectorial, ancho_mm: float = ANCHO_MM) -> str:
+    """SVG autónomo con el tamaño físico pedido (escala sin perder calidad)."""
+    alto_mm = ancho_mm * etiqueta.alto / ANCHO
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{ancho_mm:.2f}mm" height="{alto_mm:.2f}mm" '
+        f'viewBox="0 0 {ANCHO:g} {etiqueta.alto:g}">\n'
+        f'<rect width="100%" height="100%" fill="#ffffff"/>\n'
+        f"{etiqueta.svg_cuerpo()}\n</svg>\n"
+    )
+
+
+class EscritorPDF:
+    """
+    Escribe un PDF página por página en un archivo binario abierto. Sólo
+    guarda la posición de cada objeto (para la tabla xref final), así que
+    la memoria no depende de la cantidad de páginas.
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self._escrito = 0
+        self._posiciones = {}
+        self._paginas = []
+        # 1: catálogo y 2: árbol de páginas se escriben al cerrar
+        self._siguiente = 5
+        self._imagenes = {}
+
+        self._escribir(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._objeto(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                        b"/Encoding /WinAnsiEncoding >>")
+        self._objeto(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold "
+                        b"/Encoding /WinAnsiEncoding >>")
+
+    def _escribir(self, datos: bytes):
+        self.archivo.write(datos)
+        self._escrito += len(datos)
+
+    def _nuevo(self) -> int:
+        num = self._siguiente
+        self._siguiente += 1
+        return num
+
+    def _objeto(self, num: int, cuerpo: bytes, flujo: bytes = None):
+        self._posiciones[num] = self._escrito
+        self._escribir(f"{num} 0 obj\n".encode() + cuerpo)
+        if flujo is not None:
+            self._escribir(b"\nstream\n" + flujo + b"\nendstream")
+        self._escribir(b"\nendobj\n")
+
+    def agregar_imagen(self, nombre: str, png: bytes):
+        """Registra una imagen (PNG, con transparencia) como /nombre para Do."""
+        import zlib
+
+        from PIL import Image
+
+        im = Image.open(BytesIO(png))
+        im = im.convert("RGBA") if "A" in im.getbands() or "transparency" in im.info else im.convert("RGB")
+        ancho, alto = im.size
+
+        mascara = ""
+        if im.mode == "RGBA":
+            num_mascara = self._nuevo()
+            alfa = zlib.compress(im.getchannel("A").tobytes())
+            self._objeto(num_mascara, (
+                f"<< /Type /XObject /Subtype /Image /Width {ancho} /Height {alto} "
+                f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode "
+                f"/Length {len(alfa)} >>"
+            ).encode(), alfa)
+            mascara = f" /SMask {num_mascara} 0 R"
+            im = im.convert("RGB")
+
+        num = self._nuevo()
+        datos = zlib.compress(im.tobytes())
+        self._objeto(num, (
+            f"<< /Type /XObject /Subtype /Image /Width {ancho} /Height {alto} "
+            f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode{mascara} "
+            f"/Length {len(datos)} >>"
+        ).encode(), datos)
+        self._imagenes[nombre] = num
+
+    def agregar_pagina(self, contenido: bytes, ancho: float, alto: float):
+        """Agrega una página con `contenido` (operadores PDF) y tamaño en puntos."""
+        imagenes = " ".join(f"/{n} {num} 0 R" for n, num in self._imagenes.items())
+        recursos = f"<< /Font << /F1 3 0 R /F2 4 0 R >> /XObject << {imagenes} >> >>"
+
+        pagina, flujo = self._nuevo(), self._nuevo()
+        self._objeto(flujo, f"<< /Length {len(contenido)} >>".encode(), contenido)
+        self._objeto(pagina, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ancho:.2f} {alto:.2f}] "
+            f"/Resources {recursos} /Contents {flujo} 0 R >>"
+        ).encode())
+        self._paginas.append(pagina)
+
+    def cerrar(self):
+        """Escribe el árbol de páginas, el catálogo y la tabla xref."""
+        hijos = " ".join(f"{p} 0 R" for p in self._paginas)
+        self._objeto(2, f"<< /Type /Pages /Kids [{hijos}] /Count {len(self._paginas)} >>".encode())
+        self._objeto(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        inicio_xref = self._escrito
+        n = self._siguiente
+        xref = [f"xref\n0 {n}\n0000000000 65535 f \n"]
+        for num in range(1, n):
+            xref.append(f"{self._posiciones[num]:010d} 00000 n \n")
+        xref.append(f"trailer\n<< /Size {n} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n")
+        self._escribir("".join(xref).encode())
+
+    @property
+    def paginas(self) -> int:
+        return len(self._paginas)
+
+
+def documento_pdf(paginas) -> bytes:
+    """
+    PDF con una página por elemento de `paginas`: (contenido, ancho_pt,
+    alto_pt), donde el contenido ya incluye su propia transformación.
+    """
+    buf = BytesIO()
+    escritor = EscritorPDF(buf)
+    for contenido, ancho, alto in paginas:
+        escritor.agregar_pagina(contenido, ancho, alto)
+    escritor.cerrar()
+    return buf.getvalue()
+
+
+def pagina_pdf(etiqueta: EtiquetaVectorial, ancho_mm: float = ANCHO_MM):
+    """(contenido, ancho_pt, alto_pt) de una página con sólo esta etiqueta."""
+    escala = _mm_a_pt(ancho_mm) / ANCHO
+    alto = etiqueta.alto * escala
+    # Escala a tamaño físico e invierte el eje y (diseño con y hacia abajo)
+    contenido = f"{escala:.6f} 0 0 {-escala:.6f} 0 {alto:.2f} cm\n".encode() + etiqueta.pdf_cuerpo()
+    return contenido, _mm_a_pt(ancho_mm), alto
+
+
+# ----------------------------------------------------------
+# ATAJOS (mismos argumentos que etiquetas.etiqueta_html)
+# ----------------------------------------------------------
+def etiqueta_svg(valores_100, porcion, porciones_envase, texto_porcion=None,
+                 incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False,
+                 ancho_mm: float = ANCHO_MM) -> str:
+    """Etiqueta como SVG a partir de valores por 100 g/ml por columna."""
+    etiqueta = EtiquetaVectorial(valores_100, porcion, porciones_envase, texto_porcion,
+                                 incluir_desglose_grasas, incluir_fibra, incluir_micros)
+    return documento_svg(etiqueta, ancho_mm)
+
+
+def etiqueta_pdf(valores_100, porcion, porciones_envase, texto_porcion=None,
+                 incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False,
+                 ancho_mm: float = ANCHO_MM) -> bytes:
+    """Etiqueta como PDF de una página del tamaño de la etiqueta."""
+    etiqueta = EtiquetaVectorial(valores_100, porcion, porciones_envase, texto_porcion,
+                                 incluir_desglose_grasas, incluir_fibra, incluir_micros)
+    return documento_pdf([pagina_pdf(etiqueta, ancho_mm)])
+
+
+@lru_cache(maxsize=256)
+def _documentos_memo(porcion, porciones_envase, texto_porcion, opciones, valores):
+    etiqueta = EtiquetaVectorial(dict(valores), porcion, porciones_envase, texto_porcion, *opciones)
+    return documento_svg(etiqueta), documento_pdf([pagina_pdf(etiqueta)])
+
+
+def documentos_etiqueta(valores_100, porcion, porciones_envase, texto_porcion=None,
+                        incluir_desglose_grasas=False, incluir_fibra=False, incluir_micros=False):
+    """
+    (SVG, PDF) de la etiqueta, memoizados como etiquetas.etiqueta_png_bytes:
+    sólo cuentan las columnas que la etiqueta imprime, así que los reruns
+    con los mismos datos no vuelven a diagramar ni a escribir el PDF.
+    """
+    opciones = (bool(incluir_desglose_grasas), bool(incluir_fibra), bool(incluir_micros))
+    valores = []
+    for columna, _, _, _ in diseno(*opciones).valores:
+        valor = float(valores_100.get(columna, 0.0))
+        valores.append((columna, _NAN if valor != valor else valor))
+    return _documentos_memo(float(porcion), float(porciones_envase), texto_porcion,
+                            opciones, tuple(valores))
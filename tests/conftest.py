@@ -0,0 +1,25 @@
+"""Configuración común de las pruebas."""
+import shutil
+
+import pytest
+
+from etiquetado import catalogo
+
+
+@pytest.fixture(scope="session", autouse=True)
+def rutas_temporales(tmp_path_factory):
+    """
+    La base de personalizados, el snapshot y el informe de celdas van a una
+    carpeta temporal: las pruebas no escriben archivos en la raíz del repo.
+    El snapshot del repo, si existe, se copia para no releer el Excel.
+    """
+    carpeta = tmp_path_factory.mktemp("datos")
+    snapshot = carpeta / catalogo.SNAPSHOT_PATH.name
+    if catalogo.SNAPSHOT_PATH.exists():
+        shutil.copy(catalogo.SNAPSHOT_PATH, snapshot)
+
+    with pytest.MonkeyPatch.context() as parche:
+        parche.setattr(catalogo, "PERSONALIZADOS_DB", carpeta / catalogo.PERSONALIZADOS_DB.name)
+        parche.setattr(catalogo, "SNAPSHOT_PATH", snapshot)
+        parche.setattr(catalogo, "INFORME_CELDAS_PATH", carpeta / catalogo.INFORME_CELDAS_PATH.name)
+        yield carpeta
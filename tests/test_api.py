@@ -0,0 +1,246 @@
+"""Pruebas de la API HTTP local."""
+import base64
+import http.client
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from etiquetado import api, catalogo
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    servidor = api.ServidorAPI(("127.0.0.1", 0), cat=catalogo.obtener(), silencioso=True)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _post(servidor, ruta, cuerpo: bytes):
+    conexion = http.client.HTTPConnection(*servidor.server_address, timeout=30)
+    try:
+        conexion.request("POST", ruta, cuerpo, {"Content-Type": "application/json"})
+        respuesta = conexion.getresponse()
+        texto = respuesta.read().decode("utf-8")
+    finally:
+        conexion.close()
+
+    def rechazar(nombre):
+        raise AssertionError(f"la respuesta trae {nombre}")
+
+    return respuesta.status, json.loads(texto, parse_constant=rechazar)
+
+
+
+def _get(servidor, ruta):
+    conexion = http.client.HTTPConnection(*servidor.server_address, timeout=30)
+    try:
+        conexion.request("GET", ruta)
+        respuesta = conexion.getresponse()
+        return respuesta.status, respuesta.read().decode("utf-8")
+    finally:
+        conexion.close()
+
+
+_RECETA = {
+    "nombre": "Leche con plátano",
+    "ingredientes": {"Leche fluida entera(1)": 200, "Plátano": 100},
+    "porcion": 250, "tipo": "Líquido", "descripcion_porcion": "1 vaso",
+}
+
+
+def test_salud(servidor):
+    estado, texto = _get(servidor, "/salud")
+    respuesta = json.loads(texto)
+    assert estado == 200
+    assert respuesta["estado"] == "ok"
+    assert respuesta["alimentos"] == len(servidor.catalogo.filas_alimentos)
+
+
+def test_alimentos(servidor):
+    estado, texto = _get(servidor, "/alimentos?q=platamo&k=2")
+    assert estado == 200
+    assert json.loads(texto)["alimentos"][0] == "Plátano"
+    assert json.loads(_get(servidor, "/alimentos?q=zzzzqq")[1]) == {"alimentos": []}
+    assert _get(servidor, "/alimentos?q=leche&k=x")[0] == 400
+
+
+def test_metricas_y_ruta_desconocida(servidor):
+    _get(servidor, "/salud")
+    estado, texto = _get(servidor, "/metricas")
+    assert estado == 200 and "etiquetado_etapa_segundos" in texto
+    assert _get(servidor, "/no-existe")[0] == 404
+
+
+def test_receta(servidor):
+    estado, respuesta = _post(servidor, "/receta", json.dumps(_RECETA).encode())
+    assert estado == 200
+    assert respuesta["nombre"] == "Leche con plátano"
+    assert respuesta["peso_total"] == 300
+    assert "INFORMACIÓN NUTRICIONAL" in respuesta["html"]
+    assert base64.b64decode(respuesta["png"]).startswith(b"\x89PNG")
+
+
+def test_etiqueta_html_png_y_vectorial(servidor):
+    cuerpo = {"alimento": "Plátano", "porcion": 120, "descripcion_porcion": "1 plátano",
+              "vectorial": True}
+    estado, respuesta = _post(servidor, "/etiqueta", json.dumps(cuerpo).encode())
+    assert estado == 200
+    assert respuesta["por_porcion"]["Energía(kcal)"] == pytest.approx(
+        respuesta["por_100"]["Energía(kcal)"] * 1.2, abs=0.01)
+    assert "1 plátano" in respuesta["html"]
+    assert base64.b64decode(respuesta["png"]).startswith(b"\x89PNG")
+    assert base64.b64decode(respuesta["pdf"]).startswith(b"%PDF-1.4")
+    assert respuesta["svg"].startswith("<svg")
+
+    # Con valores por 100 g/ml y sin imagen
+    cuerpo = {"nombre": "Jugo", "valores_100": {"Energía(kcal)": 45, "Azúcares totales (g)": 9},
+              "png": False}
+    estado, respuesta = _post(servidor, "/etiqueta", json.dumps(cuerpo).encode())
+    assert estado == 200 and "png" not in respuesta
+    assert respuesta["por_porcion"]["Energía(kcal)"] == 45
+
+
+def test_lote_mixto_aisla_los_errores(servidor):
+    pedido = [
+        _RECETA,
+        {"nombre": "Sin alimento", "ingredientes": {"Alimento que no existe": 10}},
+        {"nombre": "Sin ingredientes"},
+        "no es un objeto",
+        dict(_RECETA, nombre="Otra", png=False),
+    ]
+    estado, respuesta = _post(servidor, "/receta", json.dumps(pedido).encode())
+    assert estado == 200
+    resultados = respuesta["resultados"]
+    assert [r.get("nombre") for r in resultados] == [
+        "Leche con plátano", "Sin alimento", "Sin ingredientes", None, "Otra",
+    ]
+    assert ["error" in r for r in resultados] == [False, True, True, True, False]
+    assert "no encontrado" in resultados[1]["error"]
+    assert "ingredientes" in resultados[2]["error"]
+
+    # Un solo objeto con error responde 422
+    estado, respuesta = _post(servidor, "/receta", json.dumps(pedido[1]).encode())
+    assert estado == 422 and "no encontrado" in respuesta["error"]
+
+
+def test_lote_de_sellos(servidor):
+    pedido = [{"alimento": "Plátano"}, {"alimento": "Plátano", "tipo": "Líquido"}, {"alimento": "zzzzqq"}]
+    estado, respuesta = _post(servidor, "/sellos", json.dumps(pedido).encode())
+    assert estado == 200
+    sellos, liquido, error = respuesta["resultados"]
+    assert sellos == {"tipo": "Sólido", "sellos": ["ALTO EN AZÚCARES"]}
+    assert liquido["tipo"] == "Líquido" and "ALTO EN CALORÍAS" in liquido["sellos"]
+    assert "error" in error
+
+
+def test_limites_del_pedido(servidor):
+    assert _post(servidor, "/sellos", b"{no es json")[0] == 400
+    estado, respuesta = _post(servidor, "/sellos", json.dumps([{}] * (api._MAX_LOTE + 1)).encode())
+    assert estado == 413 and str(api._MAX_LOTE) in respuesta["error"]
+
+    # Un cuerpo demasiado grande se rechaza sin leerlo
+    pedido = b"POST /sellos HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n" % (api._MAX_CUERPO + 1)
+    assert _pedidos_en_un_socket(servidor, pedido).startswith(b"HTTP/1.1 413")
+
+
+def test_pedidos_concurrentes(servidor):
+    # Cada hilo pide una porción distinta; las respuestas no se mezclan
+    def pedir(porcion):
+        cuerpo = dict(_RECETA, porcion=porcion, png=porcion % 2 == 0)
+        return _post(servidor, "/receta", json.dumps(cuerpo).encode())
+
+    porciones = list(range(100, 140))
+    with ThreadPoolExecutor(8) as pool:
+        respuestas = list(pool.map(pedir, porciones))
+
+    secuenciales = {p: pedir(p)[1] for p in porciones[:4]}
+    for porcion, (estado, respuesta) in zip(porciones, respuestas):
+        assert estado == 200
+        assert ("png" in respuesta) == (porcion % 2 == 0)
+        assert f"{porcion:.0f}" in respuesta["html"]
+        if porcion in secuenciales:
+            assert respuesta == secuenciales[porcion]
+
+
+@pytest.mark.parametrize("valor", ["NaN", "Infinity", "-Infinity", "1e999"])
+def test_numeros_no_finitos_en_el_pedido(servidor, valor):
+    cuerpo = f'{{"valores_100": {{"Energía(kcal)": {valor}}}, "png": false}}'.encode()
+    estado, respuesta = _post(servidor, "/sellos", cuerpo)
+    assert estado == 400
+    assert "no finito" in respuesta["error"]
+
+
+def test_resultado_no_finito_no_sale_como_json_invalido(servidor):
+    cuerpo = json.dumps({"valores_100": {"Energía(kcal)": 1e308}, "porcion": 1000, "png": False})
+    estado, respuesta = _post(servidor, "/etiqueta", cuerpo.encode())
+    assert estado == 500
+    assert "no finitos" in respuesta["error"]
+
+
+def test_sellos_de_un_alimento(servidor):
+    estado, respuesta = _post(servidor, "/sellos", json.dumps({"alimento": "Plátano"}).encode())
+    assert estado == 200
+    assert respuesta == {"tipo": "Sólido", "sellos": ["ALTO EN AZÚCARES"]}
+
+
+def test_tipo_sin_tildes_usa_los_umbrales_correctos(servidor):
+    estado, respuesta = _post(servidor, "/sellos", json.dumps({"alimento": "Plátano", "tipo": "solido"}).encode())
+    assert estado == 200
+    assert respuesta == {"tipo": "Sólido", "sellos": ["ALTO EN AZÚCARES"]}
+
+
+@pytest.mark.parametrize("ruta, campos, mensaje", [
+    ("/sellos", {"tipo": "gaseoso"}, "Tipo de producto desconocido"),
+    ("/etiqueta", {"tipo": "gaseoso"}, "Tipo de producto desconocido"),
+    ("/etiqueta", {"porcion": 0}, "'porcion' debe ser mayor que 0"),
+    ("/etiqueta", {"porciones_envase": -1}, "'porciones_envase' debe ser mayor que 0"),
+    ("/receta", dict(_RECETA, porcion=0), "'porcion' debe ser mayor que 0"),
+    ("/receta", dict(_RECETA, tipo="gaseoso"), "Tipo de producto desconocido"),
+])
+def test_datos_de_porcion_invalidos(servidor, ruta, campos, mensaje):
+    cuerpo = dict({"alimento": "Plátano", "png": False}, **campos)
+    estado, respuesta = _post(servidor, ruta, json.dumps(cuerpo).encode())
+    assert estado == 422
+    assert mensaje in respuesta["error"]
+
+
+def _pedidos_en_un_socket(servidor, *pedidos: bytes) -> bytes:
+    """Manda los pedidos seguidos por la misma conexión y lee hasta que se cierre."""
+    with socket.create_connection(servidor.server_address, timeout=30) as s:
+        s.sendall(b"".join(pedidos))
+        recibido = b""
+        while True:
+            parte = s.recv(65536)
+            if not parte:
+                return recibido
+            recibido += parte
+
+
+_SALUD_Y_CERRAR = b"GET /salud HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+
+
+@pytest.mark.parametrize("pedido, estado", [
+    (b"POST /no-existe HTTP/1.1\r\nHost: x\r\nContent-Length: 7\r\n\r\n{\"a\":1}", b"404"),
+    (b"POST /sellos HTTP/1.1\r\nHost: x\r\nContent-Length: abc\r\n\r\n{\"a\":1}", b"411"),
+    (b"POST /sellos HTTP/1.1\r\nHost: x\r\nContent-Length: 0\r\n\r\n", b"411"),
+])
+def test_error_temprano_no_contamina_la_conexion(servidor, pedido, estado):
+    respuesta = _pedidos_en_un_socket(servidor, pedido, _SALUD_Y_CERRAR)
+    assert respuesta.startswith(b"HTTP/1.1 " + estado)
+    assert b"Connection: close" in respuesta
+    # El cuerpo sin leer nunca se toma como el pedido siguiente
+    assert b"501" not in respuesta and respuesta.count(b"HTTP/1.1 ") == 1
+
+
+def test_keep_alive_entre_pedidos_validos(servidor):
+    cuerpo = b'{"alimento": "Platano"}'
+    pedido = (b"POST /sellos HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+              b"Content-Length: %d\r\n\r\n%s" % (len(cuerpo), cuerpo))
+    respuesta = _pedidos_en_un_socket(servidor, pedido, pedido, _SALUD_Y_CERRAR)
+    assert respuesta.count(b"HTTP/1.1 200 OK") == 3
@@ -0,0 +1,113 @@
+"""Pruebas de la app completa con streamlit.testing (AppTest)."""
+import io
+import zipfile
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+APP = str(Path(__file__).resolve().parent.parent / "app.py")
+
+RECETAS_CSV = (
+    "receta,alimento,gramos,porcion,porciones_envase,tipo,descripcion_porcion\n"
+    "Leche con plátano,Leche fluida entera(1),200,250,1,Líquido,1 vaso\n"
+    "Leche con plátano,Plátano,100,250,1,Líquido,1 vaso\n"
+    "Sin alimento,Alimento que no existe,50,100,1,Sólido,\n"
+)
+
+
+def _app_con_recetas(app, nombre, contenido):
+    """
+    Corre la app con `contenido` ya subido en el cargador de recetas
+    (AppTest no maneja st.file_uploader). Los datos de cada botón de
+    descarga quedan en st.session_state["_descargas"].
+    """
+    import io
+    import runpy
+
+    import streamlit as st
+
+    class Subido(io.BytesIO):
+        pass
+
+    def cargador(*args, key=None, **kwargs):
+        if key != "pliego_recetas":
+            return original(*args, key=key, **kwargs)
+        archivo = Subido(contenido)
+        archivo.name = nombre
+        return archivo
+
+    def descarga(label, data, *args, **kwargs):
+        # Lo que se ofrece para descargar queda en la sesión para revisarlo
+        st.session_state.setdefault("_descargas", {})[label] = data
+        return original_descarga(label, data, *args, **kwargs)
+
+    original, original_descarga = st.file_uploader, st.download_button
+    st.file_uploader, st.download_button = cargador, descarga
+    try:
+        runpy.run_path(app, run_name="__main__")
+    finally:
+        st.file_uploader, st.download_button = original, original_descarga
+
+
+def _app(nombre="recetas.csv", contenido=RECETAS_CSV.encode("utf-8")):
+    return AppTest.from_function(
+        _app_con_recetas, args=(APP, nombre, contenido), default_timeout=120
+    ).run()
+
+
+def test_exportar_zip_de_recetas_subidas():
+    at = _app()
+    assert not at.exception, at.exception
+
+    at.button(key="zip_btn").click().run()
+    assert not at.exception, at.exception
+
+    datos = at.session_state["_descargas"]["⬇️ Descargar ZIP de etiquetas"]
+    assert isinstance(datos, bytes)
+
+    # La receta buena trae su etiqueta; la que no existe, su error
+    nombres = zipfile.ZipFile(io.BytesIO(datos)).namelist()
+    assert "00000_leche_con_platano/etiqueta.html" in nombres
+    assert "00000_leche_con_platano/etiqueta.png" in nombres
+    assert "00001_sin_alimento/error.txt" in nombres
+
+
+def test_recetas_mal_formadas_muestran_error():
+    at = _app(contenido=b"receta,alimento,gramos\nA,Leche fluida entera(1),doscientos\n")
+    at.button(key="zip_btn").click().run()
+    assert not at.exception, at.exception
+    assert any("recetas.csv, fila 2: 'gramos'" in e.value for e in at.error)
+    assert "_descargas" not in at.session_state
+
+
+def test_panel_de_tiempos_con_las_etapas_de_cada_seccion():
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    at.sidebar.toggle(key="debug_tiempos").set_value(True).run()
+    assert not at.exception, at.exception
+
+    # Cada sección cierra su Tramos y muestra sus propios tiempos
+    tiempos = [c.value for c in at.caption if c.value.startswith("⏱️")]
+    assert len(tiempos) == 7
+    assert "seccion_un_alimento" in tiempos[0]
+
+    # El panel del rerun completo incluye las etapas de las secciones
+    etapas = list(at.sidebar.dataframe[0].value["Etapa"])
+    assert etapas[-1] == "rerun"
+    assert "seccion_tabla_completa" in etapas and "tabla" in etapas
+
+
+def test_png_de_un_alimento_se_vuelve_a_pedir_si_cambia_la_etiqueta():
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    at.text_input[0].input("platano").run()
+    at.button(key="png_unidad_btn").click().run()
+    assert not at.exception, at.exception
+
+    descargas = [b.label for b in at.get("download_button")]
+    assert "⬇️ Descargar etiqueta PNG" in descargas
+    assert "⬇️ Descargar etiqueta PDF" in descargas
+
+    # Otra porción: la etiqueta ya no es la que se generó
+    at.number_input[0].set_value(50.0).run()
+    descargas = [b.label for b in at.get("download_button")]
+    assert "⬇️ Descargar etiqueta PNG" not in descargas
+
@@ -0,0 +1,187 @@
+"""Pruebas de los índices de búsqueda contra un recorrido completo."""
+import random
+
+import pytest
+
+from etiquetado import catalogo
+from etiquetado.busqueda import (
+    IndiceDifuso, IndiceNgramas, IndiceSubcadenas, buscar_alimento, distancia_edicion,
+    tipo_coincidencia,
+)
+from etiquetado.texto import SINONIMOS, expandir_sinonimos, normalizar
+
+
+@pytest.fixture(scope="module")
+def nombres():
+    return catalogo.obtener().df["Alimento_normalizado"].astype(str).tolist()
+
+
+def _consultas(nombres, n=300, semilla=0):
+    """Subcadenas de los nombres (de 1 a 8 letras), más algunas que no existen."""
+    rng = random.Random(semilla)
+    consultas = ["", "zzz", "qx", "leche", "de ", " "]
+    for _ in range(n):
+        nombre = rng.choice(nombres)
+        if not nombre:
+            continue
+        largo = rng.randint(1, 8)
+        inicio = rng.randrange(max(1, len(nombre) - largo + 1))
+        consultas.append(nombre[inicio:inicio + largo])
+    return consultas
+
+
+
+def _ranking_por_recorrido(variantes, consulta, k):
+    """Mismo ranking que IndiceNgramas.buscar, comparando fila por fila."""
+    if not consulta:
+        return []
+    mejor = {}
+    entrada = 0
+    for fila, textos in enumerate(variantes):
+        for texto in textos:
+            tipo = tipo_coincidencia(consulta, texto)
+            if tipo is not None:
+                clave = (tipo, len(texto), entrada)
+                mejor[fila] = min(mejor.get(fila, clave), clave)
+            entrada += 1
+    return sorted(mejor, key=mejor.get)[:k]
+
+
+def test_consulta_corta_solo_revisa_los_textos_que_la_contienen(nombres, monkeypatch):
+    from etiquetado import busqueda
+
+    indice = IndiceNgramas(nombres)
+    revisados = []
+    original = busqueda.tipo_coincidencia
+    monkeypatch.setattr(
+        busqueda, "tipo_coincidencia", lambda c, t: revisados.append(t) or original(c, t)
+    )
+    # "qx" no está en ningún nombre; "ñ" está en pocos y casi nunca al inicio de palabra
+    for consulta in ("qx", "ñ"):
+        revisados.clear()
+        indice.buscar(consulta, 10)
+        assert all(consulta in texto for texto in revisados), consulta
+        assert len(revisados) <= sum(consulta in t for t in indice.textos)
+
+
+@pytest.mark.parametrize("sinonimos", [None, SINONIMOS])
+def test_ngramas_igual_que_recorrido(nombres, sinonimos):
+    indice = IndiceNgramas(nombres, sinonimos)
+    variantes = [expandir_sinonimos(n, sinonimos) for n in nombres]
+    consultas = _consultas(nombres, 200, semilla=2) + ["fresa", "frutillas", "aguacate", "judias"]
+    for consulta in consultas:
+        for k in (1, 10):
+            esperado = _ranking_por_recorrido(variantes, consulta, k)
+            assert indice.buscar(consulta, k) == esperado, (consulta, k)
+
+
+def _distancia_completa(a, b):
+    """Damerau-Levenshtein (transposiciones adyacentes) sin tope, por tabla completa."""
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1,
+                          d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+def _con_errores(palabra, rng, errores):
+    """La palabra con `errores` cambios al azar (cambio, borrado, inserción o trasposición)."""
+    for _ in range(errores):
+        i = rng.randrange(len(palabra))
+        tipo = rng.randrange(4)
+        letra = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        if tipo == 0:
+            palabra = palabra[:i] + letra + palabra[i + 1:]
+        elif tipo == 1 and len(palabra) > 1:
+            palabra = palabra[:i] + palabra[i + 1:]
+        elif tipo == 2:
+            palabra = palabra[:i] + letra + palabra[i:]
+        elif i + 1 < len(palabra):
+            palabra = palabra[:i] + palabra[i + 1] + palabra[i] + palabra[i + 2:]
+    return palabra
+
+
+def test_distancia_edicion_igual_que_tabla_completa(nombres):
+    rng = random.Random(3)
+    palabras = sorted({p for n in nombres for p in n.split()})
+    for _ in range(2000):
+        a = rng.choice(palabras)
+        b = _con_errores(a, rng, rng.randint(0, 3)) if rng.random() < 0.7 else rng.choice(palabras)
+        for tope in (1, 2):
+            assert distancia_edicion(a, b, tope) == min(_distancia_completa(a, b), tope + 1), (a, b)
+
+
+def test_sugerencias_igual_que_recorrer_el_vocabulario(nombres):
+    difuso = IndiceDifuso(IndiceNgramas(nombres))
+    vocabulario = difuso._frecuencia
+    rng = random.Random(4)
+    palabras = sorted(vocabulario)
+    for _ in range(300):
+        palabra = _con_errores(rng.choice(palabras), rng, rng.randint(1, 2))
+        if palabra in vocabulario:
+            assert difuso.sugerencias(palabra) == [(palabra, 0)]
+            continue
+
+        tope = 0 if len(palabra) <= 2 else 1 if len(palabra) <= 5 else 2
+        esperado = [
+            (v, _distancia_completa(palabra, v)) for v in palabras if abs(len(v) - len(palabra)) <= tope
+        ]
+        esperado = sorted(
+            ((v, d) for v, d in esperado if 0 < d <= tope),
+            key=lambda s: (s[1], -vocabulario[s[0]], s[0]),
+        )
+        assert difuso.sugerencias(palabra) == esperado, palabra
+
+
+def test_difuso_encuentra_el_nombre_con_un_error(nombres):
+    difuso = IndiceDifuso(IndiceNgramas(nombres))
+    rng = random.Random(5)
+    for _ in range(200):
+        fila = rng.randrange(len(nombres))
+        palabras = nombres[fila].split()
+        # Un error en una palabra larga (las cortas no se corrigen)
+        largas = [i for i, p in enumerate(palabras) if len(p) >= 6]
+        if not largas:
+            continue
+        i = rng.choice(largas)
+        palabras[i] = _con_errores(palabras[i], rng, 1)
+        consulta = " ".join(palabras)
+        if consulta == nombres[fila]:
+            continue
+        # El nombre original queda entre los primeros (otros pueden estar
+        # a la misma distancia y ser más frecuentes)
+        correcciones = {p for p, _ in difuso.sugerencias(palabras[i])[:3]}
+        if nombres[fila].split()[i] in correcciones:
+            assert nombres[fila] in [nombres[f] for f in difuso.buscar(consulta, 50)], consulta
+
+
+def test_subcadenas_igual_que_recorrido(nombres):
+    indice = IndiceSubcadenas(nombres)
+    for consulta in _consultas(nombres):
+        esperado = [i for i, n in enumerate(nombres) if consulta in n]
+        assert indice.filtrar(consulta) == esperado, consulta
+
+
+def test_tabla_filtrar_igual_que_recorrido():
+    tabla = catalogo.obtener().tabla
+    nombres = tabla._nombres
+    assert tabla.filtrar("") is None
+    for consulta in _consultas(nombres, 100, semilla=1):
+        consulta = normalizar(consulta)
+        if consulta:
+            esperado = [i for i, n in enumerate(nombres) if consulta in n]
+            assert list(tabla.filtrar(consulta)) == esperado, consulta
+
+
+def test_buscar_alimento_normaliza_y_tolera_errores():
+    cat = catalogo.obtener()
+
+    def nombres_de(consulta):
+        return [cat.df["Alimento"].iat[f] for f in buscar_alimento(cat, consulta, k=2)]
+
+    assert nombres_de("PLATANO")[0] == "Plátano"
+    assert nombres_de("platamo")[0] == "Plátano"
+    assert nombres_de("zzzzqq") == []
@@ -0,0 +1,91 @@
+"""Pruebas del esquema del catálogo (float32 y conversión a float64)."""
+import numpy as np
+import pytest
+
+from etiquetado import catalogo
+from etiquetado.sellos import TIPOS_PRODUCTO, calcular_sellos
+
+
+def _decimales(filas, columnas=37, semilla=0):
+    """Valores como los del Excel: enteros de hasta 6 cifras con 0 a 3 decimales."""
+    rng = np.random.default_rng(semilla)
+    enteros = rng.integers(0, 10**6, (filas, columnas))
+    divisores = np.array([1.0, 10.0, 100.0, 1000.0])[rng.integers(0, 4, (filas, columnas))]
+    return enteros / divisores
+
+
+def _por_texto(valores):
+    """Conversión de referencia: float32 -> texto más corto -> float64."""
+    return np.asarray(valores, dtype=np.float32).astype(str).astype(np.float64)
+
+
+def test_a_float64_conserva_los_decimales():
+    decimales = _decimales(2000)
+    convertidos = catalogo.a_float64(decimales.astype(np.float32))
+    assert convertidos.dtype == np.float64
+    np.testing.assert_array_equal(convertidos, decimales)
+
+
+def test_a_float64_casos_borde():
+    valores = np.array([np.nan, 0.0, -2.3, np.inf, -np.inf, 1e-20, 2.5e7, 1.5e9], dtype=np.float32)
+    np.testing.assert_array_equal(catalogo.a_float64(valores), _por_texto(valores))
+    assert catalogo.a_float64([]).shape == (0,)
+
+
+def test_a_float64_respeta_forma_y_orden():
+    decimales = _decimales(300, 7)
+    for entrada in (np.asfortranarray(decimales), decimales[:, ::2], decimales[5]):
+        np.testing.assert_array_equal(catalogo.a_float64(entrada.astype(np.float32)), entrada)
+
+
+def test_a_float64_igual_que_por_texto():
+    # La velocidad frente a esta referencia se mide en etiquetado.rendimiento
+    valores = _decimales(10_000).astype(np.float32)
+    np.testing.assert_array_equal(catalogo.a_float64(valores), _por_texto(valores))
+
+
+@pytest.fixture(scope="module")
+def cat():
+    return catalogo.obtener()
+
+
+def test_esquema_del_catalogo(cat):
+    tipos = cat.df.dtypes
+    numericas = [c for c in cat.df.columns if c not in ("Alimento", "Alimento_normalizado",
+                                                         catalogo.COLUMNA_TIPO, catalogo.COLUMNA_FUENTE)]
+    assert all(tipos[c] == np.float32 for c in numericas)
+    assert isinstance(tipos[catalogo.COLUMNA_FUENTE], type(cat.df[catalogo.COLUMNA_TIPO].dtype))
+    assert cat.df[catalogo.COLUMNA_FUENTE].cat.categories.dtype == np.int64
+
+
+def test_sellos_del_catalogo_iguales_a_calcular_sellos(cat):
+    columnas = cat.matriz.columnas
+    valores = catalogo.a_float64(cat.df[columnas].to_numpy(np.float32))
+    for fila in range(len(cat.df)):
+        datos = dict(zip(columnas, valores[fila]))
+        for tipo in TIPOS_PRODUCTO:
+            assert cat.sellos.sellos_de(fila, tipo) == calcular_sellos(datos, tipo)
+
+
+def test_filtro_de_sellos_solo_sobre_alimentos(cat):
+    import pandas as pd
+
+    from etiquetado.sellos import SellosCatalogo
+
+    df = pd.DataFrame({
+        "Energía(kcal)": [np.nan, 500.0, 20.0, np.nan],
+        "Sodio (mg)": [np.nan, 900.0, 10.0, 5.0],
+    }, dtype=np.float32)
+    # Un título con números, un alimento alto en sodio, uno sin sellos y
+    # uno sin energía (agua): cuenta el tipo de fila, no si hay energía
+    es_alimento = [False, True, True, True]
+    sellos = SellosCatalogo(df, es_alimento)
+    assert list(sellos.filtrar("Sólido", sin_sellos=True)) == [2, 3]
+    assert list(sellos.filtrar("Sólido", con=["ALTO EN SODIO"])) == [1]
+    assert sellos.conteos("Sólido")["SIN SELLOS"] == 2
+
+    # En el catálogo, los alimentos son exactamente las filas con Tipo_fila "alimento"
+    conteos = cat.sellos.conteos("Sólido")
+    sin_sellos = cat.sellos.filtrar("Sólido", sin_sellos=True)
+    assert conteos["SIN SELLOS"] == len(sin_sellos)
+    assert cat.es_alimento[sin_sellos].all()
@@ -0,0 +1,25 @@
+"""Pruebas de las etiquetas HTML."""
+from etiquetado import etiquetas
+
+# Nutriente de cada parámetro de construir_etiqueta_html_manual, con valores distintos
+_PARAMETROS = {
+    "energia": "Energía(kcal)", "prot": "Proteínas (g)", "grasa_total": "Lípidos totales (g)",
+    "grasa_sat": "AG Sat (g)", "hdc": "HdeC disp (g)", "azucar": "Azúcares totales (g)",
+    "sodio": "Sodio (mg)", "mono": "AG Mono (g)", "poli": "AG Poli (g)", "trans": "AG Trans (g)",
+    "fibra": "Fibra Total (g)", "calcio": "Calcio (mg)", "hierro": "Hierro (mg)",
+    "zinc": "Zinc (mg)", "vitd": "Vit D (ug)", "vitb12": "Vit B12 (ug)", "folatos": "Folatos (ug)",
+}
+
+
+def test_html_manual_igual_que_etiqueta_html():
+    valores_100 = {col: 1.5 + i for i, col in enumerate(_PARAMETROS.values())}
+    argumentos = {}
+    for clave, col in _PARAMETROS.items():
+        argumentos[f"{clave}_100"] = valores_100[col]
+        argumentos[f"{clave}_porcion"] = -1.0  # se ignoran
+    opciones = {"incluir_desglose_grasas": True, "incluir_fibra": True, "incluir_micros": True}
+
+    manual = etiquetas.construir_etiqueta_html_manual(
+        "Producto", 30, 4, texto_porcion="1 taza", **argumentos, **opciones
+    )
+    assert manual == etiquetas.etiqueta_html(valores_100, 30, 4, "1 taza", **opciones)
@@ -0,0 +1,18 @@
+"""Importar el paquete no debe cargar dependencias pesadas."""
+import os
+from pathlib import Path
+
+import pytest
+
+from etiquetado import importacion
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("modulo", list(importacion.PRESUPUESTO_MS))
+def test_importar_no_carga_dependencias_pesadas(modulo, monkeypatch):
+    # El tiempo depende de la máquina: se revisa con python -m etiquetado.importacion
+    rutas = [str(RAIZ), os.environ.get("PYTHONPATH", "")]
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, rutas)))
+    _, pesados = importacion.medir(modulo, corridas=1)
+    assert pesados == []
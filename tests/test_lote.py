@@ -0,0 +1,130 @@
+"""Pruebas del etiquetado por lotes."""
+import time
+
+import pytest
+
+from etiquetado import catalogo, lote
+
+
+@pytest.fixture(scope="module")
+def cat():
+    return catalogo.obtener()
+
+
+def _receta(nombre, **ingredientes):
+    return lote.Receta(nombre, ingredientes or {"Plátano": 100}, 100)
+
+
+def test_procesar_lote_usa_el_catalogo_recibido(cat, monkeypatch):
+    def segundo_catalogo():
+        raise AssertionError("procesar_lote armó otro catálogo")
+
+    monkeypatch.setattr(catalogo, "obtener", segundo_catalogo)
+    resultados = list(lote.procesar_lote([_receta("a")], workers=1, cat=cat, png=False))
+    assert [i for i, _ in resultados] == [0]
+    assert "error" not in resultados[0][1]
+
+
+
+def _lote_mixto(n):
+    """Recetas buenas, con un alimento que no existe y sin cantidades."""
+    recetas = []
+    for i in range(n):
+        if i % 7 == 3:
+            recetas.append(lote.Receta(f"r{i}", {"Alimento que no existe": 10}, 100))
+        elif i % 11 == 5:
+            recetas.append(lote.Receta(f"r{i}", {"Plátano": 0}, 100))
+        else:
+            recetas.append(lote.Receta(f"r{i}", {"Plátano": 50 + i, "platano": 1}, 100))
+    return recetas
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_procesar_lote_en_orden_y_errores_aislados(cat, workers):
+    recetas = _lote_mixto(150)
+    resultados = list(lote.procesar_lote(recetas, workers=workers, cat=cat, png=False))
+
+    assert [i for i, _ in resultados] == list(range(len(recetas)))
+    for (i, r), receta in zip(resultados, recetas):
+        assert r["nombre"] == receta.nombre
+        if i % 7 == 3:
+            assert "no encontrado" in r["error"]
+        elif i % 11 == 5:
+            assert "mayores a 0" in r["error"]
+        else:
+            assert "error" not in r
+            # Los nombres con y sin tilde se suman en el mismo alimento
+            assert r["peso_total"] == 51 + i
+
+
+def _lento(cat, receta):
+    # Las primeras recetas terminan al final: el orden no depende de cuál acaba antes
+    numero = int(receta.nombre[1:])
+    time.sleep(0.02 if numero < 16 else 0)
+    if numero % 5 == 0:
+        raise ValueError(f"falla {numero}")
+    return {"nombre": receta.nombre}
+
+
+def test_procesar_lote_conserva_el_orden_con_workers(cat):
+    recetas = [_receta(f"r{i}") for i in range(100)]
+    resultados = list(lote.procesar_lote(recetas, workers=3, procesar=_lento, cat=cat))
+    assert [i for i, _ in resultados] == list(range(100))
+    assert [r.get("error") for _, r in resultados[:6]] == ["falla 0", None, None, None, None, "falla 5"]
+    assert [r["nombre"] for _, r in resultados] == [f"r{i}" for i in range(100)]
+
+
+@pytest.mark.parametrize("contenido, mensaje", [
+    ("receta,alimento,gramos\na,Plátano,100\na,Leche,mucho\n", "recetas.csv, fila 3: 'gramos' no es un número"),
+    ("receta,alimento\na,Plátano\n", "recetas.csv: faltan las columnas gramos"),
+    ("receta,alimento,gramos,porcion\na,Plátano,100,nan\n", "recetas.csv, fila 2: 'porcion' no es un número finito"),
+    ("receta,alimento,gramos\na,,100\n", "recetas.csv, fila 2: 'alimento' está vacío"),
+    ("receta,alimento,gramos\na,Plátano\n", "recetas.csv, fila 2: 'gramos' no es un número: None"),
+    ("receta,alimento,gramos,porcion\na,Plátano,100,0\n", "recetas.csv, fila 2: 'porcion' debe ser mayor que 0"),
+    ("receta,alimento,gramos,porciones_envase\na,Plátano,100,-2\n",
+     "recetas.csv, fila 2: 'porciones_envase' debe ser mayor que 0"),
+    ("receta,alimento,gramos,tipo\na,Plátano,100,gaseoso\n",
+     "recetas.csv, fila 2: 'tipo': Tipo de producto desconocido: 'gaseoso'"),
+])
+def test_leer_recetas_csv_mal_formado(tmp_path, contenido, mensaje):
+    ruta = tmp_path / "recetas.csv"
+    ruta.write_text(contenido, encoding="utf-8")
+    with pytest.raises(lote.DatosRecetaError) as error:
+        list(lote.leer_recetas(ruta))
+    assert str(error.value).startswith(mensaje)
+
+
+@pytest.mark.parametrize("contenido, mensaje", [
+    ('[{"nombre": "a", "ingredientes": {"Plátano": 100}}, {"nombre": "b"}]',
+     "recetas.json, receta 2: falta el campo 'ingredientes'"),
+    ('[{"nombre": "a", "ingredientes": [{"alimento": "Plátano", "gramos": "x"}]}]',
+     "recetas.json, receta 1: 'gramos de Plátano' no es un número"),
+    ('[{"nombre": "a", "ingredientes": [{"alimento": "Plátano"}]}]',
+     "recetas.json, receta 1: cada ingrediente debe tener"),
+    ('{"nombre": "a"}', "recetas.json: se esperaba una lista"),
+    ('[{"nombre": ', "recetas.json: no es un JSON válido"),
+])
+def test_leer_recetas_json_mal_formado(tmp_path, contenido, mensaje):
+    ruta = tmp_path / "recetas.json"
+    ruta.write_text(contenido, encoding="utf-8")
+    with pytest.raises(lote.DatosRecetaError) as error:
+        list(lote.leer_recetas(ruta))
+    assert str(error.value).startswith(mensaje)
+
+
+def test_leer_recetas_acepta_el_tipo_sin_tildes_ni_mayusculas(tmp_path):
+    ruta = tmp_path / "recetas.csv"
+    ruta.write_text(
+        "receta,alimento,gramos,tipo\na,Plátano,100,solido\nb,Leche,200,LIQUIDO\n", encoding="utf-8"
+    )
+    assert [r.tipo for r in lote.leer_recetas(ruta)] == ["Sólido", "Líquido"]
+
+
+def test_cli_con_archivo_mal_formado_termina_con_error(tmp_path, capsys):
+    from etiquetado import exportar, pliegos
+
+    ruta = tmp_path / "recetas.csv"
+    ruta.write_text("receta,alimento,gramos\na,Plátano,cien\n", encoding="utf-8")
+    for main, salida in ((lote.main, "salida"), (pliegos.main, "p.pdf"), (exportar.main, "e.zip")):
+        assert main([str(ruta), "-o", str(tmp_path / salida), "--workers", "1"]) == 2
+        assert "recetas.csv, fila 2: 'gramos'" in capsys.readouterr().err
@@ -0,0 +1,18 @@
+"""Pruebas de los tiempos por etapa."""
+from etiquetado import metricas
+
+
+def test_tramos_registra_etapas_y_total_con_su_nombre():
+    registro = metricas.Metricas()
+    tramos = metricas.Tramos(registro, nombre="seccion_prueba")
+    with tramos("busqueda"):
+        pass
+    assert tramos.abierto
+
+    total = tramos.cerrar()
+    assert not tramos.abierto
+    assert [etapa for etapa, _ in tramos.duraciones] == ["busqueda", "seccion_prueba"]
+    assert tramos.duraciones[-1][1] == total
+    assert {e: f["cuenta"] for e, f in registro.resumen().items()} == {
+        "busqueda": 1, "seccion_prueba": 1,
+    }
@@ -0,0 +1,95 @@
+"""Pruebas de la base SQLite de alimentos personalizados."""
+import pytest
+
+from etiquetado import catalogo
+from etiquetado.personalizados import AlmacenPersonalizados, PersonalizadoError
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    return AlmacenPersonalizados(tmp_path / "personalizados.db")
+
+
+def test_guardar_reemplaza_por_nombre_normalizado(almacen):
+    almacen.guardar("Queque de plátano", {"Energía(kcal)": 300, "Alimento": "ignorado"})
+    almacen.guardar("  Pan amasado ", {"Energía(kcal)": 280})
+    almacen.guardar("QUEQUE DE PLATANO", {"Sodio (mg)": 120})
+
+    # Conserva la posición de alta, toma el nombre nuevo y reemplaza los datos
+    assert almacen.filas() == [
+        ("QUEQUE DE PLATANO", "queque de platano", {"Sodio (mg)": 120}),
+        ("Pan amasado", "pan amasado", {"Energía(kcal)": 280}),
+    ]
+    assert len(almacen) == 2
+    with pytest.raises(PersonalizadoError):
+        almacen.guardar("   ", {})
+
+
+def test_editar_renombra_y_conserva_las_otras_columnas(almacen):
+    almacen.guardar("Queque", {"Energía(kcal)": 300, "Sodio (mg)": 100})
+    almacen.guardar("Pan", {"Energía(kcal)": 280})
+
+    almacen.editar("queque", "Queque casero", {"Sodio (mg)": 90})
+    assert almacen.filas()[0] == (
+        "Queque casero", "queque casero", {"Energía(kcal)": 300, "Sodio (mg)": 90},
+    )
+
+    # El nuevo nombre no puede chocar con otro alimento, y el original debe existir
+    with pytest.raises(PersonalizadoError, match="Ya existe"):
+        almacen.editar("Queque casero", "PAN", {})
+    with pytest.raises(PersonalizadoError, match="No existe"):
+        almacen.editar("Queque", "Otro", {})
+    with pytest.raises(PersonalizadoError):
+        almacen.editar("Pan", " ", {})
+    assert [a for a, _, _ in almacen.filas()] == ["Queque casero", "Pan"]
+
+
+def test_eliminar(almacen):
+    almacen.guardar("Queque", {"Energía(kcal)": 300})
+    almacen.guardar("Pan", {"Energía(kcal)": 280})
+
+    assert almacen.eliminar("QUEQUE")
+    assert not almacen.eliminar("Queque")
+    assert [a for a, _, _ in almacen.filas()] == ["Pan"]
+
+    # El nombre queda libre para un alta nueva
+    almacen.guardar("Queque", {"Energía(kcal)": 310})
+    assert [a for a, _, _ in almacen.filas()] == ["Pan", "Queque"]
+
+
+def test_importar_csv_una_sola_vez(almacen, tmp_path):
+    csv_antiguo = tmp_path / "antiguos.csv"
+    csv_antiguo.write_text(
+        "Alimento,Energía(kcal)\nQueque,300\nqueque,1\n,5\nPan,280\n", encoding="utf-8"
+    )
+    assert almacen.importar_csv(csv_antiguo) == 2
+    assert almacen.importar_csv(csv_antiguo) == 0
+    assert [(a, d["Energía(kcal)"]) for a, _, d in almacen.filas()] == [("Queque", 300), ("Pan", 280)]
+
+
+def test_almacen_personalizados_uno_por_archivo(tmp_path, monkeypatch):
+    csv_antiguo = tmp_path / "antiguos.csv"
+    csv_antiguo.write_text("Alimento,Energía(kcal)\nQueque,300\n", encoding="utf-8")
+    importaciones = []
+    importar = AlmacenPersonalizados.importar_csv
+    monkeypatch.setattr(
+        AlmacenPersonalizados, "importar_csv",
+        lambda self, ruta: importaciones.append(ruta) or importar(self, ruta),
+    )
+
+    base = tmp_path / "personalizados.db"
+    almacen = catalogo.almacen_personalizados(base, csv_antiguo)
+    assert catalogo.almacen_personalizados(str(base), str(csv_antiguo)) is almacen
+    assert catalogo.almacen_personalizados(tmp_path / "otra.db", csv_antiguo) is not almacen
+    assert len(importaciones) == 2
+    assert [a for a, _, _ in almacen.filas()] == ["Queque"]
+
+
+def test_otra_base_no_importa_el_csv_del_repo(tmp_path, monkeypatch):
+    csv_repo = tmp_path / "repo.csv"
+    csv_repo.write_text("Alimento,Energía(kcal)\nQueque,300\n", encoding="utf-8")
+    monkeypatch.setattr(catalogo, "PERSONALIZADOS_PATH", csv_repo)
+    monkeypatch.setattr(catalogo, "PERSONALIZADOS_DB", tmp_path / "app.db")
+
+    assert catalogo.almacen_personalizados(tmp_path / "otra.db").filas() == []
+    assert [a for a, _, _ in catalogo.almacen_personalizados(tmp_path / "app.db").filas()] == ["Queque"]
@@ -0,0 +1,61 @@
+"""Pruebas del motor de preparaciones."""
+import random
+
+import numpy as np
+import pytest
+
+from etiquetado import catalogo
+from etiquetado.recetas import RecetaError, TotalesIncrementales
+
+
+@pytest.fixture(scope="module")
+def matriz():
+    return catalogo.obtener().matriz
+
+
+def _ediciones(matriz, n, semilla=0):
+    """Recetas sucesivas como las de una sesión: se agrega, cambia o quita un ingrediente."""
+    rng = random.Random(semilla)
+    alimentos = rng.sample(sorted(matriz.fila_por_nombre), 25)
+    cantidades = {}
+    for _ in range(n):
+        alimento = rng.choice(alimentos)
+        accion = rng.random()
+        if accion < 0.15:
+            cantidades.pop(alimento, None)
+        elif accion < 0.25:
+            cantidades[alimento] = rng.choice([0, None])
+        elif accion < 0.3:
+            # Cantidades muy dispares: lo que más error de redondeo acumula
+            cantidades[alimento] = rng.choice([1e6, 1e-3])
+        else:
+            cantidades[alimento] = round(rng.uniform(1, 500), 1)
+        yield dict(cantidades)
+
+
+def test_totales_incrementales_igual_que_recalcular(matriz):
+    incremental = TotalesIncrementales(matriz)
+    for cantidades in _ediciones(matriz, 3000):
+        np.testing.assert_allclose(
+            incremental.actualizar(cantidades), matriz.totales(cantidades), rtol=1e-9, atol=1e-6,
+        )
+
+
+def test_calcular_incremental_igual_que_la_matriz(matriz):
+    incremental = TotalesIncrementales(matriz)
+    vistas = []
+    for cantidades in _ediciones(matriz, 500, semilla=1):
+        vistas.append(cantidades)
+        # Volver a una receta anterior usa el memo; el estado sigue siendo el último
+        for receta in (cantidades, random.Random(len(vistas)).choice(vistas)):
+            esperado = matriz.calcular(receta, 250)
+            resultado = incremental.calcular(receta, 250)
+            assert resultado.peso_total == pytest.approx(esperado.peso_total)
+            np.testing.assert_allclose(resultado.por_100, esperado.por_100, rtol=1e-9, atol=1e-6)
+            np.testing.assert_allclose(resultado.por_porcion, esperado.por_porcion, rtol=1e-9, atol=1e-6)
+
+
+def test_alimento_inexistente(matriz):
+    incremental = TotalesIncrementales(matriz)
+    with pytest.raises(RecetaError):
+        incremental.actualizar({"Alimento que no existe": 10})
@@ -0,0 +1,41 @@
+"""Pruebas de la normalización y los sinónimos."""
+import pytest
+
+from etiquetado.texto import SINONIMOS, expandir_sinonimos, plurales
+
+
+@pytest.mark.parametrize("palabra, esperado", [
+    ("palta", ("paltas",)),
+    ("poroto", ("porotos",)),
+    ("frijol", ("frijoles",)),
+    ("pimenton", ("pimentones",)),
+    ("maiz", ("maices",)),
+    ("mani", ("manis", "manies")),
+    ("ananas", ()),
+])
+def test_plurales(palabra, esperado):
+    assert plurales(palabra) == esperado
+
+
+@pytest.mark.parametrize("texto, variantes", [
+    ("frijoles negros", ["frijoles negros", "porotos negros", "judias negros"]),
+    ("pimentones rojos", ["pimentones rojos", "pimientos rojos"]),
+    ("pimientos", ["pimientos", "pimentones"]),
+    ("melocotones en almibar", ["melocotones en almibar", "duraznos en almibar"]),
+    ("manies", ["manies", "cacahuates", "cacahuetes"]),
+    ("poroto", ["poroto", "frijol", "judia"]),
+    ("paltas", ["paltas", "aguacates"]),
+    # Sólo palabras completas
+    ("papayas", ["papayas"]),
+    ("frijolitos", ["frijolitos"]),
+])
+def test_expandir_sinonimos_con_plurales(texto, variantes):
+    assert expandir_sinonimos(texto) == variantes
+
+
+def test_busqueda_por_sinonimo_en_plural():
+    from etiquetado.busqueda import IndiceNgramas
+
+    indice = IndiceNgramas(["pimentones rojos", "porotos negros", "palta"], SINONIMOS)
+    assert indice.buscar("pimientos", 1) == [0]
+    assert indice.buscar("frijoles", 1) == [1]
@@ -0,0 +1,78 @@
+"""Pruebas de las etiquetas vectoriales (SVG y PDF)."""
+import io
+
+from etiquetado import vectorial
+
+
+def test_documentos_vectoriales_memoizados():
+    valores = {"Energía(kcal)": 89.0, "Sodio (mg)": 1.0, "Columna que no se imprime": 3.0}
+    svg, pdf = vectorial.documentos_etiqueta(valores, 120, 1, "1 plátano")
+    assert svg == vectorial.etiqueta_svg(valores, 120, 1, "1 plátano")
+    assert pdf == vectorial.etiqueta_pdf(valores, 120, 1, "1 plátano")
+
+    # Una columna que la etiqueta no imprime no cambia la clave
+    otros = dict(valores, **{"Columna que no se imprime": 4.0})
+    assert vectorial.documentos_etiqueta(otros, 120, 1, "1 plátano")[1] is pdf
+    assert vectorial.documentos_etiqueta(valores, 100, 1, "1 plátano")[1] != pdf
+
+
+def _revisar_pdf(datos: bytes):
+    """
+    Revisa la estructura del PDF: la tabla xref apunta al inicio de cada
+    objeto y el /Length de cada flujo es su largo real. Devuelve los objetos.
+    """
+    assert datos.startswith(b"%PDF-1.4\n") and datos.endswith(b"%%EOF\n")
+    inicio_xref = int(datos[datos.rindex(b"startxref\n") + 10:].split()[0])
+    assert datos[inicio_xref:].startswith(b"xref\n")
+
+    lineas = datos[inicio_xref:].split(b"\n")
+    primero, cantidad = map(int, lineas[1].split())
+    assert primero == 0
+    assert f"/Size {cantidad} ".encode() in datos[inicio_xref:]
+    assert lineas[2] == b"0000000000 65535 f "
+
+    objetos = {}
+    for num in range(1, cantidad):
+        posicion, generacion, estado = lineas[2 + num].split()
+        assert (generacion, estado) == (b"00000", b"n")
+        posicion = int(posicion)
+        assert datos[posicion:].startswith(f"{num} 0 obj\n".encode()), num
+        fin = datos.index(b"\nendobj\n", posicion)
+        objeto = datos[posicion:fin]
+
+        if b"\nstream\n" in objeto:
+            cabecera, flujo = objeto.split(b"\nstream\n", 1)
+            assert flujo.endswith(b"\nendstream")
+            flujo = flujo[:-len(b"\nendstream")]
+            largo = int(cabecera[cabecera.index(b"/Length ") + 8:].split()[0].rstrip(b">"))
+            assert largo == len(flujo), num
+        objetos[num] = objeto
+    return objetos
+
+
+def test_pdf_de_una_etiqueta_con_xref_y_largos_correctos():
+    valores = {"Energía(kcal)": 89.0, "Proteínas (g)": 1.1, "Sodio (mg)": 1.0}
+    pdf = vectorial.etiqueta_pdf(valores, 120, 2, "1 plátano (120 g/ml) «maduro»",
+                                 incluir_desglose_grasas=True, incluir_fibra=True, incluir_micros=True)
+    objetos = _revisar_pdf(pdf)
+    assert b"/Count 1 " in objetos[2]
+
+
+def test_pliego_pdf_con_imagenes_y_varias_paginas():
+    from etiquetado import catalogo, lote, pliegos
+
+    recetas = [
+        lote.Receta(f"Receta {i}", {"Plátano": 100 + i, "Azúcar(1)": 50 * (i % 3), "Sal de mesa": i % 2}, 100)
+        for i in range(20)
+    ]
+    salida = io.BytesIO()
+    ubicadas, errores, paginas = pliegos.pliego_pdf(
+        recetas, salida, columnas=3, workers=1, cat=catalogo.obtener(),
+    )
+    assert (ubicadas, errores) == (20, [])
+    assert paginas > 1
+
+    objetos = _revisar_pdf(salida.getvalue())
+    assert f"/Count {paginas} ".encode() in objetos[2]
+    # Los sellos van como imágenes (con su máscara de transparencia)
+    assert any(b"/Subtype /Image" in o and b"/SMask" in o for o in objetos.values())